@@ -7,15 +7,19 @@ import random
 import zipfile
 import tempfile
 import pathlib
+import secrets
+import shutil
 import datetime
+import time
 import traceback
-from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Tuple, Union
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import yaml
-from rapidfuzz import fuzz
 from PyPDF2 import PdfReader, PdfWriter
 
 import plotly.express as px
@@ -24,12 +28,38 @@ from pdf2image import convert_from_bytes
 import pytesseract
 from PIL import Image
 
+from fdacore.datasets import (
+    COLUMN_MAPPING_CACHE_PATH, MANUFACTURER_CLUSTERS_PATH, NATURAL_KEYS, STREAM_CHUNK_ROWS,
+    ColumnMappingCache, ManufacturerResolver, _fmt_bytes, concat_compact, df_to_json_records,
+    parse_dataset_blob, resolve_data_path, standardize_df, stream_standardize, upsert_dataset,
+    upsert_report_lines,
+)
+from fdacore.openfda import OPENFDA_FIELD_PATHS, OPENFDA_MAX_WORKERS, ingest_openfda_bulk
+from fdacore.registry import SessionDatasets, SharedDatasetRegistry, cached_fingerprint
+from fdacore.store import DATASET_STORE_FORMATS, DatasetStore
+from fdacore.search import (
+    FACET_FIELDS, SEARCH_LIMIT, SEARCH_MAX_WORKERS, SEARCH_PAGE_SIZE, SEARCH_RANKINGS, SEARCH_SPECS,
+    TRIGRAM_MIN_OVERLAP, BoundedExecutor, DatasetSearchIndex, RegulatorySearchEngine, SearchCursor, SearchResult,
+    benchmark_trigram_prefilter,
+)
+from fdacore.synthetic import SYNTHETIC_SCALES, generate_synthetic_datasets
+from fdacore.highlight import coral_highlight
+from benchmarks.suite import compare_benchmark_runs, load_benchmark_runs, run_benchmark_suite, save_benchmark_run
+
 # ============================================================
 # Constants / Files
 # ============================================================
 DEFAULTSETS_PATH = "defaultsets.json"
 AGENTS_PATH = "agents.yaml"
 SKILL_PATH = "SKILL.md"
+# Largest synthetic scale the in-app benchmark runs (it runs inside the request); use `python -m benchmarks.suite` beyond.
+UI_BENCHMARK_MAX_SCALE = 100_000
+# Search exports are written under Streamlit's static folder (server.enableStaticServing) and served from there.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+EXPORT_DIR = os.path.join(STATIC_DIR, "exports")
+EXPORT_TTL_S = 3600
+# Server-side files (local stream ingest, openFDA bulk) are only read from under this directory.
+LOCAL_DATA_DIR = os.environ.get("FDA_LOCAL_DATA_DIR", "data")
 
 CORAL = "#FF7F50"
 
@@ -80,6 +110,40 @@ STRINGS = {
         "use_default": "Use default mock datasets",
         "paste": "Paste",
         "upload": "Upload",
+        "local_path": "Local file (streamed)",
+        "local_path_hint": "Path to CSV / JSON / NDJSON file on the server (.gz ok)",
+        "chunk_rows": "Rows per chunk",
+        "append_to_dataset": "Append to current dataset",
+        "upsert_mode": "Upsert by natural key",
+        "upsert_help": "Insert new records and update changed ones in the current dataset instead of replacing it; search indexes are patched for the changed rows only.",
+        "stream_ingest": "Stream + standardize",
+        "streamed_rows": "Rows read → kept",
+        "file_not_found": "File not found.",
+        "data_dir_caption": "Paths are relative to the server data directory",
+        "data_dir_missing": "Server-side ingestion is disabled: the data directory does not exist",
+        "shared_registry": "Shared dataset registry (admin)",
+        "registry_frames": "Shared frames",
+        "registry_size": "Registry size",
+        "sessions": "Sessions",
+        "private_overhead": "Private copies",
+        "without_sharing": "Memory if every session held its own copies",
+        "openfda_bulk": "openFDA bulk download",
+        "openfda_path_hint": "Directory or .zip of openFDA partition files on the server (device-510k-…, device-event-…, device-udi-…)",
+        "bulk_workers": "Worker processes",
+        "bulk_merge": "Merge into session",
+        "merge_replace": "Replace dataset",
+        "merge_append": "Append",
+        "merge_upsert": "Upsert by natural key",
+        "field_paths": "Field paths (CANON field → openFDA paths)",
+        "bulk_ingest": "Ingest + standardize",
+        "partitions_done": "Partitions",
+        "dataset_store": "Dataset store (versions)",
+        "version_name": "Version name",
+        "store_format": "Format",
+        "save_version": "Save current dataset",
+        "load_version": "Load version",
+        "delete_version": "Delete version",
+        "no_versions": "No stored versions for this dataset type.",
         "parse_load": "Parse & Load",
         "standardize": "Standardize",
         "preview": "Preview",
@@ -88,6 +152,7 @@ STRINGS = {
         "reset_defaults": "Reset to default datasets",
         "download_json": "Download JSON",
         "download_csv": "Download CSV",
+        "download_csv_gz": "Download CSV (gzip)",
         "dashboard": "Interactive Dashboard",
         "timeline": "Timeline",
         "distribution": "Distribution",
@@ -170,6 +235,30 @@ STRINGS = {
         "style_recommended": "Recommended style",
         "style_ai_help": "Use your current query / note / doc text as vibe signals to pick a painter style.",
         "run": "Run",
+        "predicate_lineage": "Predicate lineage",
+        "ancestors": "Predicates (ancestors)",
+        "descendants": "Cited by (descendants)",
+        "hops": "Hops",
+        "trigram_overlap": "Trigram prefilter (0 = exhaustive; higher is faster but may miss fuzzy matches)",
+        "search_benchmark": "Search benchmark",
+        "benchmark_queries": "Benchmark queries (one per line)",
+        "search_workers": "Search worker threads (1 = sequential)",
+        "search_timings": "Search timings",
+        "cached": "cached",
+        "ranking": "Ranking (fuzzy / BM25 long text / semantic)",
+        "device_dossier": "Device dossier",
+        "load_more": "Load more",
+        "facet_filter": "Filter by",
+        "benchmark_suite": "Benchmark suite (synthetic openFDA-scale data)",
+        "synthetic_scale": "Rows per dataset",
+        "repeats": "Repeats",
+        "load_synthetic": "Load synthetic data into session",
+        "benchmark_cli_hint": "Larger scales: run `python -m benchmarks.suite --scale 1000000` outside the app; saved runs show up below.",
+        "compare_runs": "Compare saved runs (p50 ms)",
+        "saved": "Saved",
+        "export_all_csv": "Export all matches (CSV)",
+        "showing_of": "Showing {shown} of {total}",
+        "query_syntax": "Filters: field:value, field:\"quoted value\", field:>=2023-01-01 (>, >=, <, <=), combined with AND / OR / NOT and ( ). Words inside OR / NOT groups filter rows; the remaining words are fuzzy-matched on the filtered rows.",
     },
     "zh-TW": {
         "app_title": "FDA 510(k) 審查工作室 — 法規指揮中心",
@@ -202,6 +291,40 @@ STRINGS = {
         "use_default": "使用預設 mock 資料",
         "paste": "貼上",
         "upload": "上傳",
+        "local_path": "本機檔案（串流）",
+        "local_path_hint": "伺服器上 CSV / JSON / NDJSON 檔案路徑（可為 .gz）",
+        "chunk_rows": "每批列數",
+        "append_to_dataset": "附加至目前資料集",
+        "upsert_mode": "依自然鍵更新插入（Upsert）",
+        "upsert_help": "將新紀錄插入、已變更紀錄更新至目前資料集，而非整批取代；搜尋索引僅針對變更的列增量更新。",
+        "stream_ingest": "串流並標準化",
+        "streamed_rows": "讀取列數 → 保留列數",
+        "file_not_found": "找不到檔案。",
+        "data_dir_caption": "路徑以伺服器資料目錄為根",
+        "data_dir_missing": "伺服器端匯入已停用：資料目錄不存在",
+        "shared_registry": "共用資料集登錄（管理）",
+        "registry_frames": "共用資料框",
+        "registry_size": "登錄大小",
+        "sessions": "工作階段",
+        "private_overhead": "私有副本",
+        "without_sharing": "若每個工作階段各自持有副本的記憶體",
+        "openfda_bulk": "openFDA 批次下載",
+        "openfda_path_hint": "伺服器上 openFDA 分割檔的目錄或 .zip（device-510k-…、device-event-…、device-udi-…）",
+        "bulk_workers": "工作程序數",
+        "bulk_merge": "合併至工作階段",
+        "merge_replace": "取代資料集",
+        "merge_append": "附加",
+        "merge_upsert": "依自然鍵更新插入",
+        "field_paths": "欄位路徑（CANON 欄位 → openFDA 路徑）",
+        "bulk_ingest": "匯入並標準化",
+        "partitions_done": "分割檔",
+        "dataset_store": "資料集儲存庫（版本）",
+        "version_name": "版本名稱",
+        "store_format": "格式",
+        "save_version": "儲存目前資料集",
+        "load_version": "載入版本",
+        "delete_version": "刪除版本",
+        "no_versions": "此資料集類型尚無已儲存版本。",
         "parse_load": "解析並載入",
         "standardize": "標準化",
         "preview": "預覽",
@@ -210,6 +333,7 @@ STRINGS = {
         "reset_defaults": "重置為預設資料集",
         "download_json": "下載 JSON",
         "download_csv": "下載 CSV",
+        "download_csv_gz": "下載 CSV（gzip）",
         "dashboard": "互動儀表板",
         "timeline": "時間軸",
         "distribution": "分佈",
@@ -292,6 +416,30 @@ STRINGS = {
         "style_recommended": "建議風格",
         "style_ai_help": "使用目前查詢 / 筆記 / 文件文字作為氛圍信號，交給 AI 挑一個畫家風格。",
         "run": "執行",
+        "predicate_lineage": "Predicate 譜系",
+        "ancestors": "引用的 Predicate（上游）",
+        "descendants": "被引用於（下游）",
+        "hops": "層數",
+        "trigram_overlap": "Trigram 預篩（0 = 完整比對；越高越快，但可能漏掉模糊比對結果）",
+        "search_benchmark": "搜尋效能測試",
+        "benchmark_queries": "測試查詢（每行一筆）",
+        "search_workers": "搜尋執行緒數（1 = 依序）",
+        "search_timings": "搜尋耗時",
+        "cached": "快取",
+        "ranking": "排序（模糊 / BM25 長文字 / 語意）",
+        "device_dossier": "裝置檔案",
+        "load_more": "載入更多",
+        "facet_filter": "依欄位篩選",
+        "benchmark_suite": "效能測試套件（合成 openFDA 規模資料）",
+        "synthetic_scale": "每個資料集列數",
+        "repeats": "重複次數",
+        "load_synthetic": "載入合成資料至工作階段",
+        "benchmark_cli_hint": "更大規模：請在應用程式外執行 `python -m benchmarks.suite --scale 1000000`；儲存的結果會顯示於下方。",
+        "compare_runs": "比較已儲存結果（p50 毫秒）",
+        "saved": "已儲存",
+        "export_all_csv": "匯出全部結果（CSV）",
+        "showing_of": "顯示 {shown} / {total}",
+        "query_syntax": "篩選：欄位:值、欄位:\"引號值\"、欄位:>=2023-01-01（>、>=、<、<=），可用 AND / OR / NOT 與 ( ) 組合。OR / NOT 群組內的文字用於篩選；其餘文字僅在篩選後的資料列上做模糊比對。",
     },
 }
 
@@ -460,37 +608,6 @@ def inject_css(theme: str, painter_accent: str, coral: str = CORAL):
 # ============================================================
 # Coral highlighting (regulatory ontology)
 # ============================================================
-DEFAULT_ONTOLOGY = [
-    "predicate", "predicate device",
-    "warning", "contraindication",
-    "sterile", "biocompatibility",
-    "malfunction", "recall",
-    "mri", "latex",
-    "serious injury", "death",
-    "cybersecurity", "software",
-    "failure", "misfire",
-    "udi", "510(k)", "k-number", "k number",
-    "intended use", "class iii", "class ii", "class i",
-]
-
-
-def coral_highlight(text: str, keywords: Optional[List[str]] = None) -> str:
-    if not text:
-        return ""
-    kws = keywords or DEFAULT_ONTOLOGY
-    kws = sorted(set([k.strip() for k in kws if k and k.strip()]), key=len, reverse=True)
-    out = text
-
-    def repl(m):
-        w = m.group(0)
-        return f'<span class="coral"><b>{w}</b></span>'
-
-    for k in kws:
-        pattern = re.compile(rf"(?i)({re.escape(k)})")
-        out = pattern.sub(repl, out)
-    return out
-
-
 def safe_md_render(md: str) -> None:
     st.markdown(f"<div class='wow-card editor-frame'>{coral_highlight(md)}</div>", unsafe_allow_html=True)
 
@@ -513,329 +630,95 @@ def load_defaultsets_json() -> Dict[str, Any]:
 
 
 # ============================================================
-# Dataset parsing + standardization
+# Standardization caches (shared across reruns and sessions)
 # ============================================================
-CANON = {
-    "510k": [
-        "k_number", "decision_date", "decision", "device_name", "applicant", "manufacturer_name", "product_code",
-        "regulation_number", "device_class", "panel", "review_advisory_committee", "predicate_k_numbers", "summary",
-    ],
-    "adr": [
-        "adverse_event_id", "report_date", "event_type", "patient_outcome", "device_problem", "manufacturer_name",
-        "brand_name", "product_code", "device_class", "udi_di", "recall_number_link", "narrative",
-    ],
-    "gudid": [
-        "primary_di", "udi_di", "device_description", "device_class", "manufacturer_name", "brand_name", "product_code",
-        "gmdn_term", "mri_safety", "sterile", "single_use", "implantable", "contains_nrl", "version_or_model_number",
-        "catalog_number", "record_status", "publish_date", "company_contact_email", "company_contact_phone",
-        "company_state", "company_country",
-    ],
-    "recall": [
-        "recall_number", "recall_class", "event_date", "termination_date", "status", "firm_name", "manufacturer_name",
-        "product_description", "product_code", "code_info", "reason_for_recall", "distribution_pattern",
-        "quantity_in_commerce", "country", "state",
-    ],
-}
+@st.cache_resource(show_spinner=False)
+def column_mapping_cache() -> ColumnMappingCache:
+    """Process-wide mapping cache backed by COLUMN_MAPPING_CACHE_PATH."""
+    return ColumnMappingCache(COLUMN_MAPPING_CACHE_PATH)
 
-SYNONYMS = {
-    "510k": {
-        "k_number": ["k_number", "knumber", "k", "k_no", "k#", "submission_number"],
-        "decision_date": ["decision_date", "clearance_date", "date"],
-        "decision": ["decision", "decision_code", "determination", "se_decision"],
-        "device_name": ["device_name", "device", "name", "device_title", "device title"],
-        "applicant": ["applicant", "submitter", "company", "applicant_name"],
-        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "firm_name"],
-        "product_code": ["product_code", "productcode", "procode", "code"],
-        "regulation_number": ["regulation_number", "regulation", "21cfr", "cfr"],
-        "device_class": ["device_class", "class"],
-        "panel": ["panel", "medical_specialty", "review_panel"],
-        "review_advisory_committee": ["review_advisory_committee", "committee"],
-        "predicate_k_numbers": ["predicate_k_numbers", "predicates", "predicate", "predicate_k", "predicate_knumbers"],
-        "summary": ["summary", "description", "clearance_summary", "decision_summary"],
-    },
-    "adr": {
-        "adverse_event_id": ["adverse_event_id", "mdr_id", "event_id", "report_id", "mdr_report_key"],
-        "report_date": ["report_date", "date"],
-        "event_type": ["event_type", "type"],
-        "patient_outcome": ["patient_outcome", "outcome"],
-        "device_problem": ["device_problem", "problem", "issue", "device_problem_code"],
-        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "firm_name"],
-        "brand_name": ["brand_name", "brand", "device_brand"],
-        "product_code": ["product_code", "code"],
-        "device_class": ["device_class", "class"],
-        "udi_di": ["udi_di", "udi", "primary_di", "di"],
-        "recall_number_link": ["recall_number_link", "recall_number", "linked_recall"],
-        "narrative": ["narrative", "description", "event_description", "text"],
-    },
-    "gudid": {
-        "primary_di": ["primary_di", "primarydi", "udi_di", "udi", "di"],
-        "udi_di": ["udi_di", "primary_di", "udi", "di"],
-        "device_description": ["device_description", "description", "device_desc"],
-        "device_class": ["device_class", "class"],
-        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "company"],
-        "brand_name": ["brand_name", "brand", "device_brand"],
-        "product_code": ["product_code", "code"],
-        "gmdn_term": ["gmdn_term", "gmdn", "gmdn_name"],
-        "mri_safety": ["mri_safety", "mri", "mri_status", "mri_safety_status"],
-        "sterile": ["sterile", "is_sterile"],
-        "single_use": ["single_use", "singleuse", "is_single_use"],
-        "implantable": ["implantable", "is_implantable"],
-        "contains_nrl": ["contains_nrl", "nrl", "latex", "contains_latex"],
-        "version_or_model_number": ["version_or_model_number", "model", "model_number", "version"],
-        "catalog_number": ["catalog_number", "catalog", "cat_no"],
-        "record_status": ["record_status", "status"],
-        "publish_date": ["publish_date", "date"],
-        "company_contact_email": ["company_contact_email", "email"],
-        "company_contact_phone": ["company_contact_phone", "phone", "telephone"],
-        "company_state": ["company_state", "state"],
-        "company_country": ["company_country", "country"],
-    },
-    "recall": {
-        "recall_number": ["recall_number", "recall", "recall_id", "z_number", "z#"],
-        "recall_class": ["recall_class", "class"],
-        "event_date": ["event_date", "date", "initiation_date"],
-        "termination_date": ["termination_date", "term_date"],
-        "status": ["status", "recall_status"],
-        "firm_name": ["firm_name", "firm", "company", "applicant"],
-        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "firm_name"],
-        "product_description": ["product_description", "description", "product"],
-        "product_code": ["product_code", "code"],
-        "code_info": ["code_info", "lots", "serials", "batch"],
-        "reason_for_recall": ["reason_for_recall", "reason", "root_cause", "root_cause_description", "cause"],
-        "distribution_pattern": ["distribution_pattern", "distribution"],
-        "quantity_in_commerce": ["quantity_in_commerce", "quantity", "qty"],
-        "country": ["country"],
-        "state": ["state"],
-    },
-}
 
+@st.cache_resource(show_spinner=False)
+def manufacturer_resolver() -> ManufacturerResolver:
+    """Process-wide resolver backed by MANUFACTURER_CLUSTERS_PATH."""
+    return ManufacturerResolver(MANUFACTURER_CLUSTERS_PATH)
 
-def _norm_col(s: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", (s or "").lower())
 
+def save_standardization_caches() -> None:
+    """Persist what a Dataset Studio action learned; standardization itself never writes files."""
+    manufacturer_resolver().save()
+    column_mapping_cache().save()
 
-def detect_format(text: str) -> str:
-    t0 = (text or "").lstrip()
-    if not t0:
-        return "unknown"
-    if t0.startswith("{") or t0.startswith("["):
-        return "json"
-    if "," in t0 and "\n" in t0:
-        return "csv"
-    return "text"
 
+# ============================================================
+# Search engine cache (shared across reruns and sessions)
+# ============================================================
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_dataset_index(dataset: str, fingerprint: str, _df: pd.DataFrame,
+                          _prebuilt: Optional[DatasetSearchIndex] = None) -> DatasetSearchIndex:
+    """`_prebuilt` seeds the entry with an index derived incrementally (see `upsert_with_index`)."""
+    if _prebuilt is not None:
+        return _prebuilt
+    return DatasetSearchIndex(dataset, _df, fingerprint=fingerprint)
 
-def parse_dataset_blob(blob: Union[str, bytes], filename: Optional[str] = None) -> pd.DataFrame:
-    if isinstance(blob, bytes):
-        text = blob.decode("utf-8", errors="ignore")
-    else:
-        text = blob
-
-    fmt = None
-    if filename:
-        fn = filename.lower()
-        if fn.endswith(".json"):
-            fmt = "json"
-        elif fn.endswith(".csv"):
-            fmt = "csv"
-        else:
-            fmt = detect_format(text)
-    else:
-        fmt = detect_format(text)
-
-    if fmt == "json":
-        obj = json.loads(text)
-        if isinstance(obj, dict):
-            for k in ["datasets", "data", "records", "items", "rows"]:
-                if k in obj and isinstance(obj[k], list):
-                    obj = obj[k]
-                    break
-            if isinstance(obj, dict):
-                obj = [obj]
-        if not isinstance(obj, list):
-            raise ValueError("JSON must be a list of objects (or a wrapper containing a list).")
-        return pd.DataFrame(obj)
-
-    if fmt == "csv":
-        return pd.read_csv(io.StringIO(text))
 
-    try:
-        obj = json.loads(text)
-        if isinstance(obj, dict):
-            obj = [obj]
-        return pd.DataFrame(obj)
-    except Exception:
-        return pd.read_csv(io.StringIO(text))
-
-
-def _best_match_column(df_cols: List[str], candidates: List[str]) -> Optional[str]:
-    norm_map = {_norm_col(c): c for c in df_cols}
-    for cand in candidates:
-        n = _norm_col(cand)
-        if n in norm_map:
-            return norm_map[n]
-    best, best_score = None, 0
-    for c in df_cols:
-        for cand in candidates:
-            sc = fuzz.ratio(_norm_col(c), _norm_col(cand))
-            if sc > best_score:
-                best_score, best = sc, c
-    return best if best_score >= 85 else None
-
-
-def standardize_df(dataset_type: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
-    dataset_type = dataset_type.lower().strip()
-    if df is None or df.empty:
-        return pd.DataFrame(), "No data to standardize."
-
-    canon = CANON[dataset_type]
-    syn = SYNONYMS[dataset_type]
-    original_cols = list(df.columns)
-
-    mapped: Dict[str, Optional[str]] = {}
-    report_lines = ["### Standardization Mapping", "", "| Canonical field | Source column |", "|---|---|"]
-    for cfield in canon:
-        src = _best_match_column(original_cols, syn.get(cfield, [cfield]))
-        mapped[cfield] = src
-        report_lines.append(f"| `{cfield}` | `{src if src else '— (missing)'}` |")
-
-    out = pd.DataFrame()
-    for cfield in canon:
-        src = mapped[cfield]
-        out[cfield] = df[src] if (src and src in df.columns) else None
-
-    if dataset_type == "510k":
-        def to_list(x):
-            if x is None or (isinstance(x, float) and pd.isna(x)):
-                return []
-            if isinstance(x, list):
-                return x
-            if isinstance(x, str):
-                parts = [p.strip() for p in re.split(r"[;,]+", x) if p.strip()]
-                return parts
-            return [str(x)]
-        out["predicate_k_numbers"] = out["predicate_k_numbers"].apply(to_list)
-
-    if dataset_type == "gudid":
-        def to_bool(v):
-            if isinstance(v, bool):
-                return v
-            if v is None or (isinstance(v, float) and pd.isna(v)):
-                return None
-            s = str(v).strip().lower()
-            if s in ["true", "t", "yes", "y", "1"]:
-                return True
-            if s in ["false", "f", "no", "n", "0"]:
-                return False
-            return None
-        for bcol in ["sterile", "single_use", "implantable", "contains_nrl"]:
-            out[bcol] = out[bcol].apply(to_bool)
+@st.cache_resource(show_spinner=False)
+def _search_engine_keys() -> Set[Tuple[Tuple[str, str], ...]]:
+    """Keys of `_cached_search_engine` entries, so engines over a released frame can be cleared."""
+    return set()
 
-    if dataset_type == "recall":
-        def to_int(v):
-            if v is None or (isinstance(v, float) and pd.isna(v)):
-                return None
-            try:
-                return int(float(str(v).replace(",", "").strip()))
-            except Exception:
-                return None
-        out["quantity_in_commerce"] = out["quantity_in_commerce"].apply(to_int)
 
-    def row_has_any_signal(r):
-        for c in canon:
-            v = r.get(c)
-            if isinstance(v, list) and len(v) > 0:
-                return True
-            if v is None:
-                continue
-            if isinstance(v, float) and pd.isna(v):
-                continue
-            if str(v).strip() != "":
-                return True
-        return False
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _cached_search_engine(fingerprints: Tuple[Tuple[str, str], ...], _dfs: Dict[str, pd.DataFrame]) -> RegulatorySearchEngine:
+    indexes = {ds: _cached_dataset_index(ds, fp, _dfs[ds]) for ds, fp in fingerprints}
+    _search_engine_keys().add(fingerprints)
+    return RegulatorySearchEngine(_dfs, indexes=indexes, version=fingerprints)
 
-    out = out[out.apply(row_has_any_signal, axis=1)].reset_index(drop=True)
 
-    report_lines += ["", f"**Rows:** {len(out)}", f"**Original columns:** {len(original_cols)}"]
-    return out, "\n".join(report_lines)
+def evict_released_indexes() -> None:
+    """
+    Clear the index and engine cache entries of frames the shared registry has dropped; they hold the
+    frame themselves, so without this it would stay resident after its last session let go of it.
+    A session still holding an identical private frame just rebuilds the index on its next search.
+    """
+    released = dataset_registry().pop_released()
+    if not released:
+        return
+    keys = _search_engine_keys()
+    for dataset, fp in released:
+        _cached_dataset_index.clear(dataset, fp, None)
+        for key in [k for k in list(keys) if (dataset, fp) in k]:
+            _cached_search_engine.clear(key, None)
+            keys.discard(key)
 
 
-def df_to_json_records(df: pd.DataFrame) -> str:
-    return json.dumps(df.to_dict(orient="records"), ensure_ascii=False, indent=2)
+def upsert_with_index(dataset: str, base: pd.DataFrame, delta: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    `upsert_dataset`, then seed the index cache for the merged frame by patching the base frame's
+    index for the changed rows only, so the next `get_search_engine` call does not rebuild it.
+    """
+    merged, stats = upsert_dataset(dataset, base, delta)
+    rows = stats["changed_rows"]
+    if dataset in SEARCH_SPECS and merged is not base and base is not None and not base.empty and len(rows):
+        old = _cached_dataset_index(dataset, cached_fingerprint(base), base)
+        fp = cached_fingerprint(merged)
+        _cached_dataset_index(dataset, fp, merged, _prebuilt=old.with_rows(merged, rows, fp))
+    return merged, stats
 
 
-# ============================================================
-# Search engine
-# ============================================================
-@dataclass
-class SearchResult:
-    dataset: str
-    score: int
-    record: Dict[str, Any]
-
-
-class RegulatorySearchEngine:
-    def __init__(self, dfs: Dict[str, pd.DataFrame]):
-        self.dfs = dfs
-
-    def _score_row(self, row: Dict[str, Any], cols: List[str], query: str, exact: bool, fuzzy_level: int) -> int:
-        q = (query or "").strip().lower()
-        if not q:
-            return 0
-        best = 0
-        for c in cols:
-            v = str(row.get(c, "")).lower()
-            if not v:
-                continue
-            if exact:
-                if q in v:
-                    best = max(best, 100)
-            else:
-                best = max(best, fuzz.partial_ratio(q, v))
-        return best if best >= fuzzy_level else 0
-
-    def search(self, query: str, include: Dict[str, bool], exact: bool, fuzzy_level: int) -> Dict[str, List[SearchResult]]:
-        results: Dict[str, List[SearchResult]] = {k: [] for k in ["510k", "recall", "adr", "gudid"]}
-        q = (query or "").strip()
-        if not q:
-            return results
-
-        specs = {
-            "510k": ["k_number", "device_name", "applicant", "manufacturer_name", "product_code", "summary", "panel", "decision"],
-            "recall": ["recall_number", "firm_name", "manufacturer_name", "product_code", "reason_for_recall", "product_description", "recall_class", "status"],
-            "adr": ["adverse_event_id", "brand_name", "manufacturer_name", "product_code", "udi_di", "device_problem", "patient_outcome", "narrative"],
-            "gudid": ["udi_di", "primary_di", "brand_name", "manufacturer_name", "product_code", "device_description", "gmdn_term", "mri_safety"],
-        }
-
-        for ds, df in self.dfs.items():
-            if ds not in results:
-                continue
-            if not include.get(ds, True):
-                continue
-            if df is None or df.empty:
-                continue
-            cols = specs.get(ds, list(df.columns))
-            for _, r in df.iterrows():
-                rec = r.to_dict()
-                sc = self._score_row(rec, cols, q, exact=exact, fuzzy_level=fuzzy_level)
-                if sc:
-                    results[ds].append(SearchResult(ds, sc, rec))
-            results[ds].sort(key=lambda x: x.score, reverse=True)
-            results[ds] = results[ds][:200]
-
-        q_upper = q.upper()
-        if include.get("510k", True) and results["510k"]:
-            top = results["510k"][0].record
-            if str(top.get("k_number", "")).upper() == q_upper:
-                preds = top.get("predicate_k_numbers") or []
-                for pk in preds:
-                    for _, r in self.dfs["510k"].iterrows():
-                        rec = r.to_dict()
-                        if str(rec.get("k_number", "")).upper() == str(pk).upper():
-                            results["510k"].append(SearchResult("510k", 95, rec))
-                results["510k"].sort(key=lambda x: x.score, reverse=True)
-
-        return results
+@st.cache_resource(show_spinner=False)
+def search_pool() -> ThreadPoolExecutor:
+    """The one process-wide pool for parallel search, sized SEARCH_MAX_WORKERS; calls bound their own
+    concurrency with `BoundedExecutor`."""
+    return ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="search")
+
+
+def get_search_engine(dfs: Dict[str, pd.DataFrame]) -> RegulatorySearchEngine:
+    """Engine (and per-dataset indexes) keyed by dataset content fingerprints, so reruns reuse it."""
+    evict_released_indexes()
+    live = {ds: df for ds, df in dfs.items() if ds in SEARCH_SPECS and df is not None and not df.empty}
+    fps = tuple((ds, cached_fingerprint(df)) for ds, df in live.items())
+    return _cached_search_engine(fps, _dfs=live)
 
 
 # ============================================================
@@ -1324,6 +1207,71 @@ def build_master_toc(items: List[Dict[str, str]]) -> str:
     return "\n".join(lines).strip()
 
 
+# ============================================================
+# Shared dataset registry (process-wide, reference-counted)
+# ============================================================
+@st.cache_resource(show_spinner=False)
+def dataset_registry() -> SharedDatasetRegistry:
+    return SharedDatasetRegistry()
+
+
+def session_datasets() -> SessionDatasets:
+    return st.session_state["ds_session"]
+
+
+# ============================================================
+# Search exports (static files, removed with the session or by age)
+# ============================================================
+def _remove_exports(paths: Dict[str, str]) -> None:
+    for path in list(paths.values()):
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+    paths.clear()
+
+
+def sweep_exports(max_age_s: float = EXPORT_TTL_S) -> None:
+    """Drop export folders older than `max_age_s` (left behind by sessions that were never collected)."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age_s
+    for name in os.listdir(EXPORT_DIR):
+        folder = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(folder) < cutoff:
+                shutil.rmtree(folder, ignore_errors=True)
+        except OSError:
+            continue
+
+
+class SessionExports:
+    """
+    One session's search exports, each in its own unguessable folder under EXPORT_DIR and downloaded through
+    Streamlit's static file route (streamed from disk, never loaded into the script). A dataset's previous
+    export is removed when it is replaced, and all of them when the session state is collected.
+    """
+
+    def __init__(self):
+        self.paths: Dict[str, str] = {}
+        weakref.finalize(self, _remove_exports, self.paths)
+
+    def write(self, ds: str, cursor: SearchCursor) -> str:
+        sweep_exports()
+        old = self.paths.pop(ds, None)
+        if old:
+            shutil.rmtree(os.path.dirname(old), ignore_errors=True)
+        folder = os.path.join(EXPORT_DIR, secrets.token_urlsafe(16))
+        os.makedirs(folder)
+        path = os.path.join(folder, f"{ds}_search_results.csv.gz")
+        cursor.to_csv(path)
+        self.paths[ds] = path
+        return path
+
+    def url(self, ds: str) -> Optional[str]:
+        path = self.paths.get(ds)
+        if not path or not os.path.exists(path):
+            return None
+        return "app/static/" + os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+
+
 # ============================================================
 # Streamlit setup + Session init
 # ============================================================
@@ -1340,9 +1288,19 @@ def ss_init():
     st.session_state.setdefault("global_query", "")
     st.session_state.setdefault("search_exact", False)
     st.session_state.setdefault("search_fuzzy", 80)
+    st.session_state.setdefault("search_trigram_overlap", TRIGRAM_MIN_OVERLAP)
+    st.session_state.setdefault("search_ranking", "fuzzy")
+    st.session_state.setdefault("search_workers", min(4, os.cpu_count() or 1))
+    st.session_state.setdefault("search_timings", {})
+    st.session_state.setdefault("search_pages", {})
+    st.session_state.setdefault("search_pages_key", None)
+    if st.session_state.get("search_exports") is None:
+        st.session_state["search_exports"] = SessionExports()
     st.session_state.setdefault("search_include", {"510k": True, "recall": True, "adr": True, "gudid": True})
 
     st.session_state.setdefault("dfs", {"510k": pd.DataFrame(), "recall": pd.DataFrame(), "adr": pd.DataFrame(), "gudid": pd.DataFrame()})
+    if st.session_state.get("ds_session") is None:
+        st.session_state["ds_session"] = SessionDatasets(dataset_registry(), st.session_state["dfs"])
     st.session_state.setdefault("dataset_loaded_from", "defaultsets.json")
 
     st.session_state.setdefault("doc_input_mode", "PDF")
@@ -1386,12 +1344,13 @@ def load_defaults_into_session():
     data = load_defaultsets_json()
     ds = data.get("datasets", {})
     for k in ["510k", "recall", "adr", "gudid"]:
-        st.session_state["dfs"][k] = pd.DataFrame(ds.get(k, []))
+        session_datasets().share(k, pd.DataFrame(ds.get(k, [])), source=DEFAULTSETS_PATH)
     st.session_state["dataset_loaded_from"] = DEFAULTSETS_PATH
 
 
 if st.session_state["dfs"]["510k"].empty and st.session_state["dfs"]["recall"].empty and st.session_state["dfs"]["adr"].empty and st.session_state["dfs"]["gudid"].empty:
     load_defaults_into_session()
+session_datasets().sync()
 
 if not st.session_state["agents_yaml_text"].strip():
     st.session_state["agents_yaml_text"] = read_text_file(AGENTS_PATH, DEFAULT_AGENTS_YAML)
@@ -1570,18 +1529,34 @@ with nav[0]:
         key="nav_page",
     )
 
+def set_global_query(q: str):
+    st.session_state["global_query"] = q
+    st.session_state.pop("global_query_input", None)
+
+
 with nav[1]:
     st.session_state["global_query"] = st.text_input(
         t(lang, "global_search"),
         value=st.session_state["global_query"],
         placeholder=t(lang, "search_placeholder"),
+        help=t(lang, "query_syntax"),
         key="global_query_input",
     )
 
 with nav[2]:
     with st.expander("Search Settings", expanded=False):
         st.session_state["search_exact"] = st.checkbox(t(lang, "exact_match"), value=st.session_state["search_exact"], key="search_exact_cb")
+        st.session_state["search_ranking"] = st.radio(
+            t(lang, "ranking"), SEARCH_RANKINGS, index=SEARCH_RANKINGS.index(st.session_state["search_ranking"]),
+            horizontal=True, key="search_ranking_radio",
+        )
         st.session_state["search_fuzzy"] = st.slider(t(lang, "fuzzy_level"), 60, 95, int(st.session_state["search_fuzzy"]), 1, key="search_fuzzy_slider")
+        st.session_state["search_trigram_overlap"] = st.slider(
+            t(lang, "trigram_overlap"), 0.0, 0.9, float(st.session_state["search_trigram_overlap"]), 0.1, key="search_trigram_slider"
+        )
+        st.session_state["search_workers"] = st.slider(
+            t(lang, "search_workers"), 1, SEARCH_MAX_WORKERS, int(st.session_state["search_workers"]), 1, key="search_workers_slider"
+        )
         st.caption(t(lang, "dataset_toggles"))
         inc = st.session_state["search_include"]
         inc["510k"] = st.checkbox("510k", value=inc.get("510k", True), key="inc_510k")
@@ -1590,15 +1565,49 @@ with nav[2]:
         inc["gudid"] = st.checkbox("gudid", value=inc.get("gudid", True), key="inc_gudid")
         st.session_state["search_include"] = inc
 
-engine = RegulatorySearchEngine(st.session_state["dfs"])
+engine = get_search_engine(st.session_state["dfs"])
+
+with nav[1]:
+    q_now = st.session_state["global_query"].strip()
+    completions = engine.complete_identifier(q_now, 6) if len(q_now) >= 2 else []
+    if completions and not (len(completions) == 1 and completions[0]["id"] == q_now.upper()):
+        ta_cols = st.columns(min(len(completions), 3))
+        for i, c in enumerate(completions):
+            with ta_cols[i % len(ta_cols)]:
+                st.button(c["id"], help=f"{c['dataset']} · {c['field']}", use_container_width=True,
+                          key=f"typeahead_{i}", on_click=set_global_query, args=(c["id"],))
 
 def run_search_now() -> Dict[str, List[SearchResult]]:
-    return engine.search(
+    workers = int(st.session_state["search_workers"])
+    results, timings = engine.search_with_timings(
         st.session_state["global_query"],
         include=st.session_state["search_include"],
         exact=st.session_state["search_exact"],
         fuzzy_level=int(st.session_state["search_fuzzy"]),
+        trigram_overlap=float(st.session_state["search_trigram_overlap"]),
+        executor=BoundedExecutor(search_pool(), workers) if workers > 1 else None,
+        ranking=st.session_state["search_ranking"],
     )
+    st.session_state["search_timings"] = timings
+    return results
+
+def search_cursor(ds: str) -> Optional[SearchCursor]:
+    return engine.cursor(
+        st.session_state["global_query"], ds,
+        exact=st.session_state["search_exact"],
+        fuzzy_level=int(st.session_state["search_fuzzy"]),
+        trigram_overlap=float(st.session_state["search_trigram_overlap"]),
+        ranking=st.session_state["search_ranking"],
+    )
+
+def load_more_results(ds: str):
+    st.session_state["search_pages"][ds] = st.session_state["search_pages"].get(ds, 0) + 1
+
+def export_all_results(ds: str):
+    cur = search_cursor(ds)
+    if cur is None:
+        return
+    st.session_state["search_exports"].write(ds, cur)
 
 search_results = run_search_now() if st.session_state["global_query"].strip() else {"510k": [], "recall": [], "adr": [], "gudid": []}
 
@@ -1627,31 +1636,119 @@ def dashboard_page():
                     st.session_state["global_query"] = m.group(1) if m else s
                     st.rerun()
 
+    q_k = st.session_state["global_query"].strip().upper()
+    if re.fullmatch(r"K\d{6}", q_k):
+        with st.expander(f"{t(lang,'predicate_lineage')}: {q_k}", expanded=False):
+            hops = st.slider(t(lang, "hops"), 1, 10, 3, 1, key="lineage_hops")
+            lc1, lc2 = st.columns(2)
+            with lc1:
+                st.caption(t(lang, "ancestors"))
+                anc = engine.predicate_lineage(q_k, "ancestors", hops)
+                if anc.empty:
+                    st.write("—")
+                else:
+                    st.dataframe(anc, use_container_width=True, height=240)
+            with lc2:
+                st.caption(t(lang, "descendants"))
+                desc = engine.predicate_lineage(q_k, "descendants", hops)
+                if desc.empty:
+                    st.write("—")
+                else:
+                    st.dataframe(desc, use_container_width=True, height=240)
+
+    q_raw = st.session_state["global_query"].strip()
+    dossier = engine.device_dossier(q_raw) if q_raw else {}
+    if dossier:
+        with st.expander(f"{t(lang,'device_dossier')}: {q_raw}", expanded=False):
+            names = [ds for ds in ["510k", "gudid", "adr", "recall"] if ds in dossier]
+            d_tabs = st.tabs([f"{ds.upper()} ({len(dossier[ds])})" for ds in names])
+            for tab, ds in zip(d_tabs, names):
+                with tab:
+                    st.dataframe(dossier[ds], use_container_width=True, height=260)
+
     st.markdown(f"<div class='wow-mini'><b>{t(lang,'results')}</b></div>", unsafe_allow_html=True)
+    timings = st.session_state.get("search_timings") or {}
+    if st.session_state["global_query"].strip():
+        if timings:
+            st.caption(f"{t(lang,'search_timings')}: " + " · ".join(f"{k} {v:.1f} ms" for k, v in timings.items()))
+        else:
+            st.caption(f"{t(lang,'search_timings')}: {t(lang,'cached')}")
 
     total_hits = sum(len(v) for v in search_results.values())
     if total_hits == 0 and st.session_state["global_query"].strip():
         st.info(t(lang, "no_results"))
         return
 
-    rows = []
-    for ds, items in search_results.items():
-        for it in items[:200]:
+    page_key = (
+        st.session_state["global_query"].strip(), st.session_state["search_exact"], int(st.session_state["search_fuzzy"]),
+        float(st.session_state["search_trigram_overlap"]), st.session_state["search_ranking"],
+    )
+    if st.session_state["search_pages_key"] != page_key:
+        st.session_state["search_pages_key"] = page_key
+        st.session_state["search_pages"] = {}
+    results = dict(search_results)
+    totals: Dict[str, int] = {}
+    for ds, n_pages in st.session_state["search_pages"].items():
+        cur = search_cursor(ds)
+        if cur is not None:
+            totals[ds] = len(cur)
+            results[ds] = results[ds] + cur.page(SEARCH_LIMIT, n_pages * SEARCH_PAGE_SIZE)
+
+    bounds = engine.date_bounds()
+    if bounds:
+        win = st.date_input(t(lang, "date_range"), value=bounds, min_value=bounds[0], max_value=bounds[1],
+                            key=f"dash_date_range_{bounds[0]}_{bounds[1]}")
+        if isinstance(win, (tuple, list)) and len(win) == 2 and tuple(win) != bounds:
+            for ds, items in results.items():
+                if items:
+                    keep = np.isin([it.row for it in items], engine.date_window(ds, win[0], win[1]))
+                    results[ds] = [it for it, k in zip(items, keep.tolist()) if k]
+
+    rows, hit_ds, hit_rows = [], [], []
+    for ds, items in results.items():
+        for it in items:
             r = dict(it.record)
             r["_dataset"] = ds
             r["_score"] = it.score
             rows.append(r)
+            hit_ds.append(ds)
+            hit_rows.append(it.row)
     df_hits = pd.DataFrame(rows)
+    hit_ds_arr = np.asarray(hit_ds, dtype=object)
+    hit_rows_arr = np.asarray(hit_rows, dtype=np.int64)
+
+    def hits_of(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        pos = df.index.to_numpy()
+        return {ds: hit_rows_arr[pos][hit_ds_arr[pos] == ds] for ds in ["510k", "recall", "adr", "gudid"]}
 
     tabs = st.tabs([
         f"{t(lang,'all')} ({len(df_hits)})",
-        f"510K ({len(search_results['510k'])})",
-        f"RECALL ({len(search_results['recall'])})",
-        f"ADR ({len(search_results['adr'])})",
-        f"GUDID ({len(search_results['gudid'])})",
+        f"510K ({len(results['510k'])})",
+        f"RECALL ({len(results['recall'])})",
+        f"ADR ({len(results['adr'])})",
+        f"GUDID ({len(results['gudid'])})",
     ])
 
-    def show_hits(df: pd.DataFrame, key_prefix: str):
+    def result_pager(ds: str, key_prefix: str):
+        shown = len(results[ds])
+        if ds in totals:
+            st.caption(t(lang, "showing_of").format(shown=shown, total=totals[ds]))
+        p1, p2, p3 = st.columns([1, 1, 1])
+        with p1:
+            more = totals[ds] > shown if ds in totals else len(search_results[ds]) >= SEARCH_LIMIT
+            if more:
+                st.button(t(lang, "load_more"), key=f"{key_prefix}_more", on_click=load_more_results, args=(ds,),
+                          use_container_width=True)
+        with p2:
+            st.button(t(lang, "export_all_csv"), key=f"{key_prefix}_export", on_click=export_all_results, args=(ds,),
+                      use_container_width=True)
+        with p3:
+            url = st.session_state["search_exports"].url(ds)
+            if url:
+                st.markdown(f"<a href='{url}' download='{ds}_search_results.csv.gz'>⬇ {t(lang, 'download_csv_gz')}</a>",
+                            unsafe_allow_html=True)
+
+    def show_hits(df: pd.DataFrame, key_prefix: str, ds: Optional[str] = None):
         """
         FIX: Always pass unique `key_prefix` so all plotly charts use distinct keys.
         This prevents StreamlitDuplicateElementId in multi-tab rendering.
@@ -1660,40 +1757,40 @@ def dashboard_page():
             st.write("—")
             return
 
-        date_col = None
-        for c in ["decision_date", "event_date", "report_date", "publish_date"]:
-            if c in df.columns:
-                date_col = c
-                break
-
         cat_col = None
-        for c in ["device_class", "recall_class", "decision", "panel", "product_code", "status", "_dataset"]:
-            if c in df.columns:
+        for c in FACET_FIELDS + ["_dataset"]:
+            if c in df.columns and df[c].notna().any():
                 cat_col = c
                 break
 
+        facet_sel: List[str] = []
+        if cat_col == "_dataset":
+            agg = df["_dataset"].value_counts()
+        elif cat_col:
+            agg = engine.facet_counts(hits_of(df), cat_col)
+            facet_sel = st.multiselect(f"{t(lang,'facet_filter')}: {cat_col}", list(agg.index), key=f"{key_prefix}_facet")
+            if facet_sel:
+                keep = np.zeros(len(df), dtype=bool)
+                pos = df.index.to_numpy()
+                for hds in np.unique(hit_ds_arr[pos]).tolist():
+                    sel = hit_ds_arr[pos] == hds
+                    keep[sel] = engine.facet_mask(hds, hit_rows_arr[pos][sel], cat_col, facet_sel)
+                df = df[keep]
+
         cA, cB = st.columns([1, 1])
         with cA:
             st.caption(t(lang, "timeline"))
-            if date_col:
-                tmp = df.copy()
-                tmp[date_col] = pd.to_datetime(tmp[date_col], errors="coerce")
-                tmp = tmp.dropna(subset=[date_col])
-                if not tmp.empty:
-                    fig = px.scatter(tmp.sort_values(date_col), x=date_col, y="_dataset", size="_score", hover_data=tmp.columns)
-                    st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_timeline")
-                else:
-                    st.write("—")
+            hist = engine.date_histogram(hits_of(df))
+            if not hist.empty:
+                fig = px.bar(hist, x="period", y="count", color="_dataset")
+                st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_timeline")
             else:
                 st.write("—")
 
         with cB:
             st.caption(t(lang, "distribution"))
             if cat_col:
-                tmp = df.copy()
-                tmp[cat_col] = tmp[cat_col].astype(str)
-                agg = tmp[cat_col].value_counts().reset_index()
-                agg.columns = [cat_col, "count"]
+                agg = agg.rename_axis(cat_col).reset_index(name="count")
                 fig = px.pie(agg.head(12), names=cat_col, values="count", hole=0.55)
                 st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_dist")
                 st.caption(t(lang, "select_to_filter"))
@@ -1701,23 +1798,44 @@ def dashboard_page():
                 st.write("—")
 
         st.divider()
-        st.dataframe(df.sort_values("_score", ascending=False).head(200), use_container_width=True, height=420)
+        st.dataframe(df.sort_values("_score", ascending=False, kind="stable"), use_container_width=True, height=420)
+        if ds is not None:
+            result_pager(ds, key_prefix)
 
     with tabs[0]:
         show_hits(df_hits, key_prefix="dash_all")
     with tabs[1]:
-        show_hits(df_hits[df_hits["_dataset"] == "510k"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_510k")
+        show_hits(df_hits[df_hits["_dataset"] == "510k"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_510k", ds="510k")
     with tabs[2]:
-        show_hits(df_hits[df_hits["_dataset"] == "recall"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_recall")
+        show_hits(df_hits[df_hits["_dataset"] == "recall"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_recall", ds="recall")
     with tabs[3]:
-        show_hits(df_hits[df_hits["_dataset"] == "adr"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_adr")
+        show_hits(df_hits[df_hits["_dataset"] == "adr"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_adr", ds="adr")
     with tabs[4]:
-        show_hits(df_hits[df_hits["_dataset"] == "gudid"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_gudid")
+        show_hits(df_hits[df_hits["_dataset"] == "gudid"] if not df_hits.empty else pd.DataFrame(), key_prefix="dash_gudid", ds="gudid")
 
 
 # ============================================================
 # Dataset Studio Page
 # ============================================================
+def data_dir_caption(lang: str) -> None:
+    if os.path.isdir(LOCAL_DATA_DIR):
+        st.caption(f"{t(lang, 'data_dir_caption')}: `{os.path.abspath(LOCAL_DATA_DIR)}`")
+    else:
+        st.info(f"{t(lang, 'data_dir_missing')} (`FDA_LOCAL_DATA_DIR` = `{LOCAL_DATA_DIR}`).")
+
+
+def local_data_path(path: str, lang: str) -> Optional[str]:
+    """`path` resolved under LOCAL_DATA_DIR, or None (with a message) when it is empty, escapes it, or ingestion is off."""
+    if not os.path.isdir(LOCAL_DATA_DIR) or not path:
+        st.warning(t(lang, "file_not_found" if os.path.isdir(LOCAL_DATA_DIR) else "data_dir_missing"))
+        return None
+    try:
+        return resolve_data_path(path, LOCAL_DATA_DIR)
+    except ValueError as e:
+        st.error(str(e))
+        return None
+
+
 def dataset_studio_page():
     st.markdown(f"<div class='wow-card'><h3 style='margin:0'>{t(lang,'nav_datasets')}</h3></div>", unsafe_allow_html=True)
 
@@ -1728,7 +1846,7 @@ def dataset_studio_page():
 
     source_mode = st.radio(
         t(lang, "dataset_source"),
-        options=["default", "paste", "upload"],
+        options=["default", "paste", "upload", "local_path", "openfda_bulk"],
         format_func=lambda x: t(lang, "use_default") if x == "default" else t(lang, x),
         horizontal=True,
         key="ds_source_mode_radio",
@@ -1760,6 +1878,89 @@ def dataset_studio_page():
                 st.error(f"Parse failed: {e}")
         df_in = st.session_state.get("ds_tmp_df")
 
+    elif source_mode == "local_path":
+        path = st.text_input(t(lang, "local_path_hint"), key="ds_stream_path")
+        data_dir_caption(lang)
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            chunk_rows = int(st.number_input(t(lang, "chunk_rows"), 1_000, 1_000_000, STREAM_CHUNK_ROWS, step=10_000,
+                                             key="ds_stream_chunk_rows"))
+        with c2:
+            append = st.checkbox(t(lang, "append_to_dataset"), value=False, key="ds_stream_append")
+        if st.button(t(lang, "stream_ingest"), use_container_width=True, key="ds_stream_btn"):
+            path = local_data_path(path, lang)
+            if path and not os.path.isfile(path):
+                st.warning(t(lang, "file_not_found"))
+            elif path:
+                bar = st.progress(0.0)
+                status = st.empty()
+
+                def on_progress(rows_in, rows_out, read, total):
+                    if read is not None and total:
+                        bar.progress(min(1.0, read / total))
+                    status.caption(f"{t(lang,'streamed_rows')}: {rows_in} → {rows_out}")
+
+                try:
+                    df_std, rep = stream_standardize(ds_type, path, chunk_rows=chunk_rows, progress=on_progress,
+                                                     resolver=manufacturer_resolver(), mapping_cache=column_mapping_cache())
+                    if st.session_state.get("ds_upsert_mode") and not st.session_state["dfs"][ds_type].empty:
+                        df_std, ups = upsert_with_index(ds_type, st.session_state["dfs"][ds_type], df_std)
+                        rep = "\n".join([rep] + upsert_report_lines(ups))
+                    elif append and not st.session_state["dfs"][ds_type].empty:
+                        df_std = concat_compact([st.session_state["dfs"][ds_type], df_std])
+                    st.session_state["ds_report"] = rep
+                    st.session_state["dfs"][ds_type] = df_std
+                    st.session_state["dataset_loaded_from"] = path
+                    save_standardization_caches()
+                    bar.progress(1.0)
+                    st.success(f"{ds_type} standardized. {t(lang,'loaded_rows')}: {len(df_std)}")
+                except Exception as e:
+                    st.error(f"Stream ingest failed: {e}")
+
+    elif source_mode == "openfda_bulk":
+        path = st.text_input(t(lang, "openfda_path_hint"), key="ds_bulk_path")
+        data_dir_caption(lang)
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            workers = int(st.number_input(t(lang, "bulk_workers"), 1, 32, OPENFDA_MAX_WORKERS, key="ds_bulk_workers"))
+        with c2:
+            merge = st.selectbox(t(lang, "bulk_merge"), ["replace", "append", "upsert"],
+                                 format_func=lambda x: t(lang, f"merge_{x}"), key="ds_bulk_merge")
+        with st.expander(t(lang, "field_paths")):
+            paths_yaml = st.text_area("YAML", value=yaml.safe_dump(OPENFDA_FIELD_PATHS, sort_keys=False, allow_unicode=True),
+                                      height=260, key="ds_bulk_paths")
+        if st.button(t(lang, "bulk_ingest"), use_container_width=True, key="ds_bulk_btn"):
+            path = local_data_path(path, lang)
+            if path and not os.path.exists(path):
+                st.warning(t(lang, "file_not_found"))
+            elif path:
+                bar = st.progress(0.0)
+                status = st.empty()
+
+                def on_partition(done, total, name):
+                    bar.progress(done / total)
+                    status.caption(f"{t(lang,'partitions_done')}: {done}/{total} · {name}")
+
+                try:
+                    frames, rep = ingest_openfda_bulk(path, ds_type, yaml.safe_load(paths_yaml) or {}, workers, on_partition,
+                                                      resolver=manufacturer_resolver(), mapping_cache=column_mapping_cache(),
+                                                      root=LOCAL_DATA_DIR)
+                    lines = [rep]
+                    for ds, df_new in frames.items():
+                        cur = st.session_state["dfs"].get(ds)
+                        if merge == "upsert" and cur is not None and not cur.empty:
+                            df_new, ups = upsert_with_index(ds, cur, df_new)
+                            lines += upsert_report_lines(ups)
+                        elif merge == "append" and cur is not None and not cur.empty:
+                            df_new = concat_compact([cur, df_new])
+                        st.session_state["dfs"][ds] = df_new
+                    st.session_state["ds_report"] = "\n".join(lines)
+                    st.session_state["dataset_loaded_from"] = path
+                    save_standardization_caches()
+                    st.success(", ".join(f"{ds}: {len(st.session_state['dfs'][ds])}" for ds in frames))
+                except Exception as e:
+                    st.error(f"openFDA bulk ingest failed: {e}")
+
     else:
         up = st.file_uploader(f"{t(lang,'upload')} dataset file (CSV/JSON/TXT)", type=["csv", "json", "txt"], key="ds_upload_file")
         if up:
@@ -1776,6 +1977,8 @@ def dataset_studio_page():
         st.dataframe(raw_preview_df, use_container_width=True, height=220)
 
     st.divider()
+    upsert = st.checkbox(f"{t(lang,'upsert_mode')} (`{NATURAL_KEYS[ds_type]}`)", key="ds_upsert_mode",
+                         help=t(lang, "upsert_help"))
     colA, colB = st.columns([1, 1])
     with colA:
         if st.button(t(lang, "standardize"), use_container_width=True, key="ds_standardize_btn"):
@@ -1783,10 +1986,14 @@ def dataset_studio_page():
                 if df_in is None or (isinstance(df_in, pd.DataFrame) and df_in.empty):
                     st.warning("No input dataset to standardize.")
                 else:
-                    df_std, rep = standardize_df(ds_type, df_in)
+                    df_std, rep = standardize_df(ds_type, df_in, manufacturer_resolver(), mapping_cache=column_mapping_cache())
+                    if upsert and not st.session_state["dfs"][ds_type].empty:
+                        df_std, ups = upsert_with_index(ds_type, st.session_state["dfs"][ds_type], df_std)
+                        rep = "\n".join([rep] + upsert_report_lines(ups))
                     st.session_state["ds_report"] = rep
                     st.session_state["dfs"][ds_type] = df_std
                     st.session_state["dataset_loaded_from"] = source_mode
+                    save_standardization_caches()
                     st.success(f"{ds_type} standardized. {t(lang,'loaded_rows')}: {len(df_std)}")
                     st.rerun()
             except Exception as e:
@@ -1815,6 +2022,104 @@ def dataset_studio_page():
         st.download_button(t(lang, "download_json"), data=df_to_json_records(cur_df).encode("utf-8"),
                            file_name=f"{ds_type}_standardized.json", use_container_width=True, key="dl_json_std")
 
+    with st.expander(t(lang, "dataset_store"), expanded=False):
+        store = DatasetStore()
+        v1, v2 = st.columns([2, 1])
+        with v1:
+            version = st.text_input(t(lang, "version_name"), value=f"{ds_type}_{datetime.date.today():%Y%m%d}",
+                                    key="ds_store_version")
+        with v2:
+            fmt = st.selectbox(t(lang, "store_format"), list(DATASET_STORE_FORMATS), key="ds_store_format")
+        if st.button(t(lang, "save_version"), use_container_width=True, key="ds_store_save", disabled=cur_df.empty):
+            try:
+                meta = store.save(ds_type, cur_df, version, fmt)
+                st.success(f"{t(lang,'saved')}: {ds_type}/{meta['version']} ({meta['rows']} rows, {meta['fingerprint'][:12]})")
+            except Exception as e:
+                st.error(f"Save failed: {e}")
+        versions = store.versions(ds_type)
+        if not versions:
+            st.caption(t(lang, "no_versions"))
+        else:
+            st.dataframe(pd.DataFrame([{k: v[k] for k in ["version", "format", "rows", "created", "bytes", "fingerprint"]}
+                                       for v in versions]), use_container_width=True, hide_index=True)
+            picked = st.selectbox(t(lang, "load_version"), [v["version"] for v in versions], key="ds_store_pick")
+            l1, l2 = st.columns([1, 1])
+            with l1:
+                if st.button(t(lang, "load_version"), use_container_width=True, key="ds_store_load"):
+                    try:
+                        meta = next(v for v in versions if v["version"] == picked)
+                        if session_datasets().attach(ds_type, meta["fingerprint"]) is None:
+                            df_loaded, meta = store.load(ds_type, picked)
+                            session_datasets().share(ds_type, df_loaded, source=f"store:{ds_type}/{meta['version']}",
+                                                     fingerprint=meta["fingerprint"])
+                        st.session_state["dataset_loaded_from"] = f"store:{ds_type}/{meta['version']}"
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Load failed: {e}")
+            with l2:
+                if st.button(t(lang, "delete_version"), use_container_width=True, key="ds_store_delete"):
+                    store.delete(ds_type, picked)
+                    st.rerun()
+
+    with st.expander(t(lang, "shared_registry"), expanded=False):
+        registry = dataset_registry()
+        evict_released_indexes()
+        entries = registry.entries()
+        sessions = [sd.overhead() for sd in list(registry.sessions)]
+        shared_bytes = sum(e["bytes"] for e in entries)
+        private_bytes = sum(r["private_bytes"] for r in sessions)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric(t(lang, "registry_frames"), len(entries))
+        m2.metric(t(lang, "registry_size"), _fmt_bytes(shared_bytes))
+        m3.metric(t(lang, "sessions"), len(sessions))
+        m4.metric(t(lang, "private_overhead"), _fmt_bytes(private_bytes))
+        st.caption(f"{t(lang,'without_sharing')}: {_fmt_bytes(sum(e['bytes'] * e['refs'] for e in entries) + private_bytes)}")
+        if entries:
+            st.dataframe(pd.DataFrame(entries).assign(bytes=lambda d: d["bytes"].map(_fmt_bytes)),
+                         use_container_width=True, hide_index=True)
+        if sessions:
+            me = session_datasets().session_id
+            st.dataframe(pd.DataFrame(sessions).assign(private_bytes=lambda d: d["private_bytes"].map(_fmt_bytes),
+                                                       current=lambda d: d["session"] == me),
+                         use_container_width=True, hide_index=True)
+
+    with st.expander(t(lang, "search_benchmark"), expanded=False):
+        bq = st.text_area(t(lang, "benchmark_queries"), value="battery overheating\nocclusion alarm\nlatex\nsoftware failure",
+                          height=110, key="bench_trigram_queries")
+        if st.button(t(lang, "run"), use_container_width=True, key="bench_trigram_run"):
+            queries = [q.strip() for q in bq.splitlines() if q.strip()]
+            st.dataframe(benchmark_trigram_prefilter(engine, queries, fuzzy_level=int(st.session_state["search_fuzzy"])),
+                         use_container_width=True)
+
+    with st.expander(t(lang, "benchmark_suite"), expanded=False):
+        b1, b2 = st.columns([1, 1])
+        with b1:
+            scale = st.selectbox(t(lang, "synthetic_scale"), [n for n in SYNTHETIC_SCALES if n <= UI_BENCHMARK_MAX_SCALE],
+                                 index=0, key="bench_suite_scale")
+        with b2:
+            repeats = st.slider(t(lang, "repeats"), 1, 20, 5, key="bench_suite_repeats")
+        st.caption(t(lang, "benchmark_cli_hint"))
+        s1, s2 = st.columns([1, 1])
+        with s1:
+            if st.button(t(lang, "run"), use_container_width=True, key="bench_suite_run"):
+                status = st.empty()
+                run = run_benchmark_suite(int(scale), int(repeats), progress=lambda msg: status.caption(msg))
+                status.caption(f"{t(lang,'saved')}: {save_benchmark_run(run)}")
+                st.dataframe(pd.DataFrame(run["results"]), use_container_width=True)
+        with s2:
+            if st.button(t(lang, "load_synthetic"), use_container_width=True, key="bench_suite_load"):
+                for name, raw in generate_synthetic_datasets(int(scale)).items():
+                    st.session_state["dfs"][name] = standardize_df(name, raw, ManufacturerResolver(None))[0]
+                st.session_state["dataset_loaded_from"] = f"synthetic:{int(scale)}"
+                st.rerun()
+        runs = load_benchmark_runs()
+        if runs:
+            labels = [r["_file"] for r in runs]
+            picked = st.multiselect(t(lang, "compare_runs"), labels, default=labels[-2:], key="bench_suite_compare")
+            chosen = [r for r in runs if r["_file"] in picked]
+            if chosen:
+                st.dataframe(compare_benchmark_runs(chosen), use_container_width=True)
+
 
 # ============================================================
 # Agent Studio Page
@@ -0,0 +1 @@
+"""Headless benchmarks for the fdacore data and search layers."""
@@ -0,0 +1,205 @@
+"""
+Benchmark suite over synthetic openFDA-scale data. Runs headless against fdacore (no Streamlit):
+
+    python -m benchmarks.suite --scale 100000 --repeats 5
+    python -m benchmarks.suite --compare
+
+Runs are saved as JSON under benchmarks/runs/ (gitignored), tagged with the git commit.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import subprocess
+import tracemalloc
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from fdacore.datasets import ColumnMappingCache, ManufacturerResolver, frames_identical, parse_dataset_blob, standardize_df
+from fdacore.highlight import coral_highlight
+from fdacore.search import RegulatorySearchEngine
+from fdacore.synthetic import BENCHMARK_QUERIES, SYNTHETIC_SCALES, generate_synthetic_datasets
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(REPO_ROOT, "benchmarks", "runs")
+
+
+def _git_commit() -> str:
+    try:
+        res = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=REPO_ROOT)
+        return res.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def _bench_case(name: str, fn, items: int, unit: str, repeats: int, trace_memory: bool = True) -> Dict[str, Any]:
+    """p50/p95 over `repeats` untraced runs, throughput at p50, and tracemalloc peak of one extra run."""
+    times = []
+    for _ in range(max(1, repeats)):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    peak_mb = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    p50 = float(np.percentile(times, 50))
+    return {
+        "case": name, "p50_ms": round(p50, 3), "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "throughput": round(items / (p50 / 1000), 1) if p50 > 0 else None, "unit": unit, "peak_mb": peak_mb,
+    }
+
+
+def run_benchmark_suite(scale: int = 10_000, repeats: int = 5, queries: Optional[List[str]] = None, seed: int = 0,
+                        trace_memory: bool = True, progress=None) -> Dict[str, Any]:
+    """
+    Benchmarks `parse_dataset_blob`, `standardize_df`, search index build, `RegulatorySearchEngine` search
+    (fuzzy and exact, memo bypassed) and `coral_highlight` on synthetic data of `scale` rows per dataset.
+    Returns a JSON-able run record tagged with the git commit (see `save_benchmark_run`).
+    """
+    queries = queries or BENCHMARK_QUERIES
+    results: List[Dict[str, Any]] = []
+    step = progress or (lambda msg: None)
+
+    step("generate")
+    t0 = time.perf_counter()
+    raw = generate_synthetic_datasets(scale, seed)
+    gen_s = time.perf_counter() - t0
+
+    blob_df = raw["510k"].head(200_000)
+    csv_blob = blob_df.to_csv(index=False)
+    json_blob = json.dumps(blob_df.to_dict(orient="records"), ensure_ascii=False)
+    step("parse_dataset_blob")
+    results.append(_bench_case("parse_dataset_blob[csv]", lambda: parse_dataset_blob(csv_blob, "x.csv"),
+                               len(blob_df), "rows/s", repeats, trace_memory))
+    results.append(_bench_case("parse_dataset_blob[json]", lambda: parse_dataset_blob(json_blob, "x.json"),
+                               len(blob_df), "rows/s", repeats, trace_memory))
+
+    std: Dict[str, pd.DataFrame] = {}
+    mapping = ColumnMappingCache(None)
+    for ds, df in raw.items():
+        step(f"standardize_df[{ds}]")
+        std[ds] = standardize_df(ds, df, ManufacturerResolver(None), mapping_cache=mapping)[0]
+        results.append(_bench_case(f"standardize_df[{ds}]",
+                                   lambda: standardize_df(ds, df, ManufacturerResolver(None), mapping_cache=mapping),
+                                   len(df), "rows/s", max(1, repeats // 2), trace_memory))
+        results.append(_bench_case(f"standardize_df[{ds},rowwise]",
+                                   lambda: standardize_df(ds, df, ManufacturerResolver(None), transforms="rowwise",
+                                                          mapping_cache=mapping),
+                                   len(df), "rows/s", 1, trace_memory))
+
+    step("search_index_build")
+    results.append(_bench_case("search_index_build", lambda: RegulatorySearchEngine(std),
+                               sum(len(d) for d in std.values()), "rows/s", 1, trace_memory))
+    engine_b = RegulatorySearchEngine(std)
+    for exact, fuzzy in [(False, 80), (True, 100)]:
+        mode = "exact" if exact else "fuzzy"
+        for q in queries:
+            step(f"search[{mode}] {q}")
+            results.append(_bench_case(f"search[{mode}] {q}",
+                                       lambda: engine_b.search_with_timings(q, {}, exact, fuzzy, memo=False),
+                                       sum(len(d) for d in std.values()), "rows/s", repeats, trace_memory))
+
+    texts = [v for v in std["adr"]["narrative"].head(1000).tolist() if isinstance(v, str)]
+    step("coral_highlight")
+    results.append(_bench_case("coral_highlight", lambda: [coral_highlight(x) for x in texts],
+                               len(texts), "texts/s", repeats, trace_memory))
+    return {
+        "commit": _git_commit(), "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "scale": int(scale), "repeats": int(repeats), "seed": int(seed), "generate_s": round(gen_s, 3),
+        "python": sys.version.split()[0], "pandas": pd.__version__, "numpy": np.__version__,
+        "results": results,
+    }
+
+
+def benchmark_standardize_transforms(dataset_type: str = "gudid", n_rows: int = 1_000_000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Times the row-wise and vectorized `standardize_df` transforms on one synthetic extract
+    (default: 1M GUDID rows) and checks that both produce identical frames.
+    """
+    df = generate_synthetic_datasets({dataset_type: n_rows}, seed)[dataset_type]
+    timings: Dict[str, float] = {}
+    frames: Dict[str, pd.DataFrame] = {}
+    for mode in ["rowwise", "vectorized"]:
+        t0 = time.perf_counter()
+        frames[mode] = standardize_df(dataset_type, df, ManufacturerResolver(None), transforms=mode,
+                                      mapping_cache=ColumnMappingCache(None))[0]
+        timings[mode] = time.perf_counter() - t0
+    return {
+        "dataset": dataset_type, "rows": int(n_rows),
+        "rowwise_s": round(timings["rowwise"], 3), "vectorized_s": round(timings["vectorized"], 3),
+        "speedup": round(timings["rowwise"] / max(timings["vectorized"], 1e-9), 2),
+        "identical": frames_identical(frames["rowwise"], frames["vectorized"]),
+    }
+
+
+def save_benchmark_run(run: Dict[str, Any], directory: str = BENCHMARK_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    stamp = run["timestamp"].replace(":", "").replace("-", "")
+    path = os.path.join(directory, f"bench_{stamp}_{run['commit']}_{run['scale']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_benchmark_runs(directory: str = BENCHMARK_DIR) -> List[Dict[str, Any]]:
+    runs = []
+    if os.path.isdir(directory):
+        for fn in sorted(os.listdir(directory)):
+            if fn.endswith(".json"):
+                try:
+                    with open(os.path.join(directory, fn), "r", encoding="utf-8") as f:
+                        run = json.load(f)
+                    run["_file"] = fn
+                    runs.append(run)
+                except Exception:
+                    continue
+    return runs
+
+
+def compare_benchmark_runs(runs: List[Dict[str, Any]], metric: str = "p50_ms") -> pd.DataFrame:
+    """One row per case, one column per run (`commit@scale`), plus the last/first ratio when there are two or more runs."""
+    cols = {}
+    for run in runs:
+        label = f"{run.get('commit', '?')}@{run.get('scale', '?')} ({run.get('timestamp', '')})"
+        cols[label] = {r["case"]: r.get(metric) for r in run.get("results", [])}
+    out = pd.DataFrame(cols)
+    if out.shape[1] >= 2:
+        out["ratio_last_first"] = (out.iloc[:, -1] / out.iloc[:, 0]).round(3)
+    return out.rename_axis("case").reset_index()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scale", type=int, default=SYNTHETIC_SCALES[0], help="rows per dataset")
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run of each case")
+    ap.add_argument("--transforms", action="store_true", help="compare row-wise and vectorized standardization instead")
+    ap.add_argument("--compare", action="store_true", help="print saved runs side by side and exit")
+    args = ap.parse_args(argv)
+    with pd.option_context("display.width", 200, "display.max_rows", 500, "display.max_columns", 20):
+        if args.compare:
+            print(compare_benchmark_runs(load_benchmark_runs()).to_string(index=False))
+            return 0
+        if args.transforms:
+            print(json.dumps(benchmark_standardize_transforms(n_rows=args.scale, seed=args.seed), indent=2))
+            return 0
+        run = run_benchmark_suite(args.scale, args.repeats, seed=args.seed, trace_memory=not args.no_memory,
+                                  progress=lambda msg: print(msg, file=sys.stderr))
+        print(pd.DataFrame(run["results"]).to_string(index=False))
+        print(f"saved: {save_benchmark_run(run)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Streamlit-free data and search layers behind app.py."""
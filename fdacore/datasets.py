@@ -0,0 +1,1207 @@
+"""Dataset parsing, column standardization, manufacturer resolution, dtype compaction and upserts."""
+import os
+import re
+import io
+import json
+import gzip
+import pathlib
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+# `compact_df` relies on the pandas 3 default `str` dtype (missing values stay missing, not "None").
+if int(pd.__version__.split(".")[0]) < 3:
+    raise ImportError(f"fdacore requires pandas>=3 (found {pd.__version__})")
+
+MANUFACTURER_CLUSTERS_PATH = "manufacturer_clusters.json"
+COLUMN_MAPPING_CACHE_PATH = "column_mapping_cache.json"
+COLUMN_MAPPING_CACHE_SIZE = 64
+
+
+CANON = {
+    "510k": [
+        "k_number", "decision_date", "decision", "device_name", "applicant", "manufacturer_name", "product_code",
+        "regulation_number", "device_class", "panel", "review_advisory_committee", "predicate_k_numbers", "summary",
+    ],
+    "adr": [
+        "adverse_event_id", "report_date", "event_type", "patient_outcome", "device_problem", "manufacturer_name",
+        "brand_name", "product_code", "device_class", "udi_di", "recall_number_link", "narrative",
+    ],
+    "gudid": [
+        "primary_di", "udi_di", "device_description", "device_class", "manufacturer_name", "brand_name", "product_code",
+        "gmdn_term", "mri_safety", "sterile", "single_use", "implantable", "contains_nrl", "version_or_model_number",
+        "catalog_number", "record_status", "publish_date", "company_contact_email", "company_contact_phone",
+        "company_state", "company_country",
+    ],
+    "recall": [
+        "recall_number", "recall_class", "event_date", "termination_date", "status", "firm_name", "manufacturer_name",
+        "product_description", "product_code", "code_info", "reason_for_recall", "distribution_pattern",
+        "quantity_in_commerce", "country", "state",
+    ],
+}
+
+DATE_FIELDS = ["decision_date", "event_date", "report_date", "publish_date", "termination_date"]
+
+SYNONYMS = {
+    "510k": {
+        "k_number": ["k_number", "knumber", "k", "k_no", "k#", "submission_number"],
+        "decision_date": ["decision_date", "clearance_date", "date"],
+        "decision": ["decision", "decision_code", "determination", "se_decision"],
+        "device_name": ["device_name", "device", "name", "device_title", "device title"],
+        "applicant": ["applicant", "submitter", "company", "applicant_name"],
+        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "firm_name"],
+        "product_code": ["product_code", "productcode", "procode", "code"],
+        "regulation_number": ["regulation_number", "regulation", "21cfr", "cfr"],
+        "device_class": ["device_class", "class"],
+        "panel": ["panel", "medical_specialty", "review_panel"],
+        "review_advisory_committee": ["review_advisory_committee", "committee"],
+        "predicate_k_numbers": ["predicate_k_numbers", "predicates", "predicate", "predicate_k", "predicate_knumbers"],
+        "summary": ["summary", "description", "clearance_summary", "decision_summary"],
+    },
+    "adr": {
+        "adverse_event_id": ["adverse_event_id", "mdr_id", "event_id", "report_id", "mdr_report_key"],
+        "report_date": ["report_date", "date"],
+        "event_type": ["event_type", "type"],
+        "patient_outcome": ["patient_outcome", "outcome"],
+        "device_problem": ["device_problem", "problem", "issue", "device_problem_code"],
+        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "firm_name"],
+        "brand_name": ["brand_name", "brand", "device_brand"],
+        "product_code": ["product_code", "code"],
+        "device_class": ["device_class", "class"],
+        "udi_di": ["udi_di", "udi", "primary_di", "di"],
+        "recall_number_link": ["recall_number_link", "recall_number", "linked_recall"],
+        "narrative": ["narrative", "description", "event_description", "text"],
+    },
+    "gudid": {
+        "primary_di": ["primary_di", "primarydi", "udi_di", "udi", "di"],
+        "udi_di": ["udi_di", "primary_di", "udi", "di"],
+        "device_description": ["device_description", "description", "device_desc"],
+        "device_class": ["device_class", "class"],
+        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "company"],
+        "brand_name": ["brand_name", "brand", "device_brand"],
+        "product_code": ["product_code", "code"],
+        "gmdn_term": ["gmdn_term", "gmdn", "gmdn_name"],
+        "mri_safety": ["mri_safety", "mri", "mri_status", "mri_safety_status"],
+        "sterile": ["sterile", "is_sterile"],
+        "single_use": ["single_use", "singleuse", "is_single_use"],
+        "implantable": ["implantable", "is_implantable"],
+        "contains_nrl": ["contains_nrl", "nrl", "latex", "contains_latex"],
+        "version_or_model_number": ["version_or_model_number", "model", "model_number", "version"],
+        "catalog_number": ["catalog_number", "catalog", "cat_no"],
+        "record_status": ["record_status", "status"],
+        "publish_date": ["publish_date", "date"],
+        "company_contact_email": ["company_contact_email", "email"],
+        "company_contact_phone": ["company_contact_phone", "phone", "telephone"],
+        "company_state": ["company_state", "state"],
+        "company_country": ["company_country", "country"],
+    },
+    "recall": {
+        "recall_number": ["recall_number", "recall", "recall_id", "z_number", "z#"],
+        "recall_class": ["recall_class", "class"],
+        "event_date": ["event_date", "date", "initiation_date"],
+        "termination_date": ["termination_date", "term_date"],
+        "status": ["status", "recall_status"],
+        "firm_name": ["firm_name", "firm", "company", "applicant"],
+        "manufacturer_name": ["manufacturer_name", "manufacturer", "mfr", "firm_name"],
+        "product_description": ["product_description", "description", "product"],
+        "product_code": ["product_code", "code"],
+        "code_info": ["code_info", "lots", "serials", "batch"],
+        "reason_for_recall": ["reason_for_recall", "reason", "root_cause", "root_cause_description", "cause"],
+        "distribution_pattern": ["distribution_pattern", "distribution"],
+        "quantity_in_commerce": ["quantity_in_commerce", "quantity", "qty"],
+        "country": ["country"],
+        "state": ["state"],
+    },
+}
+
+
+def _norm_col(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (s or "").lower())
+
+
+def detect_format(text: str) -> str:
+    t0 = (text or "").lstrip()
+    if not t0:
+        return "unknown"
+    if t0.startswith("{") or t0.startswith("["):
+        return "json"
+    if "," in t0 and "\n" in t0:
+        return "csv"
+    return "text"
+
+
+def parse_dataset_blob(blob: Union[str, bytes], filename: Optional[str] = None) -> pd.DataFrame:
+    if isinstance(blob, bytes):
+        text = blob.decode("utf-8", errors="ignore")
+    else:
+        text = blob
+
+    fmt = None
+    if filename:
+        fn = filename.lower()
+        if fn.endswith(".json"):
+            fmt = "json"
+        elif fn.endswith(".csv"):
+            fmt = "csv"
+        else:
+            fmt = detect_format(text)
+    else:
+        fmt = detect_format(text)
+
+    if fmt == "json":
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            for k in ["datasets", "data", "records", "items", "rows"]:
+                if k in obj and isinstance(obj[k], list):
+                    obj = obj[k]
+                    break
+            if isinstance(obj, dict):
+                obj = [obj]
+        if not isinstance(obj, list):
+            raise ValueError("JSON must be a list of objects (or a wrapper containing a list).")
+        return pd.DataFrame(obj)
+
+    if fmt == "csv":
+        return pd.read_csv(io.StringIO(text))
+
+    try:
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            obj = [obj]
+        return pd.DataFrame(obj)
+    except Exception:
+        return pd.read_csv(io.StringIO(text))
+
+
+def _best_match_column(df_cols: List[str], candidates: List[str]) -> Optional[str]:
+    norm_map = {_norm_col(c): c for c in df_cols}
+    for cand in candidates:
+        n = _norm_col(cand)
+        if n in norm_map:
+            return norm_map[n]
+    best, best_score = None, 0
+    for c in df_cols:
+        for cand in candidates:
+            sc = fuzz.ratio(_norm_col(c), _norm_col(cand))
+            if sc > best_score:
+                best_score, best = sc, c
+    return best if best_score >= 85 else None
+
+
+def match_column_positions(norm_cols: List[str], fields: List[str], synonyms: Dict[str, List[str]]) -> Dict[str, Optional[int]]:
+    """
+    `_best_match_column` for every field at once, returning column positions: exact synonym hits first,
+    then one `process.cdist` (ratio) of all columns x all synonyms, sliced per field. The first maximum in
+    column-major order wins, as in the nested loops; scores below 85 map to None.
+    """
+    last_pos = {n: i for i, n in enumerate(norm_cols)}
+    cands = {f: [_norm_col(c) for c in synonyms.get(f, [f])] for f in fields}
+    out: Dict[str, Optional[int]] = {}
+    fuzzy: List[str] = []
+    for f in fields:
+        out[f] = next((last_pos[n] for n in cands[f] if n in last_pos), None)
+        if out[f] is None:
+            fuzzy.append(f)
+    if not fuzzy or not norm_cols:
+        return out
+    flat = [n for f in fuzzy for n in cands[f]]
+    if not flat:
+        return out
+    scores = process.cdist(norm_cols, flat, scorer=fuzz.ratio, dtype=np.float64)
+    start = 0
+    for f in fuzzy:
+        block = scores[:, start:start + len(cands[f])]
+        start += len(cands[f])
+        if block.size:
+            i = int(np.argmax(block))
+            if block.flat[i] >= 85:
+                out[f] = i // block.shape[1]
+    return out
+
+
+class ColumnMappingCache:
+    """
+    canonical field -> source column position, keyed by (dataset_type, normalized header tuple) plus a
+    signature of the synonym table. Entries are kept in LRU order (at most `max_entries`), so a known feed
+    layout skips fuzzy matching entirely. They are loaded from `path` (None = in memory only); resolving
+    never writes it, callers persist new layouts with `save`.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = COLUMN_MAPPING_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for e in data.get("entries", []):
+                    self.entries[e["key"]] = e
+            except Exception:
+                self.entries = OrderedDict()
+
+    def save(self) -> None:
+        """Write the entries to `path` if a layout was added since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": list(self.entries.values())}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+    @staticmethod
+    def key(dataset_type: str, norm_cols: List[str]) -> str:
+        sig = json.dumps([dataset_type, norm_cols, CANON[dataset_type], SYNONYMS[dataset_type]], sort_keys=True)
+        return hashlib.sha1(sig.encode("utf-8")).hexdigest()
+
+    def resolve(self, dataset_type: str, columns: List[str]) -> Tuple[Dict[str, Optional[int]], bool]:
+        """(field -> column position, whether the layout was already cached)."""
+        norm_cols = [_norm_col(c) for c in columns]
+        k = self.key(dataset_type, norm_cols)
+        with self._lock:
+            entry = self.entries.get(k)
+            if entry is not None:
+                self.entries.move_to_end(k)
+                self.hits += 1
+                return dict(entry["fields"]), True
+            self.misses += 1
+        fields = match_column_positions(norm_cols, CANON[dataset_type], SYNONYMS[dataset_type])
+        with self._lock:
+            self.entries[k] = {"key": k, "dataset_type": dataset_type, "headers": norm_cols, "fields": fields,
+                               "created": datetime.datetime.now().isoformat(timespec="seconds")}
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+        return dict(fields), False
+
+
+def to_k_list(x) -> List[Any]:
+    if x is None or (isinstance(x, float) and pd.isna(x)):
+        return []
+    if isinstance(x, list):
+        return x
+    if isinstance(x, str):
+        parts = [p.strip() for p in re.split(r"[;,]+", x) if p.strip()]
+        return parts
+    return [str(x)]
+
+
+def _norm_k(x: Any) -> str:
+    return str(x).strip().upper() if x is not None else ""
+
+
+class PredicateGraph:
+    """
+    510(k) predicate lineage built in one pass over (`k_number`, `predicate_k_numbers`):
+    `rows` maps K-number -> row ids, `parents` K -> cited predicates, `children` K -> devices citing it.
+    """
+
+    def __init__(self, k_numbers: List[Any], predicates: List[Any]):
+        self.rows: Dict[str, List[int]] = {}
+        self.parents: Dict[str, List[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+        for i, (k, preds) in enumerate(zip(k_numbers, predicates)):
+            kn = _norm_k(k)
+            if not kn:
+                continue
+            self.rows.setdefault(kn, []).append(i)
+            parents = self.parents.setdefault(kn, [])
+            for p in to_k_list(preds):
+                pk = _norm_k(p)
+                if not pk or pk in parents:
+                    continue
+                parents.append(pk)
+                self.children.setdefault(pk, []).append(kn)
+
+    @staticmethod
+    def _walk(start: str, adj: Dict[str, List[str]], hops: int) -> Dict[str, int]:
+        depth: Dict[str, int] = {}
+        frontier = [_norm_k(start)]
+        seen = set(frontier)
+        for d in range(1, hops + 1):
+            nxt = []
+            for k in frontier:
+                for n in adj.get(k, []):
+                    if n not in seen:
+                        seen.add(n)
+                        depth[n] = d
+                        nxt.append(n)
+            if not nxt:
+                break
+            frontier = nxt
+        return depth
+
+    def ancestors(self, k_number: str, hops: int = 1) -> Dict[str, int]:
+        """Predicates cited by `k_number`, up to `hops` levels back (K -> hop distance)."""
+        return self._walk(k_number, self.parents, hops)
+
+    def descendants(self, k_number: str, hops: int = 1) -> Dict[str, int]:
+        """Devices citing `k_number` as a predicate, up to `hops` levels forward (K -> hop distance)."""
+        return self._walk(k_number, self.children, hops)
+
+
+MANUFACTURER_NAME_COLUMNS = ["manufacturer_name", "applicant", "firm_name"]
+MANUFACTURER_MATCH_THRESHOLD = 90
+MANUFACTURER_BLOCK_CHUNK = 2048
+MANUFACTURER_FULL_BLOCK = 4096
+MANUFACTURER_WINDOW = 256
+_FIRM_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_FIRM_STOPWORDS = {
+    "the", "inc", "incorporated", "llc", "ltd", "limited", "co", "corp", "corporation", "company",
+    "gmbh", "ag", "sa", "plc", "bv", "nv", "srl", "spa", "kk", "pty", "lp",
+}
+
+
+def firm_key(name: Any) -> str:
+    """Lower-case alphanumeric tokens of a firm name without legal suffixes ("Medtronic, Inc." -> "medtronic")."""
+    if name is None or (isinstance(name, float) and pd.isna(name)):
+        return ""
+    toks = _FIRM_TOKEN_RE.findall(str(name).lower())
+    core = [tok for tok in toks if tok not in _FIRM_STOPWORDS]
+    return " ".join(core or toks)
+
+
+def _firm_numbers(key: str) -> frozenset:
+    return frozenset(tok for tok in key.split(" ") if any(ch.isdigit() for ch in tok))
+
+
+class ManufacturerResolver:
+    """
+    Canonical manufacturer ids for firm-name variants.
+    Names reduce to `firm_key` and are blocked on its first token. Within a block, new keys are scored
+    against the block's keys with batched cdist (token_sort_ratio, `MANUFACTURER_BLOCK_CHUNK` rows per
+    call); in blocks larger than MANUFACTURER_FULL_BLOCK a new key is only scored against the
+    ±MANUFACTURER_WINDOW keys around it in sorted order. A key also links to its longest token prefix present in the block
+    ("medtronic minimed" -> "medtronic"). Keys carrying different numeric tokens ("acme 2" / "acme 3")
+    never link. A new key joins the best known cluster it matches; unmatched new keys are
+    clustered among themselves (union-find). The key -> id map is loaded from `path` (None = in memory
+    only); resolving never writes it, callers persist new keys with `save`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.key_to_id: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        self.blocks: Dict[str, List[str]] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.key_to_id = dict(data.get("keys", {}))
+                self.names = dict(data.get("names", {}))
+            except Exception:
+                self.key_to_id, self.names = {}, {}
+        for k in self.key_to_id:
+            self.blocks.setdefault(k.split(" ", 1)[0], []).append(k)
+
+    def save(self) -> None:
+        """Write the key -> id map to `path` if keys were resolved since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "keys": self.key_to_id, "names": self.names}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+    def resolve(self, names: List[Any]) -> Tuple[List[Optional[str]], int]:
+        """Manufacturer id per name (None for blank names) and the number of newly resolved keys."""
+        key_of = {n: firm_key(n) for n in set(v for v in names if isinstance(v, str))}
+        with self._lock:
+            display: Dict[str, str] = {}
+            for n, k in key_of.items():
+                if k and k not in self.key_to_id and (k not in display or n < display[k]):
+                    display[k] = n
+            if display:
+                self._assign(sorted(display), display)
+                self.dirty = True
+            ids = [self.key_to_id.get(key_of[v]) if isinstance(v, str) and key_of[v] else None for v in names]
+        return ids, len(display)
+
+    def _assign(self, new_keys: List[str], display: Dict[str, str]) -> None:
+        by_block: Dict[str, List[str]] = {}
+        for k in new_keys:
+            by_block.setdefault(k.split(" ", 1)[0], []).append(k)
+        for block, keys in by_block.items():
+            known = set(self.blocks.get(block, []))
+            choices = sorted(known | set(keys))
+            pos = {k: i for i, k in enumerate(choices)}
+            new_pos = {k: i for i, k in enumerate(keys)}
+            parent = list(range(len(keys)))
+
+            def find(i: int) -> int:
+                while parent[i] != i:
+                    parent[i] = parent[parent[i]]
+                    i = parent[i]
+                return i
+
+            best: Dict[int, Tuple[int, str]] = {}
+            windowed = len(choices) > MANUFACTURER_FULL_BLOCK
+            if windowed:
+                # Runs of new keys in sorted order spanning at most MANUFACTURER_WINDOW positions, so each
+                # cdist call sees at most 3 x MANUFACTURER_WINDOW + 1 choices.
+                runs: List[List[int]] = []
+                for ki in sorted(range(len(keys)), key=lambda i: pos[keys[i]]):
+                    if (runs and len(runs[-1]) < MANUFACTURER_BLOCK_CHUNK
+                            and pos[keys[ki]] - pos[keys[runs[-1][0]]] <= MANUFACTURER_WINDOW):
+                        runs[-1].append(ki)
+                    else:
+                        runs.append([ki])
+            else:
+                runs = [list(range(a, min(a + MANUFACTURER_BLOCK_CHUNK, len(keys))))
+                        for a in range(0, len(keys), MANUFACTURER_BLOCK_CHUNK)]
+            for run in runs:
+                chunk = [keys[ki] for ki in run]
+                lo, hi = 0, len(choices)
+                if windowed:
+                    lo = max(0, pos[chunk[0]] - MANUFACTURER_WINDOW)
+                    hi = min(len(choices), pos[chunk[-1]] + MANUFACTURER_WINDOW + 1)
+                window = choices[lo:hi]
+                sc = process.cdist(chunk, window, scorer=fuzz.token_sort_ratio,
+                                   score_cutoff=MANUFACTURER_MATCH_THRESHOLD, dtype=np.uint8, workers=-1)
+                ii, jj = np.nonzero(sc)
+                if windowed:
+                    near = np.abs(lo + jj - np.asarray([pos[k] for k in chunk])[ii]) <= MANUFACTURER_WINDOW
+                    ii, jj = ii[near], jj[near]
+                pairs = [(run[int(i)], window[int(j)], int(sc[i, j])) for i, j in zip(ii, jj)]
+                for ki in run:
+                    toks = keys[ki].split(" ")
+                    prefix = next((" ".join(toks[:n]) for n in range(len(toks) - 1, 0, -1) if " ".join(toks[:n]) in pos), None)
+                    if prefix is not None:
+                        pairs.append((ki, prefix, 100))
+                for ki, other, score in pairs:
+                    if _firm_numbers(keys[ki]) != _firm_numbers(other):
+                        continue
+                    if other in known:
+                        if ki not in best or score > best[ki][0]:
+                            best[ki] = (score, self.key_to_id[other])
+                    elif new_pos[other] != ki:
+                        ri, rj = find(ki), find(new_pos[other])
+                        if ri != rj:
+                            parent[max(ri, rj)] = min(ri, rj)
+            clusters: Dict[int, List[int]] = {}
+            for i in range(len(keys)):
+                clusters.setdefault(find(i), []).append(i)
+            for members in clusters.values():
+                hits = [best[m] for m in members if m in best]
+                if hits:
+                    cid = max(hits, key=lambda h: h[0])[1]
+                else:
+                    cid = f"MFR{len(self.names) + 1:06d}"
+                    self.names[cid] = display[keys[members[0]]]
+                for m in members:
+                    self.key_to_id[keys[m]] = cid
+            self.blocks.setdefault(block, []).extend(keys)
+
+
+GUDID_BOOL_COLUMNS = ["sterile", "single_use", "implantable", "contains_nrl"]
+
+
+def to_bool(v) -> Optional[bool]:
+    if isinstance(v, bool):
+        return v
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    s = str(v).strip().lower()
+    if s in ["true", "t", "yes", "y", "1"]:
+        return True
+    if s in ["false", "f", "no", "n", "0"]:
+        return False
+    return None
+
+
+def to_int(v) -> Optional[int]:
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    try:
+        return int(float(str(v).replace(",", "").strip()))
+    except Exception:
+        return None
+
+
+def _is_blank(v) -> bool:
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return True
+    return str(v).strip() == ""
+
+
+def _transform_rowwise(dataset_type: str, out: pd.DataFrame, canon: List[str]) -> pd.DataFrame:
+    """Reference row-by-row transforms and signal filter (kept for equivalence checks and benchmarks)."""
+    if dataset_type == "510k":
+        out["predicate_k_numbers"] = out["predicate_k_numbers"].apply(to_k_list)
+    if dataset_type == "gudid":
+        for bcol in GUDID_BOOL_COLUMNS:
+            out[bcol] = out[bcol].apply(to_bool)
+    if dataset_type == "recall":
+        out["quantity_in_commerce"] = out["quantity_in_commerce"].apply(to_int)
+
+    def row_has_any_signal(r):
+        for c in canon:
+            v = r.get(c)
+            if isinstance(v, list) and len(v) > 0:
+                return True
+            if not _is_blank(v):
+                return True
+        return False
+
+    return out[out.apply(row_has_any_signal, axis=1)].reset_index(drop=True)
+
+
+def _map_cells(col: pd.Series, fn, skip: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    `fn` applied to every cell of `col` (object array out). str, bool and int cells are factorized
+    per type so `fn` runs once per distinct value; any other cell (float, None, pd.NA, ...) gets its own
+    call, which keeps the exact per-value semantics of the row-wise path. Cells flagged in `skip` stay None.
+    """
+    vals = col.to_numpy(dtype=object)
+    res = np.full(len(vals), None, dtype=object)
+    todo = np.ones(len(vals), dtype=bool) if skip is None else ~skip
+    if isinstance(col.dtype, pd.StringDtype):
+        groups = [~col.isna().to_numpy(dtype=bool)]
+    else:
+        kinds = np.fromiter((type(v) for v in vals.tolist()), dtype=object, count=len(vals))
+        groups = [kinds == t for t in (str, bool, int)]
+    rest = todo.copy()
+    for grp in groups:
+        sel = grp & todo
+        rest &= ~grp
+        if sel.any():
+            codes, uniques = pd.factorize(vals[sel])
+            table = pd.Series([fn(u) for u in uniques.tolist()], dtype=object).to_numpy()
+            res[sel] = table[codes]
+    for i in np.flatnonzero(rest).tolist():
+        res[i] = fn(vals[i])
+    return res
+
+
+def _signal_mask(out: pd.DataFrame, canon: List[str]) -> np.ndarray:
+    """Rows with any non-blank canonical cell; same rules as the row-wise `row_has_any_signal`."""
+    keep = np.zeros(len(out), dtype=bool)
+    for c in canon:
+        col = out[c]
+        if isinstance(col.dtype, np.dtype) and col.dtype.kind == "f":
+            keep |= ~np.isnan(col.to_numpy())
+        elif col.dtype == object or isinstance(col.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+            keep |= _map_cells(col, lambda v: not _is_blank(v), skip=keep).astype(bool)
+        else:
+            keep[:] = True
+        if keep.all():
+            break
+    return keep
+
+
+def _transform_vectorized(dataset_type: str, out: pd.DataFrame, canon: List[str]) -> pd.DataFrame:
+    """Column-level transforms and signal filter; output identical to `_transform_rowwise`."""
+    if out.empty:
+        return _transform_rowwise(dataset_type, out, canon)
+    if dataset_type == "510k":
+        lists = _map_cells(out["predicate_k_numbers"], to_k_list)
+        out["predicate_k_numbers"] = pd.Series([list(v) for v in lists.tolist()], index=out.index, dtype=object)
+    if dataset_type == "gudid":
+        for bcol in GUDID_BOOL_COLUMNS:
+            out[bcol] = pd.Series(_map_cells(out[bcol], to_bool).tolist(), index=out.index)
+    if dataset_type == "recall":
+        out["quantity_in_commerce"] = pd.Series(_map_cells(out["quantity_in_commerce"], to_int).tolist(), index=out.index)
+    return out[_signal_mask(out, canon)].reset_index(drop=True)
+
+
+COMPACT_CATEGORY_RATIO = 0.5
+COMPACT_INT_COLUMNS = ["quantity_in_commerce"]
+NATURAL_KEYS = {"510k": "k_number", "recall": "recall_number", "adr": "adverse_event_id", "gudid": "primary_di"}
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def _compact_column(name: str, col: pd.Series) -> Optional[pd.Series]:
+    """Compact replacement for one standardized column, or None to keep it as is."""
+    if isinstance(col.dtype, pd.CategoricalDtype) or pd.api.types.is_datetime64_any_dtype(col.dtype):
+        return None
+    if name in GUDID_BOOL_COLUMNS:
+        if col.dtype == object and all(v is None or type(v) is bool or (isinstance(v, float) and v != v) for v in col.tolist()):
+            return pd.Series(pd.array(col.tolist(), dtype="boolean"), index=col.index)
+        return None
+    if name in COMPACT_INT_COLUMNS:
+        if col.dtype == "Int64" or not (col.dtype == object or pd.api.types.is_float_dtype(col.dtype)):
+            return None
+        if pd.api.types.is_float_dtype(col.dtype):
+            v = col.to_numpy(dtype=np.float64, na_value=np.nan)
+            v = v[~np.isnan(v)]
+            if not (np.abs(v) < 2**63).all() or not (v == np.floor(v)).all():
+                return None
+        try:
+            return pd.Series(pd.array(col.tolist(), dtype="Int64"), index=col.index)
+        except (TypeError, ValueError, OverflowError):
+            return None
+    is_text = isinstance(col.dtype, pd.StringDtype) or (
+        col.dtype == object and pd.api.types.infer_dtype(col, skipna=True) in ("string", "empty"))
+    if not is_text:
+        return None
+    if name in DATE_FIELDS:
+        present = col.notna() & col.astype(str).str.strip().ne("")
+        parsed = pd.to_datetime(col.where(present), errors="coerce", format="ISO8601")
+        if parsed.notna().sum() < present.sum():
+            parsed = pd.to_datetime(col.where(present), errors="coerce", format="mixed")
+        ok = pd.api.types.is_datetime64_dtype(parsed.dtype) and parsed.notna().sum() == present.sum()
+        return parsed if ok else None
+    nonnull = int(col.count())
+    if col.nunique(dropna=True) <= COMPACT_CATEGORY_RATIO * nonnull:
+        return col.astype("category")
+    return col.astype("str") if col.dtype == object else None
+
+
+def compact_df(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Compaction stage run after standardization: low-cardinality text -> category, GUDID flags -> boolean,
+    quantity_in_commerce -> Int64, fully parseable DATE_FIELDS -> datetime64, remaining object text -> `str`
+    (the pandas 3 default string dtype, which keeps missing values missing). Returns the frame and a
+    per-column memory report.
+    """
+    out = df.copy(deep=False)
+    report: List[Dict[str, Any]] = []
+    for c in df.columns:
+        before = int(df[c].memory_usage(index=False, deep=True))
+        new = _compact_column(c, df[c])
+        if new is not None:
+            out[c] = new
+        report.append({"column": c, "dtype_before": str(df[c].dtype), "dtype_after": str(out[c].dtype), "bytes_before": before,
+                       "bytes_after": int(out[c].memory_usage(index=False, deep=True)) if new is not None else before})
+    return out, report
+
+
+def memory_report_lines(report: List[Dict[str, Any]]) -> List[str]:
+    before = sum(r["bytes_before"] for r in report)
+    after = sum(r["bytes_after"] for r in report)
+    lines = ["", "### Memory", "", "| Column | dtype | Before | After |", "|---|---|---|---|"]
+    for r in report:
+        dt = r["dtype_after"] if r["dtype_after"] == r["dtype_before"] else f"{r['dtype_before']} → {r['dtype_after']}"
+        lines.append(f"| `{r['column']}` | {dt} | {_fmt_bytes(r['bytes_before'])} | {_fmt_bytes(r['bytes_after'])} |")
+    lines += ["", f"**Memory:** {_fmt_bytes(before)} → {_fmt_bytes(after)}"
+              + (f" ({after / before:.0%})" if before else "")]
+    return lines
+
+
+def concat_compact(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat of compacted frames; categorical columns are unioned so they stay categorical."""
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return pd.DataFrame()
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+    cat_cols = [c for c in parts[0].columns
+                if all(c in p.columns and isinstance(p[c].dtype, pd.CategoricalDtype) for p in parts)]
+    out = pd.concat([p.drop(columns=cat_cols) for p in parts], ignore_index=True)
+    for c in cat_cols:
+        out[c] = pd.Series(pd.api.types.union_categoricals([p[c] for p in parts]), index=out.index)
+    out = out[[c for c in parts[0].columns] + [c for c in out.columns if c not in parts[0].columns]]
+    return compact_df(out)[0]
+
+
+def _natural_keys(df: pd.DataFrame, key: str) -> pd.Series:
+    if key not in df.columns:
+        return pd.Series([""] * len(df), index=df.index, dtype=object)
+    return df[key].astype(object).where(df[key].notna(), "").astype(str).str.strip().str.upper()
+
+
+def _same_cell(x: Any, y: Any) -> bool:
+    if isinstance(x, list) or isinstance(y, list):
+        return x == y
+    mx, my = pd.isna(x), pd.isna(y)
+    if mx or my:
+        return bool(mx and my)
+    try:
+        return bool(x == y)
+    except (TypeError, ValueError):
+        return repr(x) == repr(y)
+
+
+def _conform_column(ref: pd.Series, col: pd.Series) -> Optional[pd.Series]:
+    """`col` cast to the dtype of the compacted column `ref`, or None if that would lose values."""
+    if col.dtype == ref.dtype:
+        return col
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype(object)
+    missing = col.isna()
+    if isinstance(ref.dtype, pd.CategoricalDtype):
+        extra = pd.Index(col[~missing].unique()).difference(ref.cat.categories)
+        dtype = pd.CategoricalDtype(ref.cat.categories.append(extra)) if len(extra) else ref.dtype
+        new = pd.Series(pd.Categorical(col, dtype=dtype), index=col.index)
+    elif pd.api.types.is_datetime64_any_dtype(ref.dtype):
+        present = ~missing & col.astype(str).str.strip().ne("")
+        new = pd.to_datetime(col.where(present), errors="coerce", format="mixed")
+        if int(new.notna().sum()) != int(present.sum()):
+            return None
+        return new.astype(ref.dtype)
+    elif isinstance(ref.dtype, pd.StringDtype):
+        if pd.api.types.infer_dtype(col, skipna=True) not in ("string", "empty"):
+            return None
+        new = col.astype(ref.dtype)
+    elif ref.dtype == object:
+        return col.astype(object)
+    else:
+        try:
+            new = pd.Series(pd.array(col.tolist(), dtype=ref.dtype), index=col.index)
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return new if int(new.isna().sum()) == int(missing.sum()) else None
+
+
+def _append_conformed(base: pd.DataFrame, parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    `base` with `parts` appended. Only the appended rows are cast to base's compacted dtypes, so the base
+    columns are not recompacted; categoricals gain the new categories (codes are kept), and a column the
+    new rows cannot be cast to losslessly falls back to object for that column alone.
+    """
+    delta = pd.concat(parts, ignore_index=True)
+    base = base.copy(deep=False)
+    for c in base.columns:
+        ref = base[c]
+        if c not in delta.columns:
+            delta[c] = ref.iloc[:0].reindex(range(len(delta))).set_axis(delta.index)
+            continue
+        col = _conform_column(ref, delta[c])
+        if col is None:
+            base[c], col = ref.astype(object), delta[c].astype(object)
+        elif isinstance(col.dtype, pd.CategoricalDtype) and col.dtype != ref.dtype:
+            base[c] = ref.cat.set_categories(col.cat.categories)
+        delta[c] = col
+    delta = delta[list(base.columns) + [c for c in delta.columns if c not in base.columns]]
+    return pd.concat([base, delta], ignore_index=True)
+
+
+def upsert_dataset(dataset_type: str, base: pd.DataFrame, delta: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Merge a standardized `delta` into `base` keyed on NATURAL_KEYS[dataset_type] (stripped, upper-cased).
+    Delta keys are hash-joined against the base key index; matched rows are replaced in place (first base
+    occurrence of a key), unmatched and blank-key rows are appended, rows equal in every column are left
+    alone. Later delta rows win over earlier ones with the same key. Base row ids are preserved, and
+    stats["changed_rows"] lists the merged row ids that differ from `base` (see DatasetSearchIndex.with_rows).
+    """
+    key = NATURAL_KEYS[dataset_type]
+    stats: Dict[str, Any] = {"key": key, "inserted": 0, "updated": 0, "unchanged": 0, "duplicates": 0,
+                             "changed_rows": np.empty(0, dtype=np.int64)}
+    if delta is None or delta.empty:
+        return base, stats
+    if base is None or base.empty:
+        out = delta.reset_index(drop=True)
+        stats["inserted"] = len(out)
+        stats["changed_rows"] = np.arange(len(out), dtype=np.int64)
+        return out, stats
+
+    dkeys = _natural_keys(delta, key).to_numpy()
+    dup = pd.Series(dkeys).duplicated(keep="last").to_numpy() & (dkeys != "")
+    stats["duplicates"] = int(dup.sum())
+    delta, dkeys = delta[~dup].reset_index(drop=True), dkeys[~dup]
+
+    bkeys = _natural_keys(base, key).to_numpy()
+    first = pd.Series(np.arange(len(base)), index=bkeys)
+    first = first[~first.index.duplicated()]
+    bpos = first.reindex(dkeys).to_numpy()
+    matched = ~np.isnan(bpos) & (dkeys != "")
+    d_match, b_match = np.flatnonzero(matched), bpos[matched].astype(np.int64)
+
+    same = np.ones(len(d_match), dtype=bool)
+    if len(d_match):
+        for c in base.columns.union(delta.columns, sort=False):
+            if c not in base.columns or c not in delta.columns:
+                same[:] = False
+                break
+            bv = base[c].iloc[b_match].tolist()
+            dv = delta[c].iloc[d_match].tolist()
+            same &= np.fromiter((_same_cell(x, y) for x, y in zip(bv, dv)), dtype=bool, count=len(dv))
+    d_upd, b_upd = d_match[~same], b_match[~same]
+    d_ins = np.flatnonzero(~matched)
+    stats.update(inserted=len(d_ins), updated=len(d_upd), unchanged=int(same.sum()))
+    if not len(d_upd) and not len(d_ins):
+        return base, stats
+
+    n = len(base)
+    combined = _append_conformed(base, [delta.iloc[d_upd], delta.iloc[d_ins]])
+    order = np.arange(n + len(d_ins), dtype=np.int64)
+    order[b_upd] = n + np.arange(len(d_upd))
+    order[n:] = n + len(d_upd) + np.arange(len(d_ins))
+    out = combined.take(order).reset_index(drop=True)
+    stats["changed_rows"] = np.sort(np.concatenate([b_upd, np.arange(n, n + len(d_ins))])).astype(np.int64)
+    return out, stats
+
+
+def upsert_report_lines(stats: Dict[str, Any]) -> List[str]:
+    lines = ["", "### Upsert", "", f"**Key:** `{stats['key']}`",
+             f"**Inserted:** {stats['inserted']} · **Updated:** {stats['updated']} · **Unchanged:** {stats['unchanged']}"]
+    if stats["duplicates"]:
+        lines.append(f"**Duplicate keys in delta (last kept):** {stats['duplicates']}")
+    return lines
+
+
+STANDARDIZE_TRANSFORMS = {"vectorized": _transform_vectorized, "rowwise": _transform_rowwise}
+
+
+def frames_identical(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Same columns, index, dtypes and cell values, including Python types (True vs 1, None vs NaN)."""
+    if list(a.columns) != list(b.columns) or not a.index.equals(b.index) or list(a.dtypes) != list(b.dtypes):
+        return False
+    def same(x: Any, y: Any) -> bool:
+        if x is y:
+            return True
+        if type(x) is not type(y):
+            return False
+        try:
+            return bool(x == y) or bool(x != x and y != y)
+        except (TypeError, ValueError):
+            return repr(x) == repr(y)
+
+    return all(same(x, y) for c in a.columns for x, y in zip(a[c].tolist(), b[c].tolist()))
+
+
+def standardize_df(dataset_type: str, df: pd.DataFrame, resolver: Optional[ManufacturerResolver] = None,
+                   transforms: str = "vectorized", mapping_cache: Optional[ColumnMappingCache] = None,
+                   compact: bool = True) -> Tuple[pd.DataFrame, str]:
+    dataset_type = dataset_type.lower().strip()
+    if df is None or df.empty:
+        return pd.DataFrame(), "No data to standardize."
+
+    canon = CANON[dataset_type]
+    syn = SYNONYMS[dataset_type]
+    original_cols = list(df.columns)
+
+    cache = mapping_cache or ColumnMappingCache(None)
+    positions, cached = cache.resolve(dataset_type, original_cols)
+    mapped: Dict[str, Optional[str]] = {}
+    report_lines = ["### Standardization Mapping", "", "| Canonical field | Source column |", "|---|---|"]
+    for cfield in canon:
+        pos = positions.get(cfield)
+        src = original_cols[pos] if pos is not None else None
+        mapped[cfield] = src
+        report_lines.append(f"| `{cfield}` | `{src if src else '— (missing)'}` |")
+
+    out = pd.DataFrame()
+    for cfield in canon:
+        src = mapped[cfield]
+        out[cfield] = df[src] if (src and src in df.columns) else None
+
+    out = STANDARDIZE_TRANSFORMS[transforms](dataset_type, out, canon)
+
+    firm_cols = [c for c in MANUFACTURER_NAME_COLUMNS if c in out.columns]
+    firm_names = [
+        next((v for v in vals if isinstance(v, str) and v.strip()), None)
+        for vals in zip(*(out[c].tolist() for c in firm_cols))
+    ] if firm_cols and len(out) else [None] * len(out)
+    mfr_ids, mfr_new = (resolver or ManufacturerResolver(None)).resolve(firm_names)
+    out["manufacturer_id"] = pd.Series(mfr_ids, dtype=object)
+
+    report_lines += ["", f"**Rows:** {len(out)}", f"**Original columns:** {len(original_cols)}"]
+    report_lines.append(f"**Column mapping:** {'cached layout' if cached else 'new layout (matched and cached)'}"
+                        f" — {len(cache.entries)}/{cache.max_entries} layouts, {cache.hits} hits / {cache.misses} misses")
+    report_lines.append(f"**Manufacturer ids:** {len(set(i for i in mfr_ids if i))} ({mfr_new} new name keys resolved)")
+    if compact:
+        out, mem = compact_df(out)
+        report_lines += memory_report_lines(mem)
+    return out, "\n".join(report_lines)
+
+
+STREAM_CHUNK_ROWS = 50_000
+STREAM_READ_CHARS = 1 << 20
+JSON_WRAPPER_KEYS = ["results", "datasets", "data", "records", "items", "rows"]
+
+
+class _JsonArrayStream:
+    """
+    Incremental reader for a JSON array of records, bare or inside a wrapper object
+    (`{"meta": {...}, "results": [...]}`): text is read in STREAM_READ_CHARS blocks and
+    records are decoded one at a time with `JSONDecoder.raw_decode`.
+    """
+
+    def __init__(self, text: io.TextIOBase):
+        self.text = text
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        block = self.text.read(STREAM_READ_CHARS)
+        if not block:
+            self.eof = True
+            return False
+        if self.pos > len(self.buf) // 2:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += block
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def _expect(self, ch: str) -> None:
+        if self._peek() != ch:
+            raise ValueError(f"Malformed JSON stream: expected '{ch}' at offset {self.pos}.")
+        self.pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof or not self._fill():
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def _seek_array(self) -> None:
+        ch = self._peek()
+        if ch == "[":
+            self.pos += 1
+            return
+        if ch != "{":
+            raise ValueError("JSON must be a list of objects (or a wrapper containing a list).")
+        self.pos += 1
+        while self._peek() not in ("}", ""):
+            key = self._value()
+            self._expect(":")
+            if key in JSON_WRAPPER_KEYS and self._peek() == "[":
+                self.pos += 1
+                return
+            self._value()
+            if self._peek() == ",":
+                self.pos += 1
+        raise ValueError("JSON must be a list of objects (or a wrapper containing a list).")
+
+    def records(self) -> Iterator[Any]:
+        self._seek_array()
+        while True:
+            ch = self._peek()
+            if ch == "]" or ch == "":
+                return
+            yield self._value()
+            if self._peek() == ",":
+                self.pos += 1
+
+
+class _PrefixedText:
+    """Text stream that replays an already-read `head` before the rest of `text`."""
+
+    def __init__(self, head: str, text: io.TextIOBase):
+        self.head = head
+        self.text = text
+
+    def read(self, n: int = -1) -> str:
+        if not self.head:
+            return self.text.read(n)
+        if n is None or n < 0:
+            out, self.head = self.head + self.text.read(), ""
+            return out
+        out, self.head = self.head[:n], self.head[n:]
+        return out + (self.text.read(n - len(out)) if len(out) < n else "")
+
+    def readline(self) -> str:
+        if not self.head:
+            return self.text.readline()
+        i = self.head.find("\n")
+        if i >= 0:
+            out, self.head = self.head[:i + 1], self.head[i + 1:]
+            return out
+        out, self.head = self.head + self.text.readline(), ""
+        return out
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+def _stream_format(head: str, filename: Optional[str]) -> str:
+    """The file extension decides; without one, `{` text is NDJSON only if its first two lines each parse."""
+    fn = (filename or "").lower()
+    if fn.endswith(".gz"):
+        fn = fn[:-3]
+    if fn.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if fn.endswith(".csv"):
+        return "csv"
+    if fn.endswith(".json"):
+        return "json"
+    t0 = head.lstrip()
+    if t0.startswith("{"):
+        lines = [ln.strip() for ln in t0.split("\n")[:-1] if ln.strip()][:2]
+        try:
+            return "ndjson" if len(lines) == 2 and all(isinstance(json.loads(ln), dict) for ln in lines) else "json"
+        except ValueError:
+            return "json"
+    if t0.startswith("["):
+        return "json"
+    return "csv"
+
+
+def resolve_data_path(path: str, root: str) -> str:
+    """`path` (absolute or relative to `root`) with symlinks resolved; ValueError unless it lies under `root`."""
+    base = os.path.realpath(root)
+    full = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, full]) != base:
+        raise ValueError(f"{path} is outside the data directory {root}")
+    return full
+
+
+def iter_dataset_chunks(source: Any, filename: Optional[str] = None, chunk_rows: int = STREAM_CHUNK_ROWS,
+                        progress=None) -> Iterator[pd.DataFrame]:
+    """
+    Raw dataframes of at most `chunk_rows` rows from a CSV, JSON array (bare or wrapped, e.g. openFDA
+    `results`) or newline-delimited JSON file, without ever holding the whole file.
+    `source` is a path or a binary file object; `.gz` is decompressed on the fly.
+    `progress(bytes_read, total_bytes)` is called after each chunk (total is None when unknown).
+    """
+    raw = open(source, "rb") if isinstance(source, (str, pathlib.Path)) else source
+    name = filename or (str(source) if isinstance(source, (str, pathlib.Path)) else getattr(source, "name", None))
+    try:
+        try:
+            total = os.fstat(raw.fileno()).st_size
+        except Exception:
+            total = getattr(source, "size", None)
+        binary = gzip.GzipFile(fileobj=raw) if (name or "").lower().endswith(".gz") else raw
+        text = io.TextIOWrapper(binary, encoding="utf-8", errors="ignore", newline="")
+        head = text.read(4096)
+        fmt = _stream_format(head, name)
+        text = _PrefixedText(head, text)
+
+        def report():
+            if progress:
+                try:
+                    progress(raw.tell(), total)
+                except Exception:
+                    progress(None, total)
+
+        if fmt == "csv":
+            for chunk in pd.read_csv(text, chunksize=chunk_rows):
+                yield chunk
+                report()
+        elif fmt == "ndjson":
+            batch = []
+            for line in text:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= chunk_rows:
+                    yield pd.DataFrame(batch)
+                    batch = []
+                    report()
+            if batch:
+                yield pd.DataFrame(batch)
+                report()
+        else:
+            batch = []
+            for rec in _JsonArrayStream(text).records():
+                batch.append(rec)
+                if len(batch) >= chunk_rows:
+                    yield pd.DataFrame(batch)
+                    batch = []
+                    report()
+            if batch:
+                yield pd.DataFrame(batch)
+                report()
+    finally:
+        if isinstance(source, (str, pathlib.Path)):
+            raw.close()
+
+
+def stream_standardize(dataset_type: str, source: Any, filename: Optional[str] = None,
+                       chunk_rows: int = STREAM_CHUNK_ROWS, progress=None,
+                       resolver: Optional[ManufacturerResolver] = None,
+                       mapping_cache: Optional[ColumnMappingCache] = None) -> Tuple[pd.DataFrame, str]:
+    """
+    `standardize_df` applied chunk by chunk as `iter_dataset_chunks` yields them; peak raw memory is one chunk.
+    `progress(rows_in, rows_out, bytes_read, total_bytes)` is called after each chunk.
+    """
+    resolver = resolver or ManufacturerResolver(None)
+    mapping_cache = mapping_cache or ColumnMappingCache(None)
+    parts: List[pd.DataFrame] = []
+    report = ""
+    rows_in = rows_out = 0
+    pos: Dict[str, Any] = {"read": None, "total": None}
+
+    def on_bytes(read, total):
+        pos["read"], pos["total"] = read, total
+
+    mem: Dict[str, Dict[str, Any]] = {}
+    for chunk in iter_dataset_chunks(source, filename, chunk_rows, on_bytes):
+        std, rep = standardize_df(dataset_type, chunk, resolver, mapping_cache=mapping_cache, compact=False)
+        std, chunk_mem = compact_df(std)
+        for r in chunk_mem:
+            acc = mem.setdefault(r["column"], {**r, "bytes_before": 0})
+            acc["bytes_before"] += r["bytes_before"]
+        report = report or rep
+        rows_in += len(chunk)
+        rows_out += len(std)
+        if not std.empty:
+            parts.append(std)
+        if progress:
+            progress(rows_in, rows_out, pos["read"], pos["total"])
+    out = concat_compact(parts)
+    lines = report.splitlines()
+    lines = [ln for ln in lines if not ln.startswith(("**Rows:**", "**Manufacturer ids:**"))]
+    lines += [f"**Rows:** {len(out)} (streamed: {rows_in} read in chunks of {chunk_rows})"]
+    if "manufacturer_id" in out.columns:
+        lines.append(f"**Manufacturer ids:** {out['manufacturer_id'].nunique()}")
+    for c, r in mem.items():
+        if c in out.columns:
+            r.update(dtype_after=str(out[c].dtype), bytes_after=int(out[c].memory_usage(index=False, deep=True)))
+    lines += memory_report_lines(list(mem.values())) if len(out) else []
+    return out, "\n".join(lines)
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a dataframe (columns, dtypes and cell values); list cells are hashed via their str()."""
+    h = hashlib.sha1()
+    h.update(repr([(str(c), str(dt)) for c, dt in df.dtypes.items()]).encode("utf-8"))
+    for c in df.columns:
+        col = df[c]
+        try:
+            hv = pd.util.hash_pandas_object(col, index=False).values
+        except TypeError:
+            hv = pd.util.hash_pandas_object(col.astype(str), index=False).values
+        h.update(hv.tobytes())
+    return h.hexdigest()
+
+
+def _json_default(v: Any) -> Any:
+    if v is pd.NA or v is pd.NaT:
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.strftime("%Y-%m-%d") if v == v.normalize() else v.isoformat()
+    if isinstance(v, np.generic):
+        return v.item()
+    return str(v)
+
+
+def df_to_json_records(df: pd.DataFrame) -> str:
+    return json.dumps(df.to_dict(orient="records"), ensure_ascii=False, indent=2, default=_json_default)
@@ -0,0 +1,34 @@
+"""Coral highlighting of regulatory ontology terms in free text (HTML spans)."""
+import re
+from typing import List, Optional
+
+
+DEFAULT_ONTOLOGY = [
+    "predicate", "predicate device",
+    "warning", "contraindication",
+    "sterile", "biocompatibility",
+    "malfunction", "recall",
+    "mri", "latex",
+    "serious injury", "death",
+    "cybersecurity", "software",
+    "failure", "misfire",
+    "udi", "510(k)", "k-number", "k number",
+    "intended use", "class iii", "class ii", "class i",
+]
+
+
+def coral_highlight(text: str, keywords: Optional[List[str]] = None) -> str:
+    if not text:
+        return ""
+    kws = keywords or DEFAULT_ONTOLOGY
+    kws = sorted(set([k.strip() for k in kws if k and k.strip()]), key=len, reverse=True)
+    out = text
+
+    def repl(m):
+        w = m.group(0)
+        return f'<span class="coral"><b>{w}</b></span>'
+
+    for k in kws:
+        pattern = re.compile(rf"(?i)({re.escape(k)})")
+        out = pattern.sub(repl, out)
+    return out
@@ -0,0 +1,343 @@
+"""openFDA bulk-download ingestion: partition discovery, nested record flattening, parallel parsing in
+subprocess workers (`python -m fdacore.openfda`)."""
+import os
+import re
+import io
+import json
+import gzip
+import zipfile
+import time
+import sys
+import contextlib
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Any, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .datasets import (
+    CANON, DATE_FIELDS, ColumnMappingCache, ManufacturerResolver, _JsonArrayStream, _PrefixedText, _fmt_bytes,
+    _stream_format, compact_df, concat_compact, resolve_data_path, standardize_df,
+)
+
+
+OPENFDA_ENDPOINTS = {"510k": "510k", "recall": "recall", "enforcement": "recall", "event": "adr", "udi": "gudid"}
+_OPENFDA_ENDPOINT_RE = re.compile(r"device[-_](510k|recall|enforcement|event|udi)", re.I)
+_OPENFDA_FILTER_RE = re.compile(r"([^\[\]]+)\[([^=\]]+)=([^\]]*)\]")
+_OPENFDA_PARTITION_EXT = (".json", ".json.gz", ".ndjson", ".jsonl", ".zip")
+OPENFDA_MAX_WORKERS = 4
+OPENFDA_BATCH_ROWS = 20_000
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# CANON field -> dotted paths into an openFDA record, tried in order (first path with a value wins).
+# Lists fan out and distinct values are joined with "; "; `name[key=value]` keeps only list items
+# whose `key` equals `value` (case-insensitive), e.g. the Primary entry of GUDID `identifiers`.
+OPENFDA_FIELD_PATHS: Dict[str, Dict[str, List[str]]] = {
+    "510k": {
+        "k_number": ["k_number"],
+        "decision_date": ["decision_date"],
+        "decision": ["decision_description", "decision_code"],
+        "device_name": ["device_name", "openfda.device_name"],
+        "applicant": ["applicant"],
+        "manufacturer_name": ["applicant"],
+        "product_code": ["product_code"],
+        "regulation_number": ["openfda.regulation_number"],
+        "device_class": ["openfda.device_class"],
+        "panel": ["advisory_committee_description", "openfda.medical_specialty_description"],
+        "review_advisory_committee": ["review_advisory_committee", "advisory_committee"],
+        "summary": ["statement_or_summary"],
+    },
+    "recall": {
+        "recall_number": ["recall_number", "product_res_number", "res_event_number"],
+        "recall_class": ["classification"],
+        "event_date": ["recall_initiation_date", "event_date_initiated"],
+        "termination_date": ["termination_date", "event_date_terminated"],
+        "status": ["status", "recall_status"],
+        "firm_name": ["recalling_firm"],
+        "manufacturer_name": ["recalling_firm"],
+        "product_description": ["product_description"],
+        "product_code": ["product_code", "openfda.product_code"],
+        "code_info": ["code_info"],
+        "reason_for_recall": ["reason_for_recall"],
+        "distribution_pattern": ["distribution_pattern"],
+        "quantity_in_commerce": ["product_quantity"],
+        "country": ["country"],
+        "state": ["state"],
+    },
+    "adr": {
+        "adverse_event_id": ["mdr_report_key", "report_number"],
+        "report_date": ["date_received", "date_of_event"],
+        "event_type": ["event_type"],
+        "patient_outcome": ["patient.sequence_number_outcome"],
+        "device_problem": ["product_problems"],
+        "manufacturer_name": ["device.manufacturer_d_name", "manufacturer_name"],
+        "brand_name": ["device.brand_name"],
+        "product_code": ["device.device_report_product_code"],
+        "device_class": ["device.openfda.device_class"],
+        "udi_di": ["device.udi_di"],
+        "narrative": ["mdr_text[text_type_code=Description of Event or Problem].text", "mdr_text.text"],
+    },
+    "gudid": {
+        "primary_di": ["identifiers[type=Primary].id"],
+        "udi_di": ["identifiers[type=Primary].id"],
+        "device_description": ["device_description"],
+        "device_class": ["product_codes.openfda.device_class"],
+        "manufacturer_name": ["company_name"],
+        "brand_name": ["brand_name"],
+        "product_code": ["product_codes.code"],
+        "gmdn_term": ["gmdn_terms.name"],
+        "mri_safety": ["mri_safety"],
+        "sterile": ["sterilization.is_sterile"],
+        "single_use": ["is_single_use"],
+        "contains_nrl": ["is_labeled_as_nrl"],
+        "version_or_model_number": ["version_or_model_number"],
+        "catalog_number": ["catalog_number"],
+        "record_status": ["record_status"],
+        "publish_date": ["publish_date"],
+        "company_contact_email": ["customer_contacts.email"],
+        "company_contact_phone": ["customer_contacts.phone"],
+    },
+}
+
+
+def openfda_dataset_type(name: str) -> Optional[str]:
+    """Dataset type from an openFDA bulk file name (device-510k-…, device-event-…, device-udi-…)."""
+    m = _OPENFDA_ENDPOINT_RE.search(name or "")
+    return OPENFDA_ENDPOINTS[m.group(1).lower()] if m else None
+
+
+def _openfda_values(obj: Any, segs: List[str]) -> Iterator[Any]:
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _openfda_values(item, segs)
+        return
+    if not segs:
+        if obj is not None and obj != "" and not isinstance(obj, dict):
+            yield obj
+        return
+    if not isinstance(obj, dict):
+        return
+    m = _OPENFDA_FILTER_RE.fullmatch(segs[0])
+    if m is None:
+        yield from _openfda_values(obj.get(segs[0]), segs[1:])
+        return
+    items = obj.get(m.group(1))
+    for item in items if isinstance(items, list) else [items]:
+        if isinstance(item, dict) and str(item.get(m.group(2), "")).lower() == m.group(3).lower():
+            yield from _openfda_values(item, segs[1:])
+
+
+def flatten_openfda_record(rec: Dict[str, Any], paths: Dict[str, List[List[str]]]) -> Dict[str, Any]:
+    """One flat CANON row from a nested openFDA record; `paths` are pre-split (see `OPENFDA_FIELD_PATHS`)."""
+    row: Dict[str, Any] = {}
+    for field, alternatives in paths.items():
+        vals: List[str] = []
+        for segs in alternatives:
+            vals = list(dict.fromkeys(str(v).strip() for v in _openfda_values(rec, segs)))
+            vals = [v for v in vals if v]
+            if vals:
+                break
+        v = "; ".join(vals) if vals else None
+        if v and field in DATE_FIELDS and len(v) == 8 and v.isdigit():
+            v = f"{v[:4]}-{v[4:6]}-{v[6:]}"
+        row[field] = v
+    return row
+
+
+def openfda_partitions(source: str, root: Optional[str] = None) -> List[Tuple[str, Tuple[str, ...], str]]:
+    """
+    Partition files under `source` (a directory, a zip, or one file) as (container path, zip member chain,
+    display name). Zips are listed, not extracted; a zip of openFDA `*.json.zip` partitions is walked one
+    level deep. With `root`, `source` must lie under it and files whose real path leaves it are skipped.
+    """
+    def in_zip(zf: zipfile.ZipFile, chain: Tuple[str, ...], container: str, out: list, depth: int) -> None:
+        for m in sorted(zf.namelist()):
+            low = m.lower()
+            if m.endswith("/") or not low.endswith(_OPENFDA_PARTITION_EXT):
+                continue
+            if low.endswith(".zip"):
+                if depth < 1:
+                    with zf.open(m) as raw, zipfile.ZipFile(raw) as inner:
+                        in_zip(inner, chain + (m,), container, out, depth + 1)
+            else:
+                out.append((container, chain + (m,), m))
+
+    def add(path: str, out: list) -> None:
+        if root is not None:
+            try:
+                path = resolve_data_path(path, root)
+            except ValueError:
+                return
+        if path.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as zf:
+                in_zip(zf, (), path, out, 0)
+        elif path.lower().endswith(_OPENFDA_PARTITION_EXT):
+            out.append((path, (), os.path.basename(path)))
+
+    out: List[Tuple[str, Tuple[str, ...], str]] = []
+    if root is not None:
+        source = resolve_data_path(source, root)
+    if os.path.isdir(source):
+        for dirpath, _, files in sorted(os.walk(source)):
+            for f in sorted(files):
+                add(os.path.join(dirpath, f), out)
+    elif os.path.isfile(source):
+        add(source, out)
+    return out
+
+
+def _openfda_records(container: str, members: Tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+    """Records of one partition, streamed through any zip members (never extracted) and gzip."""
+    with contextlib.ExitStack() as stack:
+        raw = stack.enter_context(open(container, "rb"))
+        name = container
+        for m in members:
+            raw = stack.enter_context(stack.enter_context(zipfile.ZipFile(raw)).open(m))
+            name = m
+        if name.lower().endswith(".gz"):
+            raw = stack.enter_context(gzip.GzipFile(fileobj=raw))
+        text = io.TextIOWrapper(raw, encoding="utf-8", errors="ignore", newline="")
+        head = text.read(4096)
+        fmt = _stream_format(head, name[:-3] if name.lower().endswith(".gz") else name)
+        text = _PrefixedText(head, text)
+        recs = (json.loads(ln) for ln in text if ln.strip()) if fmt == "ndjson" else _JsonArrayStream(text).records()
+        yield from (r for r in recs if isinstance(r, dict))
+
+
+def _openfda_flatten_partition(container: str, members: Tuple[str, ...], paths: Dict[str, List[str]],
+                               out_path: str, batch_rows: int = OPENFDA_BATCH_ROWS) -> int:
+    """
+    Worker body: flatten one partition and write the rows to `out_path` as an Arrow IPC file of string
+    record batches of `batch_rows` rows, so neither side holds a whole partition. Returns the record count.
+    """
+    import pyarrow as pa
+
+    split = {f: [p.split(".") for p in alts] for f, alts in paths.items()}
+    schema = pa.schema([(f, pa.string()) for f in paths])
+    n = 0
+    rows: List[Dict[str, Any]] = []
+    with pa.OSFile(out_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for rec in _openfda_records(container, members):
+            rows.append(flatten_openfda_record(rec, split))
+            n += 1
+            if len(rows) >= batch_rows:
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                rows = []
+        if rows:
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+    return n
+
+
+def _openfda_batches(path: str) -> Iterator[pd.DataFrame]:
+    """Record batches of a worker's Arrow IPC file, memory-mapped and converted one at a time."""
+    import pyarrow as pa
+
+    with pa.memory_map(path) as src:
+        reader = pa.ipc.open_file(src)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).to_pandas()
+
+
+def run_openfda_worker(container: str, members: Tuple[str, ...], paths: Dict[str, List[str]], out_path: str) -> int:
+    """
+    `_openfda_flatten_partition` in a fresh interpreter (`python -m fdacore.openfda`, job as JSON on stdin):
+    neither a fork of the multithreaded Streamlit server nor a multiprocessing spawn child, which would
+    re-import Streamlit's synthetic `__main__`. Returns the record count; raises RuntimeError on failure.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get("PYTHONPATH")])))
+    job = json.dumps({"container": container, "members": list(members), "paths": paths, "out": out_path})
+    res = subprocess.run([sys.executable, "-m", "fdacore.openfda"], input=job, capture_output=True, text=True,
+                         env=env, cwd=PACKAGE_ROOT)
+    if res.returncode:
+        err = (res.stderr.strip().splitlines() or [f"exit code {res.returncode}"])[-1]
+        raise RuntimeError(f"openFDA worker failed on {(members or (container,))[-1]}: {err}")
+    return int(res.stdout.split()[-1])
+
+
+def ingest_openfda_bulk(source: str, dataset_type: Optional[str] = None,
+                        paths: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                        max_workers: int = OPENFDA_MAX_WORKERS, progress=None,
+                        resolver: Optional[ManufacturerResolver] = None,
+                        mapping_cache: Optional[ColumnMappingCache] = None,
+                        root: Optional[str] = None) -> Tuple[Dict[str, pd.DataFrame], str]:
+    """
+    Flatten and standardize every openFDA partition under `source`. Partitions are parsed in parallel by
+    `run_openfda_worker` subprocesses, at most 2 x `max_workers` in flight; their Arrow files are consumed
+    in partition order, each record batch standardized and compacted here, then per dataset the parts are
+    merged with `concat_compact`. The dataset of a partition comes from its file name, else
+    `dataset_type`. `paths` overrides OPENFDA_FIELD_PATHS per dataset and field.
+    `progress(done, total, name)` is called as partitions finish. `root` confines reads (see `openfda_partitions`).
+    """
+    resolver = resolver or ManufacturerResolver(None)
+    mapping_cache = mapping_cache or ColumnMappingCache(None)
+    field_paths = {ds: dict(fp) for ds, fp in OPENFDA_FIELD_PATHS.items()}
+    for ds, fp in (paths or {}).items():
+        field_paths.setdefault(ds, {}).update({f: [p] if isinstance(p, str) else list(p) for f, p in (fp or {}).items()})
+    jobs = []
+    skipped: List[str] = []
+    for container, members, name in openfda_partitions(source, root):
+        ds = openfda_dataset_type("/".join((container,) + members)) or dataset_type
+        if ds in CANON:
+            jobs.append((container, members, name, ds))
+        else:
+            skipped.append(name)
+    if not jobs:
+        raise ValueError("No openFDA partitions found.")
+
+    workers = max(1, min(max_workers, len(jobs)))
+    parts: Dict[str, List[pd.DataFrame]] = {}
+    counts: Dict[str, List[int]] = {}
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="openfda_") as tmp, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="openfda") as pool:
+        queue = iter(enumerate(jobs))
+        window: Deque[Tuple[Future, str, str, str]] = deque()
+
+        def submit() -> None:
+            for i, (c, m, name, ds) in queue:
+                out_path = os.path.join(tmp, f"{i}.arrow")
+                window.append((pool.submit(run_openfda_worker, c, m, field_paths.get(ds, {}), out_path), out_path, name, ds))
+                return
+
+        for _ in range(2 * workers):
+            submit()
+        done = 0
+        while window:
+            fut, out_path, name, ds = window.popleft()
+            n_rec = fut.result()
+            c = counts.setdefault(ds, [0, 0, 0])
+            for flat in _openfda_batches(out_path):
+                std, _ = standardize_df(ds, flat, resolver, mapping_cache=mapping_cache, compact=False)
+                if not std.empty:
+                    parts.setdefault(ds, []).append(compact_df(std)[0])
+                c[2] += len(std)
+            os.remove(out_path)
+            c[0] += 1
+            c[1] += n_rec
+            done += 1
+            submit()
+            if progress:
+                progress(done, len(jobs), name)
+    out = {ds: concat_compact(p) for ds, p in parts.items()}
+
+    lines = [f"### openFDA bulk: `{source}`", "",
+             f"**Partitions:** {len(jobs)} in {time.perf_counter() - t0:.1f}s ({workers} workers)"]
+    if skipped:
+        lines.append(f"**Skipped (unknown dataset):** {', '.join(skipped[:10])}" + (" …" if len(skipped) > 10 else ""))
+    lines += ["", "| Dataset | Partitions | Records | Rows kept | Memory |", "|---|---|---|---|---|"]
+    lines += [f"| {ds} | {c[0]} | {c[1]} | {c[2]} | "
+              f"{_fmt_bytes(int(out[ds].memory_usage(index=False, deep=True).sum())) if ds in out else '—'} |"
+              for ds, c in counts.items()]
+    return out, "\n".join(lines)
+
+
+def main() -> None:
+    """Worker entry point for `run_openfda_worker`: one JSON job on stdin, the record count on stdout."""
+    job = json.load(sys.stdin)
+    print(_openfda_flatten_partition(job["container"], tuple(job["members"]), job["paths"], job["out"]))
+
+
+if __name__ == "__main__":
+    main()
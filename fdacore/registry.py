@@ -0,0 +1,183 @@
+"""Process-wide registry of immutable dataset frames shared across sessions, and the fingerprint memo."""
+import os
+import time
+import datetime
+import threading
+import weakref
+from typing import Dict, Any, List, Optional, Tuple
+
+import pandas as pd
+
+from .datasets import dataset_fingerprint
+
+
+_FINGERPRINT_MEMO: Dict[int, Tuple[Any, Tuple, str]] = {}
+_FINGERPRINT_LOCK = threading.Lock()
+_FINGERPRINT_DEAD: List[Tuple[int, Any]] = []
+
+
+def _purge_dead_fingerprints() -> None:
+    """Drop memo entries of collected frames (call with the lock held). Weakref callbacks only queue them,
+    since they may run from garbage collection inside a locked section."""
+    while _FINGERPRINT_DEAD:
+        key, ref = _FINGERPRINT_DEAD.pop()
+        if _FINGERPRINT_MEMO.get(key, (None,))[0] is ref:
+            del _FINGERPRINT_MEMO[key]
+
+
+def _frame_shape(df: pd.DataFrame) -> Tuple:
+    return (len(df), tuple(map(str, df.columns)), tuple(map(str, df.dtypes)))
+
+
+def cached_fingerprint(df: pd.DataFrame) -> str:
+    """
+    `dataset_fingerprint`, computed once per dataframe object. Frames must be treated as immutable once
+    fingerprinted: the app replaces frames in `dfs` and never writes into them. Anything that edits a frame
+    takes a `.copy()` first (copy-on-write makes that cheap); a memo hit whose row count, columns or dtypes
+    changed is recomputed, but in-place cell writes are not detected.
+    """
+    with _FINGERPRINT_LOCK:
+        _purge_dead_fingerprints()
+        hit = _FINGERPRINT_MEMO.get(id(df))
+        if hit is not None and hit[0]() is df and hit[1] == _frame_shape(df):
+            return hit[2]
+    fp = dataset_fingerprint(df)
+    _remember_fingerprint(df, fp)
+    return fp
+
+
+def _remember_fingerprint(df: pd.DataFrame, fp: str) -> None:
+    """Record a fingerprint known from elsewhere (the registry frame a handle's view was taken from)."""
+    with _FINGERPRINT_LOCK:
+        _purge_dead_fingerprints()
+        _FINGERPRINT_MEMO[id(df)] = (weakref.ref(df, lambda ref, key=id(df): _FINGERPRINT_DEAD.append((key, ref))),
+                                     _frame_shape(df), fp)
+
+
+class DatasetHandle:
+    """A session's reference to one registry frame. `df` is a shallow view: its buffers are the registry's
+    and copy-on-write (always on in pandas 3, which fdacore requires) copies a block only if the view is
+    written to, so a session can never change another session's data. Sessions still treat the view as
+    read-only, since its fingerprint is memoized (see `cached_fingerprint`). Collecting the handle releases it."""
+
+    __slots__ = ("dataset", "fingerprint", "df", "__weakref__")
+
+    def __init__(self, dataset: str, fingerprint: str, df: pd.DataFrame):
+        self.dataset = dataset
+        self.fingerprint = fingerprint
+        self.df = df
+
+
+class SharedDatasetRegistry:
+    """
+    Immutable frames shared by every session of this process, keyed by content fingerprint. The registry
+    keeps its own shallow copy of a shared frame, so later writes by the caller (like writes to a handle's
+    view) are copied on write and never reach it. Each DatasetHandle holds one reference; a frame is
+    dropped when its last handle is collected. Caches holding their own references (the app's search
+    indexes, keyed by the same fingerprint) keep a dropped frame resident until they evict it, so dropped
+    (dataset, fingerprint) pairs are queued for `pop_released`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._released: List[Tuple[str, str]] = []
+        self.sessions: "weakref.WeakSet[SessionDatasets]" = weakref.WeakSet()
+
+    def _handle(self, fp: str) -> DatasetHandle:
+        e = self._entries[fp]
+        e["refs"] += 1
+        view = e["df"].copy(deep=False)
+        _remember_fingerprint(view, fp)
+        h = DatasetHandle(e["dataset"], fp, view)
+        weakref.finalize(h, self._release, fp)
+        return h
+
+    def share(self, dataset: str, df: pd.DataFrame, source: str = "", fingerprint: Optional[str] = None) -> DatasetHandle:
+        """Handle on `df`'s content; when an identical frame is registered already, `df` itself is not kept."""
+        fp = fingerprint or cached_fingerprint(df)
+        with self._lock:
+            if fp not in self._entries:
+                self._entries[fp] = {"dataset": dataset, "df": df.copy(deep=False), "refs": 0, "source": source, "created": time.time(),
+                                     "rows": len(df), "bytes": int(df.memory_usage(index=True, deep=True).sum())}
+            return self._handle(fp)
+
+    def attach(self, fingerprint: str) -> Optional[DatasetHandle]:
+        """Handle on an already registered frame, or None (lets callers skip loading it again)."""
+        with self._lock:
+            return self._handle(fingerprint) if fingerprint in self._entries else None
+
+    def _release(self, fp: str) -> None:
+        with self._lock:
+            e = self._entries.get(fp)
+            if e is not None:
+                e["refs"] -= 1
+                if e["refs"] <= 0:
+                    del self._entries[fp]
+                    self._released.append((e["dataset"], fp))
+
+    def pop_released(self) -> List[Tuple[str, str]]:
+        """(dataset, fingerprint) of frames dropped since the last call."""
+        with self._lock:
+            out, self._released = self._released, []
+            return out
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"dataset": e["dataset"], "fingerprint": fp[:12], "rows": e["rows"], "bytes": e["bytes"], "refs": e["refs"],
+                     "source": e["source"], "created": datetime.datetime.fromtimestamp(e["created"]).strftime("%Y-%m-%d %H:%M:%S")}
+                    for fp, e in self._entries.items()]
+
+
+class SessionDatasets:
+    """
+    The registry handles of one session, next to its `dfs` dict. A dataset is shared while `dfs` holds the
+    handle's view; once the session puts its own frame there (standardize, upload, upsert) `sync` drops the
+    handle, so the session's private copy is the only per-session cost.
+    """
+
+    def __init__(self, registry: SharedDatasetRegistry, dfs: Dict[str, pd.DataFrame]):
+        self.registry = registry
+        self.dfs = dfs
+        self.handles: Dict[str, DatasetHandle] = {}
+        self.session_id = os.urandom(4).hex()
+        self.started = time.time()
+        self._sizes: Dict[int, Tuple[Any, int]] = {}
+        registry.sessions.add(self)
+
+    def share(self, dataset: str, df: pd.DataFrame, source: str = "", fingerprint: Optional[str] = None) -> pd.DataFrame:
+        h = self.registry.share(dataset, df, source, fingerprint)
+        self.handles[dataset] = h
+        self.dfs[dataset] = h.df
+        return h.df
+
+    def attach(self, dataset: str, fingerprint: str) -> Optional[pd.DataFrame]:
+        h = self.registry.attach(fingerprint)
+        if h is None:
+            return None
+        self.handles[dataset] = h
+        self.dfs[dataset] = h.df
+        return h.df
+
+    def sync(self) -> None:
+        for ds, h in list(self.handles.items()):
+            if self.dfs.get(ds) is not h.df:
+                del self.handles[ds]
+
+    def _private_bytes(self, df: pd.DataFrame) -> int:
+        hit = self._sizes.get(id(df))
+        if hit is not None and hit[0]() is df:
+            return hit[1]
+        n = int(df.memory_usage(index=True, deep=True).sum())
+        sizes = self._sizes
+        sizes[id(df)] = (weakref.ref(df, lambda _, k=id(df): sizes.pop(k, None)), n)
+        return n
+
+    def overhead(self) -> Dict[str, Any]:
+        """Shared vs private datasets of this session and the bytes held only by it."""
+        self.sync()
+        private = {ds: self._private_bytes(df) for ds, df in self.dfs.items()
+                   if ds not in self.handles and df is not None and not df.empty}
+        return {"session": self.session_id, "started": datetime.datetime.fromtimestamp(self.started).strftime("%H:%M:%S"),
+                "shared": ", ".join(sorted(self.handles)), "private": ", ".join(sorted(private)),
+                "private_bytes": sum(private.values())}
@@ -0,0 +1,1556 @@
+"""Indexed regulatory search: query parsing, per-dataset indexes, ranking and the multi-dataset engine."""
+import os
+import re
+import gzip
+import contextlib
+import datetime
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from .datasets import CANON, DATE_FIELDS, PredicateGraph, _norm_k, dataset_fingerprint
+
+
+@dataclass
+class SearchResult:
+    dataset: str
+    score: int
+    record: Dict[str, Any]
+    row: int = -1
+
+
+SEARCH_SPECS = {
+    "510k": ["k_number", "device_name", "applicant", "manufacturer_name", "product_code", "summary", "panel", "decision"],
+    "recall": ["recall_number", "firm_name", "manufacturer_name", "product_code", "reason_for_recall", "product_description", "recall_class", "status"],
+    "adr": ["adverse_event_id", "brand_name", "manufacturer_name", "product_code", "udi_di", "device_problem", "patient_outcome", "narrative"],
+    "gudid": ["udi_di", "primary_di", "brand_name", "manufacturer_name", "product_code", "device_description", "gmdn_term", "mri_safety"],
+}
+
+TYPEAHEAD_FIELDS = {
+    "510k": ["k_number", "product_code"],
+    "recall": ["recall_number", "product_code"],
+    "adr": ["adverse_event_id", "udi_di", "product_code"],
+    "gudid": ["primary_di", "udi_di", "product_code"],
+}
+
+# Shared keys across datasets (key type -> dataset -> columns) for the cross-dataset join index.
+JOIN_KEYS = {
+    "k_number": {"510k": ["k_number"]},
+    "recall_number": {"recall": ["recall_number"], "adr": ["recall_number_link"]},
+    "adverse_event_id": {"adr": ["adverse_event_id"]},
+    "udi": {"adr": ["udi_di"], "gudid": ["primary_di", "udi_di"]},
+    "product_code": {"510k": ["product_code"], "recall": ["product_code"], "adr": ["product_code"], "gudid": ["product_code"]},
+    "manufacturer_id": {"510k": ["manufacturer_id"], "recall": ["manufacturer_id"], "adr": ["manufacturer_id"], "gudid": ["manufacturer_id"]},
+    "manufacturer": {
+        "510k": ["manufacturer_name", "applicant"], "recall": ["manufacturer_name", "firm_name"],
+        "adr": ["manufacturer_name"], "gudid": ["manufacturer_name"],
+    },
+}
+
+# Keys followed from the matched records when assembling a dossier (manufacturer is only a direct lookup).
+DOSSIER_LINK_KEYS = ["k_number", "recall_number", "adverse_event_id", "udi", "product_code"]
+
+# Date column each dataset's timeline and date window use.
+PRIMARY_DATE_FIELD = {"510k": "decision_date", "recall": "event_date", "adr": "report_date", "gudid": "publish_date"}
+NAT_DAYS = np.iinfo(np.int64).min
+
+FACET_FIELDS = ["device_class", "recall_class", "decision", "panel", "product_code", "status"]
+
+LONG_TEXT_COLUMNS = {
+    "510k": ["summary"],
+    "recall": ["reason_for_recall"],
+    "adr": ["narrative"],
+    "gudid": ["device_description"],
+}
+
+# Fraction of the query's character trigrams a long-text value must share to be fuzzy-scored. 0 scores every
+# value (results identical to the row scan); any higher value is an opt-in speedup that can drop fuzzy hits.
+TRIGRAM_MIN_OVERLAP = 0.0
+
+# Ranking modes: "fuzzy" scores every column with partial_ratio; "bm25" ranks LONG_TEXT_COLUMNS by BM25
+# (every value sharing a query term is a hit, scaled to 0-100 against the column's best value; the fuzzy
+# threshold does not apply to it, `exact` keeps only values containing the query) and keeps fuzzy/exact
+# scoring elsewhere;
+# "semantic" ranks whole rows by cosine similarity of TF-IDF + truncated SVD embeddings (score = 100 * cosine).
+SEARCH_RANKINGS = ["fuzzy", "bm25", "semantic"]
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SEMANTIC_CACHE_DIR = ".semantic_cache"
+SEMANTIC_CACHE_MAX_BYTES = 1 << 30
+_SEMANTIC_CACHE_SUFFIXES = (".vectors.npy", ".model.npz")
+SEMANTIC_DIM = 128
+SEMANTIC_MAX_VOCAB = 50_000
+SEMANTIC_MIN_SIMILARITY = 0.25
+SEMANTIC_BATCH_ROWS = 65_536
+
+SEARCH_LIMIT = 200
+SEARCH_SHARD_ROWS = 50_000
+SEARCH_MAX_WORKERS = 16
+SEARCH_MEMO_SIZE = 128
+SEARCH_PAGE_SIZE = 200
+SEARCH_EXPORT_CHUNK_ROWS = 5_000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(s: str) -> set:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class BM25Index:
+    """
+    Term-major sparse matrix of precomputed BM25 weights over distinct values (`ptr`/`docs`/`weights`,
+    CSC layout). Document frequency and average length are weighted by how many rows hold each value,
+    so statistics are per row. A query is a sparse dot product: sum of its terms' weight columns.
+    """
+
+    def __init__(self, values: List[str], row_counts: np.ndarray, k1: float = BM25_K1, b: float = BM25_B):
+        self.n_docs = len(values)
+        vocab: Dict[str, int] = {}
+        t_ids, d_ids, tfs = [], [], []
+        dl = np.zeros(len(values), dtype=np.float64)
+        for vid, v in enumerate(values):
+            toks = _TOKEN_RE.findall(v)
+            dl[vid] = len(toks)
+            for tok, tf in Counter(toks).items():
+                t_ids.append(vocab.setdefault(tok, len(vocab)))
+                d_ids.append(vid)
+                tfs.append(tf)
+        self.vocab = vocab
+        t_arr = np.asarray(t_ids, dtype=np.int32)
+        order = np.argsort(t_arr, kind="stable")
+        t_arr = t_arr[order]
+        self.docs = np.asarray(d_ids, dtype=np.int32)[order]
+        tf = np.asarray(tfs, dtype=np.float64)[order]
+        self.ptr = np.concatenate([[0], np.cumsum(np.bincount(t_arr, minlength=len(vocab)))]).astype(np.int64)
+
+        weights = row_counts.astype(np.float64)
+        n_rows = float(weights[dl > 0].sum()) or 1.0
+        avgdl = float((dl * weights).sum() / n_rows) or 1.0
+        df_rows = np.bincount(t_arr, weights=weights[self.docs], minlength=len(vocab))
+        idf = np.log(1.0 + (n_rows - df_rows + 0.5) / (df_rows + 0.5))
+        norm = k1 * (1.0 - b + b * dl[self.docs] / avgdl)
+        self.weights = (idf[t_arr] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    def scores(self, q: str) -> np.ndarray:
+        terms = [self.vocab[tok] for tok in set(_TOKEN_RE.findall(q)) if tok in self.vocab]
+        if not terms:
+            return np.zeros(self.n_docs, dtype=np.float64)
+        sl = [slice(self.ptr[t], self.ptr[t + 1]) for t in terms]
+        docs = np.concatenate([self.docs[x] for x in sl])
+        w = np.concatenate([self.weights[x] for x in sl])
+        return np.bincount(docs, weights=w, minlength=self.n_docs)
+
+
+def _sparse_matmul(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, m: np.ndarray, n_out: int,
+                   chunk: int = 1_000_000) -> np.ndarray:
+    """out[n_out, k] = S @ m for a COO matrix S sorted by `rows` (chunked so nnz x k never materializes)."""
+    out = np.zeros((n_out, m.shape[1]), dtype=np.float64)
+    for a in range(0, len(rows), chunk):
+        r, c, v = rows[a:a + chunk], cols[a:a + chunk], vals[a:a + chunk]
+        if r.size == 0:
+            continue
+        starts = np.flatnonzero(np.r_[True, r[1:] != r[:-1]])
+        out[r[starts]] += np.add.reduceat(v[:, None] * m[c], starts, axis=0)
+    return out
+
+
+def prune_semantic_cache(keep: str = "", max_bytes: int = SEMANTIC_CACHE_MAX_BYTES,
+                         cache_dir: str = SEMANTIC_CACHE_DIR) -> List[str]:
+    """
+    Delete least recently used `SemanticIndex` cache entries (by file mtime, which loading refreshes)
+    until `cache_dir` holds at most `max_bytes`. The entry `keep` (a `{dataset}_{fingerprint}` name) is
+    never removed. Returns the removed entry names.
+    """
+    entries: Dict[str, List[Any]] = {}
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return []
+    for fn in names:
+        suffix = next((x for x in _SEMANTIC_CACHE_SUFFIXES if fn.endswith(x)), None)
+        if suffix is None:
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, fn))
+        except FileNotFoundError:
+            continue
+        e = entries.setdefault(fn[:-len(suffix)], [0.0, 0])
+        e[0], e[1] = max(e[0], st.st_mtime), e[1] + st.st_size
+    total = sum(size for _, size in entries.values())
+    removed: List[str] = []
+    for name, (_, size) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        for suffix in _SEMANTIC_CACHE_SUFFIXES:
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(cache_dir, name + suffix))
+        total -= size
+        removed.append(name)
+    return removed
+
+
+class SemanticIndex:
+    """
+    Offline embeddings of whole rows: TF-IDF over the tokens of the searchable columns, reduced with a
+    (randomized) truncated SVD in NumPy. Row vectors are L2-normalized float32, saved under
+    `SEMANTIC_CACHE_DIR` keyed by dataset fingerprint and memory-mapped back for querying. Loading an
+    entry refreshes its mtime; writing one prunes the cache to `SEMANTIC_CACHE_MAX_BYTES` (LRU).
+    """
+
+    def __init__(self, dataset: str, fingerprint: str, columns: Dict[str, "ColumnSearchIndex"], n_rows: int):
+        os.makedirs(SEMANTIC_CACHE_DIR, exist_ok=True)
+        name = f"{dataset}_{fingerprint}"
+        base = os.path.join(SEMANTIC_CACHE_DIR, name)
+        vec_path, model_path = base + ".vectors.npy", base + ".model.npz"
+        if not (os.path.exists(vec_path) and os.path.exists(model_path)):
+            vectors, terms, idf, proj = self._fit(columns, n_rows)
+            tmp = base + f".{os.getpid()}.tmp"
+            np.save(tmp + ".npy", vectors)
+            np.savez(tmp + ".npz", terms=np.asarray(terms, dtype=str), idf=idf, proj=proj)
+            os.replace(tmp + ".npy", vec_path)
+            os.replace(tmp + ".npz", model_path)
+            prune_semantic_cache(keep=name)
+        else:
+            for path in (vec_path, model_path):
+                with contextlib.suppress(OSError):
+                    os.utime(path)
+        model = np.load(model_path)
+        self.vocab = {str(tok): i for i, tok in enumerate(model["terms"])}
+        self.idf = model["idf"]
+        self.proj = model["proj"]
+        self.vectors = np.load(vec_path, mmap_mode="r")
+
+    @staticmethod
+    def _fit(columns: Dict[str, "ColumnSearchIndex"], n_rows: int):
+        # Token counts are taken once per distinct value, then fanned out to rows through the value codes.
+        tok_ids: Dict[str, int] = {}
+        r_parts, t_parts, n_parts = [], [], []
+        for cidx in columns.values():
+            lens = np.zeros(len(cidx.values), dtype=np.int64)
+            v_tok: List[int] = []
+            v_cnt: List[int] = []
+            for vid, v in enumerate(cidx.values):
+                cnt = Counter(_TOKEN_RE.findall(v))
+                lens[vid] = len(cnt)
+                v_tok.extend(tok_ids.setdefault(tok, len(tok_ids)) for tok in cnt)
+                v_cnt.extend(cnt.values())
+            starts = np.concatenate([[0], np.cumsum(lens)[:-1]]).astype(np.int64)
+            codes = np.asarray(cidx.codes[:n_rows], dtype=np.int64)
+            per_row = lens[codes]
+            total = int(per_row.sum())
+            offset = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+            pos = np.repeat(starts[codes], per_row) + offset
+            r_parts.append(np.repeat(np.arange(n_rows, dtype=np.int64), per_row))
+            t_parts.append(np.asarray(v_tok, dtype=np.int64)[pos])
+            n_parts.append(np.asarray(v_cnt, dtype=np.float64)[pos])
+        # Row-major (row, column, token) order, so ties in document frequency keep first-seen order.
+        order = np.argsort(np.concatenate(r_parts), kind="stable")
+        e_rows, e_toks = np.concatenate(r_parts)[order], np.concatenate(t_parts)[order]
+        n_tok = max(1, len(tok_ids))
+        key, inv = np.unique(e_rows * n_tok + e_toks, return_inverse=True)
+        tf = np.bincount(inv, weights=np.concatenate(n_parts)[order], minlength=len(key))
+        k_rows, k_toks = key // n_tok, key % n_tok
+        df_count = np.bincount(k_toks, minlength=n_tok)
+        first = np.full(n_tok, len(e_toks), dtype=np.int64)
+        np.minimum.at(first, e_toks, np.arange(len(e_toks), dtype=np.int64))
+
+        min_df = 2 if n_rows >= 50 else 1
+        ranked = np.lexsort((first, -df_count))[:min(SEMANTIC_MAX_VOCAB, len(tok_ids))]
+        ranked = ranked[df_count[ranked] >= min_df]
+        names = list(tok_ids)
+        terms = [names[j] for j in ranked.tolist()]
+        idf = np.log((1.0 + n_rows) / (1.0 + df_count[ranked].astype(np.float64))) + 1.0
+
+        term_of = np.full(n_tok, -1, dtype=np.int64)
+        term_of[ranked] = np.arange(len(ranked))
+        keep = term_of[k_toks] >= 0
+        rows, cols = k_rows[keep], term_of[k_toks[keep]]
+        vals = (1.0 + np.log(tf[keep])) * idf[cols] if cols.size else np.zeros(0)
+        norms = np.sqrt(np.bincount(rows, weights=vals ** 2, minlength=n_rows))
+        vals = vals / np.where(norms > 0, norms, 1.0)[rows] if vals.size else vals
+
+        n_terms = len(terms)
+        k = min(SEMANTIC_DIM, n_rows, n_terms)
+        if k == 0:
+            return np.zeros((n_rows, 0), dtype=np.float32), terms, idf, np.zeros((n_terms, 0))
+        if n_rows * n_terms <= 4_000_000:
+            a = np.zeros((n_rows, n_terms))
+            a[rows, cols] = vals
+            _, _, vt = np.linalg.svd(a, full_matrices=False)
+        else:
+            # Randomized range finder (Halko et al.) with two power iterations; only sparse products touch A.
+            rng = np.random.default_rng(0)
+            col_order = np.argsort(cols, kind="stable")
+            t_rows, t_cols, t_vals = cols[col_order], rows[col_order], vals[col_order]
+            y = _sparse_matmul(rows, cols, vals, rng.standard_normal((n_terms, min(k + 10, n_terms))), n_rows)
+            for _ in range(2):
+                q_mat, _ = np.linalg.qr(y)
+                z, _ = np.linalg.qr(_sparse_matmul(t_rows, t_cols, t_vals, q_mat, n_terms))
+                y = _sparse_matmul(rows, cols, vals, z, n_rows)
+            q_mat, _ = np.linalg.qr(y)
+            b_mat = _sparse_matmul(t_rows, t_cols, t_vals, q_mat, n_terms).T
+            _, _, vt = np.linalg.svd(b_mat, full_matrices=False)
+        proj = vt[:k].T
+        vectors = _sparse_matmul(rows, cols, vals, proj, n_rows)
+        vn = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = (vectors / np.where(vn > 0, vn, 1.0)).astype(np.float32)
+        return vectors, terms, idf, proj
+
+    def embed(self, q: str) -> np.ndarray:
+        cnt = Counter(tok for tok in _TOKEN_RE.findall(q.lower()) if tok in self.vocab)
+        qv = np.zeros(self.proj.shape[1], dtype=np.float64)
+        for tok, tf in cnt.items():
+            j = self.vocab[tok]
+            qv += (1.0 + np.log(tf)) * self.idf[j] * self.proj[j]
+        n = np.linalg.norm(qv)
+        return (qv / n).astype(np.float32) if n > 0 else qv.astype(np.float32)
+
+    def hits(self, q: str, rows: Optional[Tuple[int, int]] = None,
+             mask: Optional[np.ndarray] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Row ids and scores of rows above `SEMANTIC_MIN_SIMILARITY`, one `SEMANTIC_BATCH_ROWS` batch at a time."""
+        qv = self.embed(q)
+        if not qv.any():
+            return
+        lo, hi = rows if rows is not None else (0, self.vectors.shape[0])
+        for a in range(lo, hi, SEMANTIC_BATCH_ROWS):
+            b = min(a + SEMANTIC_BATCH_ROWS, hi)
+            sims = np.asarray(self.vectors[a:b] @ qv, dtype=np.float64)
+            if mask is not None:
+                sims[~mask[a:b]] = 0
+            hit = np.flatnonzero(sims >= SEMANTIC_MIN_SIMILARITY)
+            yield hit + a, np.round(sims[hit] * 100, 1)
+
+    def top_rows(self, q: str, limit: int, rows: Optional[Tuple[int, int]] = None,
+                 mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched matrix-vector cosine scan over the memory-mapped vectors; returns ascending row ids and scores."""
+        top = TopKCollector(limit)
+        for hit, sc in self.hits(q, rows, mask):
+            top.offer(hit, sc)
+        ranked = sorted(top.ranked())
+        return np.asarray([r for r, _ in ranked], dtype=np.int64), np.asarray([sc for _, sc in ranked], dtype=np.float64)
+
+
+class ColumnSearchIndex:
+    """
+    Distinct lower-cased values of one column (`values`), the value id of every row (`codes`)
+    and an inverted token index over the distinct values (`postings`).
+    Scoring happens once per distinct value and is fanned out to rows through `codes`.
+    """
+
+    def __init__(self, series: pd.Series, trigrams: bool = False):
+        texts = [str(v).lower() for v in series.tolist()]
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        self.codes = codes.astype(np.int32)
+        self.values: List[str] = list(uniques)
+        self.nonempty = np.fromiter((bool(v) for v in self.values), dtype=bool, count=len(self.values))
+        postings: Dict[str, List[int]] = {}
+        for vid, v in enumerate(self.values):
+            for tok in set(_TOKEN_RE.findall(v)):
+                postings.setdefault(tok, []).append(vid)
+        self.postings = {tok: np.asarray(ids, dtype=np.int32) for tok, ids in postings.items()}
+        self.trigrams: Optional[Dict[str, np.ndarray]] = None
+        self._bm25: Optional[BM25Index] = None
+        self._bm25_lazy = False
+        self._lock = threading.Lock()
+        if trigrams:
+            self._bm25 = BM25Index(self.values, np.bincount(self.codes, minlength=len(self.values)))
+            tri: Dict[str, List[int]] = {}
+            for vid, v in enumerate(self.values):
+                for g in _trigrams(v):
+                    tri.setdefault(g, []).append(vid)
+            self.trigrams = {g: np.asarray(ids, dtype=np.int32) for g, ids in tri.items()}
+
+    @property
+    def bm25(self) -> Optional[BM25Index]:
+        """BM25 weights; indexes derived by `with_rows` rebuild them on first use."""
+        if self._bm25 is None and self._bm25_lazy:
+            with self._lock:
+                if self._bm25 is None:
+                    self._bm25 = BM25Index(self.values, np.bincount(self.codes, minlength=len(self.values)))
+        return self._bm25
+
+    def with_rows(self, series: pd.Series, rows: np.ndarray, n_rows: int) -> "ColumnSearchIndex":
+        """
+        New index for a frame of `n_rows` rows in which only `rows` changed (`series` holds their new
+        values, in order; rows past the old length are appends). Unchanged values keep their ids and
+        postings are shared; new values are appended and tokenized. Values no longer held by any row
+        stay in `values` but are flagged off in `nonempty`, so they never score.
+        """
+        new = ColumnSearchIndex.__new__(ColumnSearchIndex)
+        texts = [str(v).lower() for v in series.tolist()]
+        lookup = {v: i for i, v in enumerate(self.values)}
+        values = list(self.values)
+        added: List[str] = []
+        ids = np.empty(len(texts), dtype=np.int32)
+        for i, tx in enumerate(texts):
+            vid = lookup.get(tx)
+            if vid is None:
+                vid = lookup[tx] = len(values)
+                values.append(tx)
+                added.append(tx)
+            ids[i] = vid
+        codes = np.zeros(n_rows, dtype=np.int32)
+        codes[:min(len(self.codes), n_rows)] = self.codes[:n_rows]
+        codes[rows] = ids
+        new.codes = codes
+        new.values = values
+        counts = np.bincount(codes, minlength=len(values))
+        new.nonempty = np.fromiter((bool(v) for v in values), dtype=bool, count=len(values)) & (counts > 0)
+
+        def extend(index: Dict[str, np.ndarray], grams) -> Dict[str, np.ndarray]:
+            extra: Dict[str, List[int]] = {}
+            for off, v in enumerate(added):
+                for g in grams(v):
+                    extra.setdefault(g, []).append(len(self.values) + off)
+            out = dict(index)
+            for g, lst in extra.items():
+                arr = np.asarray(lst, dtype=np.int32)
+                out[g] = np.concatenate([out[g], arr]) if g in out else arr
+            return out
+
+        new.postings = extend(self.postings, lambda v: set(_TOKEN_RE.findall(v)))
+        new.trigrams = extend(self.trigrams, _trigrams) if self.trigrams is not None else None
+        new._bm25 = None
+        new._bm25_lazy = self.trigrams is not None
+        new._lock = threading.Lock()
+        return new
+
+    def _trigram_candidates(self, q: str, min_overlap: float) -> Optional[np.ndarray]:
+        """Value ids sharing at least `min_overlap` of the query's trigrams, or None when no prefilter applies."""
+        if self.trigrams is None or min_overlap <= 0:
+            return None
+        qg = _trigrams(q)
+        if not qg:
+            return None
+        lists = [self.trigrams[g] for g in qg if g in self.trigrams]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.values))
+        return np.flatnonzero(shared >= max(1, int(np.ceil(min_overlap * len(qg)))))
+
+    def _token_candidates(self, q: str) -> np.ndarray:
+        """
+        Superset of value ids that can contain `q` as a substring: the first query token must end a
+        vocabulary token, the last must start one and the inner ones must match whole tokens.
+        """
+        toks = _TOKEN_RE.findall(q)
+        if not toks:
+            return np.arange(len(self.values), dtype=np.int32)
+        cand = None
+        for i, tok in enumerate(toks):
+            if len(toks) == 1:
+                terms = [t0 for t0 in self.postings if tok in t0]
+            elif i == 0:
+                terms = [t0 for t0 in self.postings if t0.endswith(tok)]
+            elif i == len(toks) - 1:
+                terms = [t0 for t0 in self.postings if t0.startswith(tok)]
+            else:
+                terms = [tok] if tok in self.postings else []
+            if not terms:
+                return np.empty(0, dtype=np.int32)
+            ids = np.unique(np.concatenate([self.postings[t0] for t0 in terms]))
+            cand = ids if cand is None else np.intersect1d(cand, ids, assume_unique=True)
+            if cand.size == 0:
+                break
+        return cand
+
+    def value_scores(self, q: str, exact: bool, fuzzy_level: int, trigram_overlap: float = 0.0,
+                     subset: Optional[np.ndarray] = None, workers: int = -1, ranking: str = "fuzzy") -> np.ndarray:
+        """
+        Score per distinct value (0 = no hit), same semantics as `RegulatorySearchEngine._score_row`.
+        In fuzzy mode values scoring below `fuzzy_level` are not computed to completion, and on
+        trigram-indexed columns only values passing `_trigram_candidates` are scored at all.
+        `subset` restricts scoring to those value ids (the values present in a row shard).
+        With ranking="bm25" long-text columns return BM25 scaled so the column's best value is 100; any
+        positive BM25 score is a hit (`fuzzy_level` does not apply), with `exact` only on values containing `q`.
+        """
+        scores = np.zeros(len(self.values), dtype=np.float64)
+        if ranking == "bm25" and self.bm25 is not None:
+            bm = self.bm25.scores(q)
+            bm[~self.nonempty] = 0
+            if exact:
+                hit = np.zeros(len(self.values), dtype=bool)
+                hit[[vid for vid in self._token_candidates(q).tolist() if q in self.values[vid]]] = True
+                bm[~hit] = 0
+            top = bm.max() if bm.size else 0.0
+            if top > 0:
+                scores = bm * (100.0 / top)
+            if subset is not None:
+                keep = np.zeros(len(self.values), dtype=bool)
+                keep[subset] = True
+                scores[~keep] = 0
+            return scores
+        if exact:
+            cand = self._token_candidates(q)
+            if subset is not None:
+                cand = np.intersect1d(cand, subset)
+            hit = [vid for vid in cand.tolist() if self.nonempty[vid] and q in self.values[vid]]
+            scores[hit] = 100
+            return scores
+        cand = self._trigram_candidates(q, trigram_overlap)
+        if subset is not None:
+            cand = subset if cand is None else np.intersect1d(cand, subset)
+        if cand is not None:
+            if cand.size:
+                scores[cand] = process.cdist([q], [self.values[i] for i in cand.tolist()], scorer=fuzz.partial_ratio,
+                                             score_cutoff=fuzzy_level, dtype=np.float64, workers=workers)[0]
+        elif self.values:
+            scores = process.cdist([q], self.values, scorer=fuzz.partial_ratio, score_cutoff=fuzzy_level,
+                                   dtype=np.float64, workers=workers)[0]
+        scores[~self.nonempty] = 0
+        return scores
+
+
+class IdentifierPrefixIndex:
+    """Sorted unique upper-cased identifiers per field; prefix completion is two binary searches per field."""
+
+    def __init__(self, df: pd.DataFrame, fields: List[str]):
+        self.fields: Dict[str, np.ndarray] = {}
+        for f in fields:
+            if f not in df.columns:
+                continue
+            vals = df[f].dropna().astype(str).str.strip().str.upper()
+            vals = vals[vals != ""]
+            self.fields[f] = np.unique(vals.to_numpy(dtype=str))
+
+    @staticmethod
+    def _keys(series: pd.Series) -> np.ndarray:
+        vals = series.dropna().astype(str).str.strip().str.upper()
+        return vals[vals != ""].to_numpy(dtype=str)
+
+    def with_rows(self, old_df: pd.DataFrame, df: pd.DataFrame, rows: np.ndarray) -> "IdentifierPrefixIndex":
+        """Index for `df` where only `rows` differ from `old_df`: appended identifiers are merged in;
+        a field is re-sorted from scratch only when an existing row changed its identifier."""
+        new = IdentifierPrefixIndex.__new__(IdentifierPrefixIndex)
+        new.fields = {}
+        upd = rows[rows < len(old_df)]
+        for f, arr in self.fields.items():
+            if f not in df.columns:
+                continue
+            changed = len(upd) and not old_df[f].iloc[upd].astype(object).reset_index(drop=True).equals(
+                df[f].iloc[upd].astype(object).reset_index(drop=True))
+            if changed:
+                new.fields[f] = np.unique(self._keys(df[f]))
+            else:
+                new.fields[f] = np.union1d(arr, self._keys(df[f].iloc[rows]))
+        return new
+
+    def complete(self, prefix: str, n: int = 8) -> List[Tuple[str, str]]:
+        p = (prefix or "").strip().upper()
+        if not p:
+            return []
+        out: List[Tuple[str, str]] = []
+        for f, arr in self.fields.items():
+            lo = int(np.searchsorted(arr, p, side="left"))
+            hi = int(np.searchsorted(arr, p + "\uffff", side="left"))
+            out += [(str(v), f) for v in arr[lo:min(hi, lo + n)]]
+        return sorted(out)[:n]
+
+
+def _norm_join_key(key_type: str, v: Any) -> str:
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return ""
+    if key_type == "manufacturer":
+        return " ".join(_TOKEN_RE.findall(str(v).lower()))
+    return str(v).strip().upper()
+
+
+class JoinKeyIndex:
+    """Hash maps key value -> row ids for every JOIN_KEYS column of one dataset, plus the normalized keys per row."""
+
+    def __init__(self, dataset: str, df: pd.DataFrame):
+        self.maps: Dict[str, Dict[str, np.ndarray]] = {}
+        self.row_keys: Dict[str, List[np.ndarray]] = {}
+        for key_type, per_ds in JOIN_KEYS.items():
+            for col in per_ds.get(dataset, []):
+                if col not in df.columns:
+                    continue
+                keys = np.asarray([_norm_join_key(key_type, v) for v in df[col].tolist()], dtype=object)
+                self.row_keys.setdefault(key_type, []).append(keys)
+                codes, uniques = pd.factorize(keys)
+                order = np.argsort(codes, kind="stable")
+                bounds = np.flatnonzero(np.diff(codes[order])) + 1
+                m = self.maps.setdefault(key_type, {})
+                for key, rows in zip(uniques, np.split(order, bounds)):
+                    if key:
+                        m[key] = np.union1d(m[key], rows) if key in m else rows
+
+    def with_rows(self, dataset: str, df: pd.DataFrame, rows: np.ndarray) -> "JoinKeyIndex":
+        """Index for `df` where only `rows` changed: per-row keys are patched and only the keys those
+        rows held before or hold now get their row lists recomputed."""
+        new = JoinKeyIndex.__new__(JoinKeyIndex)
+        new.maps, new.row_keys = {}, {}
+        row_list = rows.tolist()
+        for key_type, per_ds in JOIN_KEYS.items():
+            cols = [c for c in per_ds.get(dataset, []) if c in df.columns]
+            if not cols:
+                continue
+            touched: Dict[str, List[int]] = {}
+            affected = set()
+            for j, col in enumerate(cols):
+                old = self.row_keys[key_type][j]
+                keys = np.empty(len(df), dtype=object)
+                keys[:len(old)] = old[:len(df)]
+                for r, v in zip(row_list, df[col].iloc[rows].tolist()):
+                    if r < len(old):
+                        affected.add(old[r])
+                    keys[r] = k = _norm_join_key(key_type, v)
+                    affected.add(k)
+                    if k:
+                        touched.setdefault(k, []).append(r)
+                new.row_keys.setdefault(key_type, []).append(keys)
+            m = dict(self.maps.get(key_type, {}))
+            for k in affected:
+                if not k:
+                    continue
+                keep = np.setdiff1d(m.get(k, np.empty(0, dtype=np.int64)), rows, assume_unique=True)
+                merged = np.union1d(keep, np.asarray(touched.get(k, []), dtype=np.int64))
+                if merged.size:
+                    m[k] = merged
+                else:
+                    m.pop(k, None)
+            new.maps[key_type] = m
+        return new
+
+    def lookup(self, key_type: str, key: str) -> np.ndarray:
+        return self.maps.get(key_type, {}).get(key, np.empty(0, dtype=np.int64))
+
+    def keys_of(self, key_type: str, rows: np.ndarray) -> set:
+        return {k for arr in self.row_keys.get(key_type, []) for k in arr[rows].tolist() if k}
+
+
+FILTER_FIELDS = sorted({c for cols in CANON.values() for c in cols} | {"manufacturer_id"})
+_QUERY_TOKEN_RE = re.compile(
+    r'\s*(?:(\()|(\))|([A-Za-z_][A-Za-z0-9_]*):(>=|<=|>|<|=)?("[^"]*"|[^\s()]*)|("[^"]*")|([^\s()]+))'
+)
+
+
+@dataclass
+class ParsedQuery:
+    text: str
+    expr: Optional[Tuple]
+    has_filters: bool
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """
+    Parse `field:value`, `field:"quoted value"`, `field:>=2023-01-01` (>, >=, <, <=) and free text,
+    combined with AND / OR / NOT and parentheses (adjacent terms are ANDed; NOT > AND > OR).
+    Only known column names count as fields, anything else is free text. Dangling operators and empty
+    groups ("pump NOT", "NOT )", "()") are dropped.
+    Free-text terms ANDed at the top level form `text` (scored on the rows surviving the filters); text
+    under OR / NOT is a boolean clause matched by `DatasetSearchIndex.filter_mask`. `expr` is the tree of
+    ("and", [...]) / ("or", [...]) / ("not", x) / ("field", col, op, value) / ("text", s).
+    """
+    toks: List[Tuple[str, Any]] = []
+    pos, q = 0, query or ""
+    while pos < len(q):
+        m = _QUERY_TOKEN_RE.match(q, pos)
+        if not m or m.end() == pos:
+            break
+        pos = m.end()
+        lp, rp, field, op, fval, quoted, word = m.groups()
+        if lp:
+            toks.append(("(", None))
+        elif rp:
+            toks.append((")", None))
+        elif field is not None and field.lower() in FILTER_FIELDS and fval:
+            toks.append(("field", (field.lower(), op or "=", fval.strip('"'))))
+        elif field is not None:
+            toks.append(("text", m.group(0).strip()))
+        elif quoted is not None:
+            if quoted.strip('"'):
+                toks.append(("text", quoted.strip('"')))
+        elif word in ("AND", "OR", "NOT"):
+            toks.append((word, None))
+        elif word:
+            toks.append(("text", word))
+
+    i = 0
+
+    def peek() -> Optional[str]:
+        return toks[i][0] if i < len(toks) else None
+
+    def p_or():
+        nonlocal i
+        items = [p_and()]
+        while peek() == "OR":
+            i += 1
+            items.append(p_and())
+        items = [x for x in items if x is not None]
+        return None if not items else items[0] if len(items) == 1 else ("or", items)
+
+    def p_and():
+        nonlocal i
+        items = []
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                i += 1
+                continue
+            items.append(p_not())
+        items = [x for x in items if x is not None]
+        return None if not items else items[0] if len(items) == 1 else ("and", items)
+
+    def p_not():
+        nonlocal i
+        if peek() in (None, ")", "AND", "OR"):
+            return None
+        if peek() == "NOT":
+            i += 1
+            x = p_not()
+            return ("not", x) if x is not None else None
+        kind, val = toks[i]
+        i += 1
+        if kind == "(":
+            x = p_or()
+            if peek() == ")":
+                i += 1
+            return x
+        if kind == "field":
+            return ("field",) + val
+        return ("text", val)
+
+    expr = None
+    while i < len(toks):
+        x = p_or()
+        expr = x if expr is None else ("and", [expr, x]) if x is not None else expr
+        if i < len(toks):
+            i += 1
+
+    texts: List[str] = []
+    has_filters = False
+
+    def walk(node, boolean: bool) -> None:
+        nonlocal has_filters
+        if node[0] == "text":
+            if boolean:
+                has_filters = True
+            else:
+                texts.append(node[1])
+        elif node[0] == "field":
+            has_filters = True
+        else:
+            for x in ([node[1]] if node[0] == "not" else node[1]):
+                walk(x, boolean or node[0] != "and")
+
+    if expr is not None:
+        walk(expr, False)
+    return ParsedQuery(" ".join(texts), expr if has_filters else None, has_filters)
+
+
+def date_epoch_days(values: pd.Series) -> np.ndarray:
+    """int64 days since 1970-01-01 per value, NAT_DAYS where the value is not a parseable date."""
+    if pd.api.types.is_datetime64_any_dtype(getattr(values, "dtype", None)):
+        ts = values
+    else:
+        ts = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", format="mixed")
+    return ts.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+
+
+def _date_days(value: Any) -> Optional[int]:
+    ts = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(ts) else int(np.datetime64(pd.Timestamp(ts).date(), "D").astype(np.int64))
+
+
+class DateIndex:
+    """
+    DATE_FIELDS of one dataset parsed once into epoch days (`days`, NAT_DAYS = missing), plus per column
+    the sorted days of dated rows and their row ids. Windows and histogram bins are np.searchsorted.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.days: Dict[str, np.ndarray] = {}
+        self.sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for c in DATE_FIELDS:
+            if c not in df.columns:
+                continue
+            days = date_epoch_days(df[c])
+            rows = np.flatnonzero(days != NAT_DAYS)
+            order = np.argsort(days[rows], kind="stable")
+            self.days[c] = days
+            self.sorted[c] = (days[rows][order], rows[order])
+
+    def with_rows(self, df: pd.DataFrame, rows: np.ndarray) -> "DateIndex":
+        """Days parsed only for the changed `rows` of `df`; the sorted arrays are re-derived with one argsort."""
+        new = DateIndex.__new__(DateIndex)
+        new.days, new.sorted = {}, {}
+        for c, old in self.days.items():
+            days = np.full(len(df), NAT_DAYS, dtype=np.int64)
+            days[:min(len(old), len(df))] = old[:len(df)]
+            days[rows] = date_epoch_days(df[c].iloc[rows])
+            dated = np.flatnonzero(days != NAT_DAYS)
+            order = np.argsort(days[dated], kind="stable")
+            new.days[c], new.sorted[c] = days, (days[dated][order], dated[order])
+        return new
+
+    def bounds(self, col: str) -> Optional[Tuple[int, int]]:
+        keys = self.sorted.get(col, (np.empty(0, dtype=np.int64),))[0]
+        return (int(keys[0]), int(keys[-1])) if keys.size else None
+
+    def window(self, col: str, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Row ids (ascending) dated within [start, end] (epoch days, either side open when None)."""
+        if col not in self.sorted:
+            return np.empty(0, dtype=np.int64)
+        keys, rows = self.sorted[col]
+        lo = int(np.searchsorted(keys, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(keys, end, side="right")) if end is not None else len(keys)
+        return np.sort(rows[lo:hi])
+
+    def histogram(self, col: str, rows: np.ndarray, unit: str = "M",
+                  span: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(bin start days, counts) of `rows` per calendar `unit` ("M" or "Y") over `span` (defaults to the rows' own range)."""
+        if col not in self.days:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        d = self.days[col][rows]
+        d = np.sort(d[d != NAT_DAYS])
+        if span is None:
+            if not d.size:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            span = (int(d[0]), int(d[-1]))
+        first = np.datetime64(span[0], "D").astype(f"datetime64[{unit}]")
+        last = np.datetime64(span[1], "D").astype(f"datetime64[{unit}]")
+        edges = np.arange(first, last + 2).astype("datetime64[D]").astype(np.int64)
+        counts = np.diff(np.searchsorted(d, edges, side="left"))
+        return edges[:-1], counts
+
+
+def _filter_text(v: Any) -> str:
+    if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and pd.isna(v)):
+        return ""
+    if isinstance(v, pd.Timestamp):
+        return (v.strftime("%Y-%m-%d") if v == v.normalize() else v.isoformat()).lower()
+    return str(v).strip().lower()
+
+
+class FieldFilterIndex:
+    """
+    Filter index of one column: hash of distinct stripped lower-cased values -> value code for
+    equality, and (built on first range filter) the sorted numeric keys with their row ids;
+    `*_date` columns are keyed by epoch days (pass the DateIndex arrays as `sorted_keys`), other
+    columns by their numeric value.
+    """
+
+    def __init__(self, name: str, series: pd.Series, sorted_keys: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self.name = name
+        self._series = series
+        texts = [_filter_text(v) for v in series.tolist()]
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        self.codes = codes.astype(np.int32)
+        self.values: List[str] = list(uniques)
+        self.lookup: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+        self._sorted: Optional[Tuple[np.ndarray, np.ndarray]] = sorted_keys
+        self._lock = threading.Lock()
+
+    @property
+    def is_date(self) -> bool:
+        return self.name.endswith("_date")
+
+    def sorted_keys(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted keys, row ids in that order); rows without a parseable key are left out."""
+        with self._lock:
+            if self._sorted is None:
+                if self.is_date:
+                    keys = date_epoch_days(self._series)
+                    ok = keys != NAT_DAYS
+                else:
+                    num = pd.to_numeric(self._series, errors="coerce")
+                    ok = num.notna().to_numpy()
+                    keys = num.to_numpy(dtype=np.float64, na_value=np.nan)
+                rows = np.flatnonzero(ok)
+                order = np.argsort(keys[rows], kind="stable")
+                self._sorted = (keys[rows][order], rows[order])
+            return self._sorted
+
+    def _range_key(self, value: str):
+        if self.is_date:
+            return _date_days(value)
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
+    def mask(self, op: str, value: str) -> np.ndarray:
+        out = np.zeros(len(self.codes), dtype=bool)
+        if op == "=":
+            v = value.strip().lower()
+            ids = [self.lookup[v]] if v in self.lookup else []
+            if not ids and v.startswith("class "):
+                ids = [self.lookup[v[6:].strip()]] if v[6:].strip() in self.lookup else []
+            if ids:
+                out = np.isin(self.codes, np.asarray(ids, dtype=np.int32))
+            return out
+        key = self._range_key(value)
+        if key is None:
+            return out
+        keys, rows = self.sorted_keys()
+        if op in (">", ">="):
+            lo = int(np.searchsorted(keys, key, side="right" if op == ">" else "left"))
+            sel = rows[lo:]
+        else:
+            hi = int(np.searchsorted(keys, key, side="left" if op == "<" else "right"))
+            sel = rows[:hi]
+        out[sel] = True
+        return out
+
+
+class FacetIndex:
+    """
+    Categorical codes of the FACET_FIELDS columns of one dataset (labels as `astype(str)` renders them).
+    Facet counts for a hit set are one np.bincount over the hits' codes; facet filters compare codes.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.codes: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, List[str]] = {}
+        for c in FACET_FIELDS:
+            if c in df.columns:
+                codes, uniques = pd.factorize(df[c].astype(str), use_na_sentinel=False)
+                self.codes[c] = codes.astype(np.int32)
+                self.labels[c] = [str(u) for u in uniques]
+
+    def with_rows(self, df: pd.DataFrame, rows: np.ndarray) -> "FacetIndex":
+        """Codes patched for the changed `rows` of `df`; unseen labels are appended."""
+        new = FacetIndex.__new__(FacetIndex)
+        new.codes, new.labels = {}, {}
+        for c, old in self.codes.items():
+            labels = list(self.labels[c])
+            lookup = {lab: i for i, lab in enumerate(labels)}
+            codes = np.zeros(len(df), dtype=np.int32)
+            codes[:min(len(old), len(df))] = old[:len(df)]
+            for r, lab in zip(rows.tolist(), df[c].iloc[rows].astype(str).tolist()):
+                lab = str(lab)
+                if lab not in lookup:
+                    lookup[lab] = len(labels)
+                    labels.append(lab)
+                codes[r] = lookup[lab]
+            new.codes[c], new.labels[c] = codes, labels
+        return new
+
+    def counts(self, field: str, rows: np.ndarray) -> pd.Series:
+        if field not in self.codes:
+            return pd.Series({"nan": len(rows)}, dtype=np.int64) if len(rows) else pd.Series(dtype=np.int64)
+        n = np.bincount(self.codes[field][rows], minlength=len(self.labels[field]))
+        nz = np.flatnonzero(n)
+        return pd.Series(n[nz], index=[self.labels[field][i] for i in nz], dtype=np.int64)
+
+    def mask(self, field: str, rows: np.ndarray, labels: List[str]) -> np.ndarray:
+        if field not in self.codes:
+            return np.full(len(rows), "nan" in labels)
+        want = [i for i, lab in enumerate(self.labels[field]) if lab in set(labels)]
+        return np.isin(self.codes[field][rows], np.asarray(want, dtype=np.int32))
+
+
+class BoundedExecutor(Executor):
+    """
+    View of a shared pool that runs at most `max_workers` of its own tasks at once: `submit` blocks
+    while that many are pending. `shutdown` leaves the shared pool running.
+    """
+
+    def __init__(self, pool: Executor, max_workers: int):
+        self.pool = pool
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        self._slots.acquire()
+        try:
+            fut = self.pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        pass
+
+
+class TopKCollector:
+    """
+    Bounded min-heap of the k best (score, row) pairs. Ties rank the lower row id first,
+    which matches a stable sort of rows in frame order.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int]] = []
+
+    @property
+    def threshold(self) -> float:
+        """Score a row must reach to enter the top-k (0 while the heap is not full)."""
+        return self._heap[0][0] if len(self._heap) >= self.k else 0.0
+
+    def offer(self, rows: np.ndarray, scores: np.ndarray) -> None:
+        """Offer a batch of rows (ascending ids); only the batch's own top-k ever touch the heap."""
+        if self.k <= 0 or rows.size == 0:
+            return
+        if rows.size > self.k:
+            kth = np.partition(scores, rows.size - self.k)[rows.size - self.k]
+            keep = scores > kth
+            ties = np.flatnonzero(scores == kth)[: self.k - int(keep.sum())]
+            keep[ties] = True
+            rows, scores = rows[keep], scores[keep]
+        for r, sc in zip(rows.tolist(), scores.tolist()):
+            item = (sc, -r)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+
+    def ranked(self) -> List[Tuple[int, float]]:
+        return [(-nr, sc) for sc, nr in sorted(self._heap, reverse=True)]
+
+
+class DatasetSearchIndex:
+    def __init__(self, dataset: str, df: pd.DataFrame, fingerprint: Optional[str] = None):
+        self.dataset = dataset
+        self.df = df
+        self.fingerprint = fingerprint
+        self._semantic: Optional[SemanticIndex] = None
+        self._semantic_lock = threading.Lock()
+        cols = SEARCH_SPECS.get(dataset, list(df.columns))
+        long_cols = LONG_TEXT_COLUMNS.get(dataset, [])
+        self.columns: Dict[str, ColumnSearchIndex] = {
+            c: ColumnSearchIndex(df[c], trigrams=c in long_cols) for c in cols if c in df.columns
+        }
+        self.identifiers = IdentifierPrefixIndex(df, TYPEAHEAD_FIELDS.get(dataset, []))
+        self.joins = JoinKeyIndex(dataset, df)
+        self.facets = FacetIndex(df)
+        self.dates = DateIndex(df)
+        self._fields: Dict[str, FieldFilterIndex] = {}
+        self._fields_lock = threading.Lock()
+        self.lineage: Optional[PredicateGraph] = None
+        if dataset == "510k" and "k_number" in df.columns:
+            preds = df["predicate_k_numbers"].tolist() if "predicate_k_numbers" in df.columns else [None] * len(df)
+            self.lineage = PredicateGraph(df["k_number"].tolist(), preds)
+
+    def with_rows(self, df: pd.DataFrame, rows: np.ndarray, fingerprint: Optional[str] = None) -> "DatasetSearchIndex":
+        """
+        Index for `df`, a version of this index's frame in which only `rows` changed or were appended
+        (see `upsert_dataset`). Column, join, facet, date and identifier indexes are patched for those
+        rows; field filters and the semantic index are rebuilt lazily, the 510(k) lineage eagerly.
+        """
+        if list(df.columns) != list(self.df.columns):
+            return DatasetSearchIndex(self.dataset, df, fingerprint)
+        rows = np.asarray(rows, dtype=np.int64)
+        new = DatasetSearchIndex.__new__(DatasetSearchIndex)
+        new.dataset = self.dataset
+        new.df = df
+        new.fingerprint = fingerprint
+        new._semantic = None
+        new._semantic_lock = threading.Lock()
+        new.columns = {c: cidx.with_rows(df[c].iloc[rows], rows, len(df)) for c, cidx in self.columns.items()}
+        new.identifiers = self.identifiers.with_rows(self.df, df, rows)
+        new.joins = self.joins.with_rows(self.dataset, df, rows)
+        new.facets = self.facets.with_rows(df, rows)
+        new.dates = self.dates.with_rows(df, rows)
+        new._fields = {}
+        new._fields_lock = threading.Lock()
+        new.lineage = None
+        if self.dataset == "510k" and "k_number" in df.columns:
+            preds = df["predicate_k_numbers"].tolist() if "predicate_k_numbers" in df.columns else [None] * len(df)
+            new.lineage = PredicateGraph(df["k_number"].tolist(), preds)
+        return new
+
+    def field(self, name: str) -> Optional[FieldFilterIndex]:
+        """Filter index of one column, built on first use."""
+        if name not in self.df.columns:
+            return None
+        with self._fields_lock:
+            if name not in self._fields:
+                self._fields[name] = FieldFilterIndex(name, self.df[name], self.dates.sorted.get(name))
+            return self._fields[name]
+
+    def filter_mask(self, expr: Optional[Tuple], exact: bool = True, fuzzy_level: int = 100) -> Optional[np.ndarray]:
+        """
+        Row mask of a `parse_query` tree (None = no filters). Field clauses go to the column's
+        FieldFilterIndex (a field this dataset lacks matches nothing). Free text ANDed at the top level
+        matches every row (it is scored afterwards); text under OR / NOT matches the rows it would score
+        on with `exact` / `fuzzy_level`.
+        """
+        if expr is None:
+            return None
+        n = len(self.df)
+
+        def ev(node, scored: bool) -> np.ndarray:
+            kind = node[0]
+            if kind == "field":
+                fidx = self.field(node[1])
+                return fidx.mask(node[2], node[3]) if fidx is not None else np.zeros(n, dtype=bool)
+            if kind == "text":
+                return np.ones(n, dtype=bool) if scored else self.row_scores(node[1].lower(), exact, fuzzy_level) > 0
+            if kind == "not":
+                return ~ev(node[1], False)
+            parts = [ev(x, scored and kind == "and") for x in node[1]]
+            return np.logical_and.reduce(parts) if kind == "and" else np.logical_or.reduce(parts)
+
+        return ev(expr, True)
+
+    def row_scores(self, q: str, exact: bool, fuzzy_level: int, bound_k: Optional[int] = None,
+                   trigram_overlap: float = 0.0, rows: Optional[Tuple[int, int]] = None, workers: int = -1,
+                   ranking: str = "fuzzy", mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Best column score per row (column scores are gathered through the value codes, then max-reduced).
+        `rows=(lo, hi)` scores only that row range, and only the distinct values occurring in it.
+        `mask` (full-frame bool) restricts scoring to the surviving rows' distinct values; other rows score 0.
+
+        With `bound_k`, columns are scored smallest vocabulary first and the k-th best partial row score
+        becomes the cutoff for the remaining columns: a value below it cannot lift any row into the top-k.
+        Scores of the top-k rows stay exact; rows outside it may be under-reported.
+        """
+        lo, hi = rows if rows is not None else (0, len(self.df))
+        sharded = (lo, hi) != (0, len(self.df))
+        keep = mask[lo:hi] if mask is not None else None
+        scores = np.zeros(hi - lo, dtype=np.float64)
+        if keep is not None and not keep.any():
+            return scores
+        cutoff = float(fuzzy_level)
+        for cidx in sorted(self.columns.values(), key=lambda c: len(c.values)):
+            codes = cidx.codes[lo:hi]
+            subset = np.unique(codes[keep]) if keep is not None else np.unique(codes) if sharded else None
+            vs = cidx.value_scores(q, exact, cutoff, trigram_overlap, subset=subset, workers=workers, ranking=ranking)
+            np.maximum(scores, vs[codes], out=scores)
+            if keep is not None:
+                scores[~keep] = 0
+            if bound_k and not exact and len(scores) >= bound_k:
+                cutoff = max(cutoff, float(np.partition(scores, len(scores) - bound_k)[len(scores) - bound_k]))
+        if ranking != "bm25":
+            scores[scores < fuzzy_level] = 0
+        return scores
+
+    def semantic(self) -> SemanticIndex:
+        """Embeddings are built on first semantic query (or loaded from the on-disk cache for this fingerprint)."""
+        with self._semantic_lock:
+            if self._semantic is None:
+                fp = self.fingerprint or dataset_fingerprint(self.df)
+                self._semantic = SemanticIndex(self.dataset, fp, self.columns, len(self.df))
+            return self._semantic
+
+    def top_rows(self, q: str, exact: bool, fuzzy_level: int, limit: int = SEARCH_LIMIT,
+                 trigram_overlap: float = TRIGRAM_MIN_OVERLAP, rows: Optional[Tuple[int, int]] = None,
+                 workers: int = -1, ranking: str = "fuzzy", mask: Optional[np.ndarray] = None
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row ids (ascending) and scores of the top `limit` rows of the frame or of one row range.
+        With `mask`, only surviving rows are considered; an empty `q` then scores every survivor 100.
+        """
+        lo, hi = rows if rows is not None else (0, len(self.df))
+        if mask is not None and not q:
+            scores = mask[lo:hi] * 100.0
+        elif ranking == "semantic":
+            return self.semantic().top_rows(q, limit, rows, mask)
+        else:
+            scores = self.row_scores(q, exact, fuzzy_level, bound_k=limit, trigram_overlap=trigram_overlap,
+                                     rows=rows, workers=workers, ranking=ranking, mask=mask)
+        top = TopKCollector(limit)
+        hits = np.flatnonzero(scores)
+        top.offer(hits + lo, scores[hits])
+        ranked = sorted(top.ranked())
+        return np.asarray([r for r, _ in ranked], dtype=np.int64), np.asarray([sc for _, sc in ranked], dtype=np.float64)
+
+    def ranked_rows(self, q: str, exact: bool, fuzzy_level: int, trigram_overlap: float = TRIGRAM_MIN_OVERLAP,
+                    ranking: str = "fuzzy", mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Every hit in `search` order (score desc, row asc), with no top-k cutoff."""
+        if ranking == "semantic" and q:
+            parts = list(self.semantic().hits(q, mask=mask))
+            rows = np.concatenate([r for r, _ in parts]) if parts else np.empty(0, dtype=np.int64)
+            scores = np.concatenate([sc for _, sc in parts]) if parts else np.empty(0, dtype=np.float64)
+        else:
+            if mask is not None and not q:
+                full = mask * 100.0
+            else:
+                full = self.row_scores(q, exact, fuzzy_level, trigram_overlap=trigram_overlap, ranking=ranking, mask=mask)
+            rows = np.flatnonzero(full)
+            scores = full[rows]
+        order = np.lexsort((rows, -scores))
+        return rows[order].astype(np.int64), scores[order]
+
+    def with_lineage(self, q: str, rows: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ranked hits plus the predicate hop: when `q` is exactly the top hit's K-number, the rows of its
+        predicates are appended at score 95 and the list is re-ranked stably by score. Used by both
+        `RegulatorySearchEngine.search` and its cursors, so they agree.
+        """
+        if self.lineage is None or not len(rows) or not q:
+            return rows, scores
+        q_upper = _norm_k(q)
+        if _norm_k(self.df["k_number"].iloc[int(rows[0])]) != q_upper:
+            return rows, scores
+        hop = [r for pk in self.lineage.parents.get(q_upper, []) for r in self.lineage.rows.get(pk, [])]
+        if not hop:
+            return rows, scores
+        rows = np.concatenate([rows, np.asarray(hop, dtype=np.int64)])
+        scores = np.concatenate([scores, np.full(len(hop), 95.0)])
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def shards(self, shard_rows: int) -> List[Tuple[int, int]]:
+        n = len(self.df)
+        return [(lo, min(lo + shard_rows, n)) for lo in range(0, n, shard_rows)] or [(0, 0)]
+
+    def materialize(self, ranked: List[Tuple[int, float]]) -> List[SearchResult]:
+        recs = self.records(np.asarray([r for r, _ in ranked], dtype=np.int64))
+        return [SearchResult(self.dataset, sc, rec, r) for (r, sc), rec in zip(ranked, recs)]
+
+    def search(self, q: str, exact: bool, fuzzy_level: int, limit: int = SEARCH_LIMIT,
+               trigram_overlap: float = TRIGRAM_MIN_OVERLAP, ranking: str = "fuzzy") -> List[SearchResult]:
+        rows, scores = self.top_rows(q.lower(), exact, fuzzy_level, limit, trigram_overlap, ranking=ranking)
+        top = TopKCollector(limit)
+        top.offer(rows, scores)
+        return self.materialize(top.ranked())
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        return [r.to_dict() for _, r in self.df.iloc[rows].iterrows()]
+
+
+class SearchCursor:
+    """All ranked hits of one dataset as row ids and scores; records are only built per page."""
+
+    def __init__(self, index: DatasetSearchIndex, rows: np.ndarray, scores: np.ndarray):
+        self.index = index
+        self.rows = rows
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def page(self, offset: int, size: int = SEARCH_PAGE_SIZE) -> List[SearchResult]:
+        sl = slice(max(0, offset), max(0, offset) + size)
+        return self.index.materialize(list(zip(self.rows[sl].tolist(), self.scores[sl].tolist())))
+
+    def pages(self, size: int = SEARCH_PAGE_SIZE, offset: int = 0) -> Iterator[List[SearchResult]]:
+        for a in range(offset, len(self), size):
+            yield self.page(a, size)
+
+    def to_csv(self, path: str, chunk_rows: int = SEARCH_EXPORT_CHUNK_ROWS) -> int:
+        """Stream every hit (with `_score`) to a CSV file (gzipped for `.gz`), `chunk_rows` rows at a time;
+        returns rows written."""
+        with (gzip.open if path.endswith(".gz") else open)(path, "wt", encoding="utf-8", newline="") as f:
+            if not len(self):
+                pd.DataFrame(columns=list(self.index.df.columns) + ["_score"]).to_csv(f, index=False)
+            for a in range(0, len(self), chunk_rows):
+                chunk = self.index.df.iloc[self.rows[a:a + chunk_rows]].copy()
+                chunk["_score"] = self.scores[a:a + chunk_rows]
+                chunk.to_csv(f, index=False, header=a == 0)
+        return len(self)
+
+
+class RegulatorySearchEngine:
+    def __init__(self, dfs: Dict[str, pd.DataFrame], indexes: Optional[Dict[str, DatasetSearchIndex]] = None,
+                 version: Any = None):
+        self.dfs = dfs
+        if indexes is None:
+            indexes = {ds: DatasetSearchIndex(ds, df) for ds, df in dfs.items() if ds in SEARCH_SPECS and df is not None and not df.empty}
+        self.indexes: Dict[str, DatasetSearchIndex] = indexes
+        self.version = version
+        self._memo: "OrderedDict[Tuple, Dict[str, List[SearchResult]]]" = OrderedDict()
+        self._cursors: "OrderedDict[Tuple, SearchCursor]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def _score_row(self, row: Dict[str, Any], cols: List[str], query: str, exact: bool, fuzzy_level: int) -> int:
+        q = (query or "").strip().lower()
+        if not q:
+            return 0
+        best = 0
+        for c in cols:
+            v = str(row.get(c, "")).lower()
+            if not v:
+                continue
+            if exact:
+                if q in v:
+                    best = max(best, 100)
+            else:
+                best = max(best, fuzz.partial_ratio(q, v))
+        return best if best >= fuzzy_level else 0
+
+    def search(self, query: str, include: Dict[str, bool], exact: bool, fuzzy_level: int,
+               trigram_overlap: float = TRIGRAM_MIN_OVERLAP, executor: Optional[Executor] = None,
+               ranking: str = "fuzzy") -> Dict[str, List[SearchResult]]:
+        return self.search_with_timings(query, include, exact, fuzzy_level, trigram_overlap, executor, ranking)[0]
+
+    def search_with_timings(self, query: str, include: Dict[str, bool], exact: bool, fuzzy_level: int,
+                            trigram_overlap: float = TRIGRAM_MIN_OVERLAP, executor: Optional[Executor] = None,
+                            ranking: str = "fuzzy", memo: bool = True
+                            ) -> Tuple[Dict[str, List[SearchResult]], Dict[str, float]]:
+        """
+        Results plus per-dataset timings in ms (empty timings = served from the memo).
+        Memoized (LRU, `SEARCH_MEMO_SIZE` entries) by query, settings, included datasets and data version;
+        `memo=False` always searches and leaves the memo untouched (benchmarks).
+        """
+        if not memo:
+            hit, timings = self._search(query, include, exact, fuzzy_level, trigram_overlap, executor, ranking)
+            return {ds: list(items) for ds, items in hit.items()}, timings
+        key = (
+            (query or "").strip(), bool(exact), int(fuzzy_level), float(trigram_overlap), ranking,
+            tuple(bool(include.get(ds, True)) for ds in ["510k", "recall", "adr", "gudid"]), self.version,
+        )
+        with self._memo_lock:
+            hit = self._memo.get(key)
+            if hit is not None:
+                self._memo.move_to_end(key)
+        timings: Dict[str, float] = {}
+        if hit is None:
+            hit, timings = self._search(query, include, exact, fuzzy_level, trigram_overlap, executor, ranking)
+            with self._memo_lock:
+                self._memo[key] = hit
+                while len(self._memo) > SEARCH_MEMO_SIZE:
+                    self._memo.popitem(last=False)
+        return {ds: list(items) for ds, items in hit.items()}, timings
+
+    def _search(self, query: str, include: Dict[str, bool], exact: bool, fuzzy_level: int,
+                trigram_overlap: float, executor: Optional[Executor] = None, ranking: str = "fuzzy"
+                ) -> Tuple[Dict[str, List[SearchResult]], Dict[str, float]]:
+        """
+        Without `executor` datasets are searched one after another (rapidfuzz parallelizes each cdist).
+        With it, every included dataset is split into `SEARCH_SHARD_ROWS` row ranges that run as
+        independent tasks (single-threaded cdist each); shard top-k lists are merged per dataset.
+        Timings are summed task time per dataset plus wall-clock `total`.
+        Fielded queries (`parse_query`) are filtered first through the column filter indexes; only the
+        free-text part is scored, and only on the surviving rows.
+        """
+        results: Dict[str, List[SearchResult]] = {k: [] for k in ["510k", "recall", "adr", "gudid"]}
+        timings: Dict[str, float] = {}
+        q = (query or "").strip()
+        if not q:
+            return results, timings
+        t_start = time.perf_counter()
+        active = {ds: idx for ds, idx in self.indexes.items() if include.get(ds, True)}
+        masks: Dict[str, Optional[np.ndarray]] = {ds: None for ds in active}
+        parsed = parse_query(q)
+        if parsed.has_filters:
+            q = parsed.text
+            for ds, idx in active.items():
+                t0 = time.perf_counter()
+                masks[ds] = idx.filter_mask(parsed.expr, exact, fuzzy_level)
+                timings[ds] = (time.perf_counter() - t0) * 1000
+
+        def run(ds: str, rows: Optional[Tuple[int, int]], workers: int):
+            t0 = time.perf_counter()
+            r, sc = active[ds].top_rows(q.lower(), exact, fuzzy_level, SEARCH_LIMIT, trigram_overlap, rows, workers,
+                                        ranking, masks[ds])
+            return ds, r, sc, time.perf_counter() - t0
+
+        if executor is None:
+            outs = [run(ds, None, -1) for ds in active]
+        else:
+            futs = [executor.submit(run, ds, rows, 1) for ds, idx in active.items() for rows in idx.shards(SEARCH_SHARD_ROWS)]
+            outs = [f.result() for f in futs]
+
+        parts: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {ds: [] for ds in active}
+        for ds, r, sc, dt in outs:
+            parts[ds].append((r, sc))
+            timings[ds] = timings.get(ds, 0.0) + dt * 1000
+        for ds, idx in active.items():
+            t0 = time.perf_counter()
+            top = TopKCollector(SEARCH_LIMIT)
+            top.offer(np.concatenate([r for r, _ in parts[ds]]), np.concatenate([sc for _, sc in parts[ds]]))
+            ranked = top.ranked()
+            r, sc = idx.with_lineage(q, np.asarray([r for r, _ in ranked], dtype=np.int64),
+                                     np.asarray([sc for _, sc in ranked], dtype=np.float64))
+            results[ds] = idx.materialize(list(zip(r.tolist(), sc.tolist())))
+            timings[ds] += (time.perf_counter() - t0) * 1000
+
+        timings["total"] = (time.perf_counter() - t_start) * 1000
+        return results, timings
+
+    def cursor(self, query: str, dataset: str, exact: bool, fuzzy_level: int,
+               trigram_overlap: float = TRIGRAM_MIN_OVERLAP, ranking: str = "fuzzy") -> Optional[SearchCursor]:
+        """
+        Cursor over every hit of one dataset (no `SEARCH_LIMIT` cap), ranked like `search` (including the
+        K-number predicate hop, see `DatasetSearchIndex.with_lineage`), so page 0 of size SEARCH_LIMIT is
+        the regular result list. Cursors are kept in the memo LRU.
+        """
+        idx = self.indexes.get(dataset)
+        q = (query or "").strip()
+        if idx is None or not q:
+            return None
+        key = ("cursor", dataset, q, bool(exact), int(fuzzy_level), float(trigram_overlap), ranking, self.version)
+        with self._memo_lock:
+            cur = self._cursors.get(key)
+            if cur is not None:
+                self._cursors.move_to_end(key)
+                return cur
+        parsed = parse_query(q)
+        mask = idx.filter_mask(parsed.expr, exact, fuzzy_level) if parsed.has_filters else None
+        text = parsed.text if parsed.has_filters else q
+        cur = SearchCursor(idx, *idx.with_lineage(text, *idx.ranked_rows(text.lower(), exact, fuzzy_level,
+                                                                           trigram_overlap, ranking, mask)))
+        with self._memo_lock:
+            self._cursors[key] = cur
+            while len(self._cursors) > SEARCH_MEMO_SIZE:
+                self._cursors.popitem(last=False)
+        return cur
+
+    def facet_counts(self, hits: Dict[str, np.ndarray], field: str) -> pd.Series:
+        """Label -> count of `field` over hit row ids per dataset, largest first (rows without the field count as "nan")."""
+        parts = [self.indexes[ds].facets.counts(field, rows) for ds, rows in hits.items() if ds in self.indexes and len(rows)]
+        if not parts:
+            return pd.Series(dtype=np.int64)
+        out = pd.concat(parts).groupby(level=0, sort=False).sum()
+        return out.sort_values(ascending=False, kind="stable")
+
+    def facet_mask(self, dataset: str, rows: np.ndarray, field: str, labels: List[str]) -> np.ndarray:
+        """Which of `rows` carry one of the facet `labels`."""
+        return self.indexes[dataset].facets.mask(field, rows, labels)
+
+    def date_window(self, dataset: str, start: Any = None, end: Any = None, column: Optional[str] = None) -> np.ndarray:
+        """Row ids of `dataset` dated within [start, end] (dates or date strings; None = open) on `column` (default: its primary date)."""
+        idx = self.indexes.get(dataset)
+        if idx is None:
+            return np.empty(0, dtype=np.int64)
+        col = column or PRIMARY_DATE_FIELD.get(dataset, "")
+        return idx.dates.window(col, _date_days(start) if start is not None else None,
+                                _date_days(end) if end is not None else None)
+
+    def date_bounds(self) -> Optional[Tuple[datetime.date, datetime.date]]:
+        """Earliest and latest primary date over all loaded datasets."""
+        spans = [b for ds, idx in self.indexes.items() if (b := idx.dates.bounds(PRIMARY_DATE_FIELD.get(ds, "")))]
+        if not spans:
+            return None
+        to_date = lambda d: np.datetime64(d, "D").astype(datetime.date)
+        return to_date(min(b[0] for b in spans)), to_date(max(b[1] for b in spans))
+
+    def date_histogram(self, hits: Dict[str, np.ndarray], unit: Optional[str] = None) -> pd.DataFrame:
+        """
+        Hit counts per calendar month (or year, auto-picked when the hits span more than 8 years) and dataset
+        on each dataset's primary date; columns `period`, `_dataset`, `count`.
+        """
+        spans = {}
+        for ds, rows in hits.items():
+            idx = self.indexes.get(ds)
+            col = PRIMARY_DATE_FIELD.get(ds, "")
+            if idx is None or col not in idx.dates.days or not len(rows):
+                continue
+            d = idx.dates.days[col][rows]
+            d = d[d != NAT_DAYS]
+            if d.size:
+                spans[ds] = (int(d.min()), int(d.max()))
+        if not spans:
+            return pd.DataFrame(columns=["period", "_dataset", "count"])
+        span = (min(a for a, _ in spans.values()), max(b for _, b in spans.values()))
+        unit = unit or ("Y" if span[1] - span[0] > 8 * 366 else "M")
+        frames = []
+        for ds in spans:
+            starts, counts = self.indexes[ds].dates.histogram(PRIMARY_DATE_FIELD[ds], hits[ds], unit, span)
+            frames.append(pd.DataFrame({"period": starts.astype("datetime64[D]"), "_dataset": ds, "count": counts}))
+        out = pd.concat(frames, ignore_index=True)
+        return out[out["count"] > 0].reset_index(drop=True)
+
+    def complete_identifier(self, prefix: str, n: int = 8) -> List[Dict[str, str]]:
+        """Top-n identifier completions (K-numbers, recall numbers, MDR ids, UDI-DIs, product codes) across datasets."""
+        hits = [(v, f, ds) for ds, idx in self.indexes.items() for v, f in idx.identifiers.complete(prefix, n)]
+        seen, out = set(), []
+        for v, f, ds in sorted(hits):
+            if v in seen:
+                continue
+            seen.add(v)
+            out.append({"id": v, "field": f, "dataset": ds})
+            if len(out) >= n:
+                break
+        return out
+
+    def device_dossier(self, identifier: str) -> Dict[str, pd.DataFrame]:
+        """
+        Everything linked to one identifier (K-number, recall number, MDR id, UDI-DI, product code or
+        manufacturer name) via hash lookups in the join index: the records matching it directly, then
+        one hop through the k_number / recall / MDR / UDI / product code keys those records carry.
+        Each frame gets a `_via` column naming the key that linked the row.
+        """
+        seeds: Dict[str, Dict[int, str]] = {ds: {} for ds in self.indexes}
+        for key_type in JOIN_KEYS:
+            key = _norm_join_key(key_type, identifier)
+            for ds, idx in self.indexes.items():
+                for r in idx.joins.lookup(key_type, key).tolist():
+                    seeds[ds].setdefault(r, key_type)
+        if not any(seeds.values()):
+            return {}
+
+        links: Dict[str, set] = {kt: set() for kt in DOSSIER_LINK_KEYS}
+        for ds, rows in seeds.items():
+            if rows:
+                arr = np.fromiter(rows.keys(), dtype=np.int64)
+                for kt in DOSSIER_LINK_KEYS:
+                    links[kt] |= self.indexes[ds].joins.keys_of(kt, arr)
+
+        out: Dict[str, pd.DataFrame] = {}
+        for ds, idx in self.indexes.items():
+            via = dict(seeds[ds])
+            for kt in DOSSIER_LINK_KEYS:
+                for key in sorted(links[kt]):
+                    for r in idx.joins.lookup(kt, key).tolist():
+                        via.setdefault(r, f"{kt}:{key}")
+            if via:
+                rows = sorted(via)
+                frame = idx.df.iloc[rows].copy()
+                frame["_via"] = [via[r] for r in rows]
+                out[ds] = frame.reset_index(drop=True)
+        return out
+
+    def predicate_lineage(self, k_number: str, direction: str = "ancestors", hops: int = 1) -> pd.DataFrame:
+        """
+        N-hop predicate lineage of `k_number` as a 510(k) frame with a `_hops` column.
+        direction="ancestors" follows cited predicates, "descendants" follows devices citing it.
+        K-numbers that are referenced but not loaded are returned with only `k_number` set.
+        """
+        idx = self.indexes.get("510k")
+        if idx is None or idx.lineage is None:
+            return pd.DataFrame()
+        g = idx.lineage
+        depth = g.ancestors(k_number, hops) if direction == "ancestors" else g.descendants(k_number, hops)
+        if not depth:
+            return pd.DataFrame()
+        rows, row_hops, missing = [], [], []
+        for k, d in depth.items():
+            if k in g.rows:
+                rows += g.rows[k]
+                row_hops += [d] * len(g.rows[k])
+            else:
+                missing.append({"k_number": k, "_hops": d})
+        out = idx.df.iloc[rows].copy()
+        out["_hops"] = row_hops
+        if missing:
+            out = pd.concat([out, pd.DataFrame(missing)], ignore_index=True)
+        out["_hops"] = out["_hops"].astype(int)
+        return out.sort_values("_hops", kind="stable").reset_index(drop=True)
+
+
+def benchmark_trigram_prefilter(engine: RegulatorySearchEngine, queries: List[str], fuzzy_level: int = 80,
+                                overlaps: Tuple[float, ...] = (0.0, 0.1, 0.2, 0.3, 0.5, 0.7),
+                                repeats: int = 3) -> pd.DataFrame:
+    """
+    Latency and recall of the trigram prefilter on every long-text column, against brute-force
+    fuzzy scoring of all values (`min_overlap` 0, identical to `_score_row`).
+    """
+    rows = []
+    for ds, idx in engine.indexes.items():
+        for col, cidx in idx.columns.items():
+            if cidx.trigrams is None:
+                continue
+            truth = {q: np.flatnonzero(cidx.value_scores(q.strip().lower(), False, fuzzy_level)) for q in queries}
+            for ov in overlaps:
+                times, recalls = [], []
+                for q in queries:
+                    ql = q.strip().lower()
+                    for _ in range(repeats):
+                        t0 = time.perf_counter()
+                        got = cidx.value_scores(ql, False, fuzzy_level, ov)
+                        times.append((time.perf_counter() - t0) * 1000)
+                    hits = np.flatnonzero(got)
+                    recalls.append(len(np.intersect1d(hits, truth[q])) / len(truth[q]) if len(truth[q]) else 1.0)
+                rows.append({
+                    "dataset": ds, "column": col, "values": len(cidx.values), "min_overlap": ov,
+                    "p50_ms": round(float(np.percentile(times, 50)), 3), "p95_ms": round(float(np.percentile(times, 95)), 3),
+                    "recall": round(float(np.mean(recalls)), 4),
+                })
+    return pd.DataFrame(rows)
@@ -0,0 +1,167 @@
+"""Versioned columnar dataset store (Arrow IPC / Parquet)."""
+import os
+import re
+import json
+import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .datasets import CANON, dataset_fingerprint
+
+DATASET_STORE_DIR = "dataset_store"
+
+
+DATASET_STORE_FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+_STORE_META_KEY = b"wow.dataset"
+_STORE_NAN_PREFIX = "__isnan__:"
+
+
+def _version_slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", (name or "").strip()).strip("._") or "untitled"
+
+
+class DatasetStore:
+    """
+    Named versions of standardized datasets under `root/<dataset_type>/<version>.<arrow|parquet>`.
+    The Arrow schema carries a JSON manifest (dataset type, version, fingerprint, rows, pandas dtypes).
+    Arrow IPC files are memory-mapped on load, so numeric and `str` columns come back without copies;
+    object columns (lists, bool/None, str/None) are rebuilt as Python values so a loaded frame matches
+    the saved one cell for cell. Object columns arrow cannot type are stored as JSON text.
+    pyarrow is imported lazily.
+    """
+
+    def __init__(self, root: str = DATASET_STORE_DIR):
+        self.root = root
+
+    def path(self, dataset_type: str, version: str, fmt: str = "arrow") -> str:
+        return os.path.join(self.root, dataset_type, _version_slug(version) + DATASET_STORE_FORMATS[fmt])
+
+    def _files(self, dataset_type: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        out = []
+        for ds in ([dataset_type] if dataset_type else sorted(CANON)):
+            d = os.path.join(self.root, ds)
+            if not os.path.isdir(d):
+                continue
+            for fn in sorted(os.listdir(d)):
+                stem, ext = os.path.splitext(fn)
+                fmt = next((f for f, e in DATASET_STORE_FORMATS.items() if e == ext), None)
+                if fmt:
+                    out.append((ds, stem, fmt))
+        return out
+
+    @staticmethod
+    def _encode(df: pd.DataFrame) -> Tuple[Any, Dict[str, Any]]:
+        import pyarrow as pa
+
+        plain = [c for c in df.columns if df[c].dtype != object]
+        arrays: List[Any] = []
+        names: List[str] = []
+        object_cols: Dict[str, str] = {}
+        for c in df.columns:
+            if c in plain:
+                continue
+            vals = df[c].tolist()
+            missing = [v is None or (isinstance(v, float) and v != v) for v in vals]
+            nans = [m and v is not None for m, v in zip(missing, vals)]
+            try:
+                arr = pa.array(vals, from_pandas=True)
+                kind = "values"
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+                arr = pa.array([None if m else json.dumps(v, ensure_ascii=False, default=str)
+                                for m, v in zip(missing, vals)], type=pa.string())
+                kind = "json"
+            arrays.append(arr)
+            names.append(c)
+            if any(nans):
+                arrays.append(pa.array(nans, type=pa.bool_()))
+                names.append(_STORE_NAN_PREFIX + c)
+            object_cols[c] = kind
+        if not plain:
+            return pa.Table.from_arrays(arrays, names=names), {"plain": plain, "object": object_cols}
+        table = pa.Table.from_pandas(df[plain], preserve_index=False)
+        for c, arr in zip(names, arrays):
+            table = table.append_column(c, arr)
+        return table, {"plain": plain, "object": object_cols}
+
+    def save(self, dataset_type: str, df: pd.DataFrame, version: str, fmt: str = "arrow") -> Dict[str, Any]:
+        """Writes `df` as `version` (atomic replace) and returns its manifest."""
+        import pyarrow as pa
+
+        table, layout = self._encode(df.reset_index(drop=True))
+        meta = {
+            "dataset_type": dataset_type, "version": _version_slug(version), "format": fmt,
+            "rows": int(len(df)), "columns": [str(c) for c in df.columns],
+            "dtypes": {str(c): str(dt) for c, dt in df.dtypes.items()},
+            "fingerprint": dataset_fingerprint(df),
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            **layout,
+        }
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               _STORE_META_KEY: json.dumps(meta, ensure_ascii=False).encode("utf-8")})
+        path = self.path(dataset_type, version, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp)
+        else:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+        return meta
+
+    def _read(self, path: str, fmt: str, schema_only: bool = False) -> Any:
+        import pyarrow as pa
+
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_schema(path) if schema_only else pq.read_table(path, memory_map=True)
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+        return reader.schema if schema_only else reader.read_all()
+
+    def versions(self, dataset_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Manifests of stored versions (schema metadata only; no data is read)."""
+        out = []
+        for ds, stem, fmt in self._files(dataset_type):
+            p = self.path(ds, stem, fmt)
+            try:
+                meta = json.loads(self._read(p, fmt, schema_only=True).metadata[_STORE_META_KEY])
+            except Exception:
+                continue
+            meta.update({"path": p, "bytes": os.path.getsize(p)})
+            out.append(meta)
+        return out
+
+    def load(self, dataset_type: str, version: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        import pyarrow as pa
+
+        fmt = next((f for ds, stem, f in self._files(dataset_type) if stem == _version_slug(version)), None)
+        if fmt is None:
+            raise FileNotFoundError(f"{dataset_type}/{version} is not in {self.root}")
+        table = self._read(self.path(dataset_type, version, fmt), fmt)
+        meta = json.loads(table.schema.metadata[_STORE_META_KEY])
+        plain = meta["plain"]
+        base = table.select(plain).to_pandas(split_blocks=True) if plain else pd.DataFrame(index=pd.RangeIndex(table.num_rows))
+        cols: Dict[str, pd.Series] = {c: base[c] for c in plain}
+        names = set(table.column_names)
+        for c, kind in meta["object"].items():
+            col = table.column(c)
+            if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+                vals = col.to_numpy(zero_copy_only=False)
+            else:
+                vals = pd.Series(col.to_pylist(), dtype=object).to_numpy()
+            if kind == "json":
+                vals = pd.Series([None if v is None else json.loads(v) for v in vals.tolist()], dtype=object).to_numpy()
+            if _STORE_NAN_PREFIX + c in names:
+                vals = vals.copy()
+                vals[table.column(_STORE_NAN_PREFIX + c).to_numpy(zero_copy_only=False)] = np.nan
+            cols[c] = pd.Series(vals, dtype=object, copy=False)
+        df = pd.DataFrame({c: cols[c] for c in meta["columns"]}, copy=False)
+        return df, meta
+
+    def delete(self, dataset_type: str, version: str) -> None:
+        for ds, stem, fmt in self._files(dataset_type):
+            if stem == _version_slug(version):
+                os.remove(self.path(ds, stem, fmt))
@@ -0,0 +1,167 @@
+"""Synthetic openFDA-scale datasets for benchmarks and tests."""
+from typing import Dict, Any, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .datasets import CANON
+
+
+SYNTHETIC_SCALES = [10_000, 100_000, 1_000_000, 5_000_000]
+BENCHMARK_QUERIES = ["battery overheating", "infusion pump", "occlusion alarm", "latex", "K1003"]
+
+_SYN_WORDS = (
+    "device patient battery pump infusion catheter stent lead valve sensor alarm occlusion overheating software "
+    "firmware display power failure misfire leak crack fracture migration sterile packaging seal latex label "
+    "instructions dose delivery flow rate pressure tubing connector needle syringe monitor glucose insulin "
+    "cardiac pacing implant surgical stapler staple bleeding injury death malfunction hospital surgeon nurse "
+    "procedure reported returned evaluation investigation root cause lot serial corrective action replaced "
+    "intended use technological characteristics substantial equivalence predicate biocompatibility testing "
+    "performance bench clinical data risk analysis cybersecurity wireless telemetry charging adapter housing"
+).split()
+_SYN_FIRM_STEMS = (
+    "acme nova blue north zen ortho cardio medi bio neuro vita summit apex pioneer stellar harbor cedar quantum "
+    "vertex lumen river peak bright core prime allied united pacific atlantic sierra"
+).split()
+_SYN_FIRM_KINDS = ["Medical", "Devices", "Surgical", "Health", "Systems", "Technologies", "Instruments", "Scientific"]
+_SYN_FIRM_SUFFIXES = [", Inc.", " Inc", " LLC", " Corporation", " Corp.", " Ltd.", " GmbH", ""]
+_SYN_PANELS = ["Anesthesiology", "Cardiovascular", "General Hospital", "Orthopedic", "Neurology", "Radiology",
+               "General and Plastic Surgery", "Clinical Chemistry", "Gastroenterology/Urology"]
+
+
+def _syn_texts(rng: np.random.Generator, n: int, min_words: int, max_words: int, pool: int = 4000) -> List[str]:
+    """n mostly distinct texts of min..max words: three sampled fragments from shared fragment pools."""
+    words = np.asarray(_SYN_WORDS, dtype=object)
+    frag = []
+    for _ in range(3):
+        lens = rng.integers(max(1, min_words // 3), max(2, max_words // 3 + 1), pool)
+        frag.append([" ".join(words[rng.integers(0, len(words), k)]) for k in lens.tolist()])
+    a, b, c = (rng.integers(0, pool, n).tolist() for _ in range(3))
+    return [f"{frag[0][i].capitalize()} {frag[1][j]} {frag[2][k]}." for i, j, k in zip(a, b, c)]
+
+
+def _syn_dates(rng: np.random.Generator, n: int, start: str = "2000-01-01", end: str = "2025-12-31") -> np.ndarray:
+    lo, hi = np.datetime64(start, "D").astype(np.int64), np.datetime64(end, "D").astype(np.int64)
+    return rng.integers(lo, hi + 1, n).astype("datetime64[D]").astype(str).astype(object)
+
+
+def _syn_pick(rng: np.random.Generator, choices: List[Any], n: int, p: Optional[List[float]] = None) -> List[Any]:
+    return [choices[i] for i in rng.choice(len(choices), n, p=p).tolist()]
+
+
+def generate_synthetic_datasets(n_rows: Union[int, Dict[str, int]] = 10_000, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Raw (pre-standardization) frames for all four CANON schemas with openFDA-like shapes:
+    long narratives/summaries, firm-name spelling variants, ~2k product codes shared by every dataset,
+    ADR UDI-DIs drawn from GUDID, ADR recall links and 510(k) predicates pointing at real rows.
+    `n_rows` is the row count per dataset (or a dict per dataset).
+    """
+    sizes = n_rows if isinstance(n_rows, dict) else {ds: int(n_rows) for ds in CANON}
+    rng = np.random.default_rng(seed)
+    letters = np.asarray(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    codes = sorted({"".join(x) for x in letters[rng.integers(0, 26, (2500, 3))].tolist()})[:2000]
+    n_firms = max(50, max(sizes.values()) // 200)
+    firms = [f"{_SYN_FIRM_STEMS[i % len(_SYN_FIRM_STEMS)].capitalize()}{'' if i < len(_SYN_FIRM_STEMS) else i} "
+             f"{_SYN_FIRM_KINDS[(i // 7) % len(_SYN_FIRM_KINDS)]}" for i in range(n_firms)]
+
+    def firm_names(n: int) -> List[str]:
+        base = rng.zipf(1.6, n) % n_firms
+        suf = rng.integers(0, len(_SYN_FIRM_SUFFIXES), n)
+        upper = rng.random(n) < 0.2
+        out = [firms[b] + _SYN_FIRM_SUFFIXES[s] for b, s in zip(base.tolist(), suf.tolist())]
+        return [v.upper() if u else v for v, u in zip(out, upper.tolist())]
+
+    def nullify(values: List[Any], frac: float) -> List[Any]:
+        drop = rng.random(len(values)) < frac
+        return [None if d else v for v, d in zip(values, drop.tolist())]
+
+    out: Dict[str, pd.DataFrame] = {}
+
+    n = sizes.get("gudid", 0)
+    dis = [f"{v:014d}" for v in (800_000_000_000 + rng.permutation(n * 3)[:n]).tolist()]
+    bools = lambda: _syn_pick(rng, [True, False, "Yes", "No", None], n, [0.4, 0.4, 0.08, 0.08, 0.04])
+    out["gudid"] = pd.DataFrame({
+        "primary_di": dis,
+        "udi_di": dis,
+        "device_description": _syn_texts(rng, n, 4, 24),
+        "device_class": _syn_pick(rng, ["I", "II", "III"], n, [0.3, 0.55, 0.15]),
+        "manufacturer_name": firm_names(n),
+        "brand_name": [f"{w.capitalize()}{i % 97}" for w, i in zip(_syn_pick(rng, _SYN_WORDS, n), range(n))],
+        "product_code": _syn_pick(rng, codes, n),
+        "gmdn_term": _syn_texts(rng, n, 2, 6, pool=300),
+        "mri_safety": _syn_pick(rng, ["MR Safe", "MR Conditional", "MR Unsafe", "Labeling does not contain MRI Safety Information"], n),
+        "sterile": bools(), "single_use": bools(), "implantable": bools(), "contains_nrl": bools(),
+        "version_or_model_number": [f"M-{v}" for v in rng.integers(100, 99_999, n).tolist()],
+        "catalog_number": [f"C{v}" for v in rng.integers(10_000, 9_999_999, n).tolist()],
+        "record_status": _syn_pick(rng, ["Published", "Unpublished", "Deactivated"], n, [0.9, 0.05, 0.05]),
+        "publish_date": _syn_dates(rng, n, "2014-01-01"),
+        "company_contact_email": [f"regulatory{v}@example.com" for v in rng.integers(0, n_firms, n).tolist()],
+        "company_contact_phone": [f"+1-{a}-555-{b:04d}" for a, b in zip(rng.integers(200, 999, n).tolist(), rng.integers(0, 9999, n).tolist())],
+        "company_state": _syn_pick(rng, ["CA", "MN", "MA", "IL", "TX", "NY", "FL", "MD", "OH", None], n),
+        "company_country": _syn_pick(rng, ["US", "DE", "IE", "JP", "CN", "CH"], n, [0.7, 0.08, 0.06, 0.06, 0.06, 0.04]),
+    })
+
+    n = sizes.get("510k", 0)
+    kn = [f"K{v:06d}" for v in (100_000 + np.arange(n)).tolist()]
+    n_pred = rng.integers(0, 4, n)
+    pred_idx = (rng.random((n, 3)) * np.maximum(np.arange(n), 1)[:, None]).astype(np.int64)
+    preds = [[kn[j] for j in pred_idx[i, :k].tolist()] if i else [] for i, k in enumerate(n_pred.tolist())]
+    names = firm_names(n)
+    out["510k"] = pd.DataFrame({
+        "k_number": kn,
+        "decision_date": _syn_dates(rng, n),
+        "decision": _syn_pick(rng, ["SESE", "SESU", "SESK", "SESD", "SESP", "DENG"], n, [0.7, 0.1, 0.08, 0.05, 0.05, 0.02]),
+        "device_name": _syn_texts(rng, n, 2, 8, pool=2000),
+        "applicant": names,
+        "manufacturer_name": nullify(names, 0.1),
+        "product_code": _syn_pick(rng, codes, n),
+        "regulation_number": [f"{a}.{b}" for a, b in zip(rng.integers(862, 893, n).tolist(), rng.integers(1000, 6000, n).tolist())],
+        "device_class": _syn_pick(rng, ["I", "II", "III"], n, [0.2, 0.75, 0.05]),
+        "panel": _syn_pick(rng, _SYN_PANELS, n),
+        "review_advisory_committee": _syn_pick(rng, _SYN_PANELS, n),
+        "predicate_k_numbers": preds,
+        "summary": _syn_texts(rng, n, 20, 120),
+    })
+
+    n = sizes.get("recall", 0)
+    rn = [f"Z-{i % 10_000:04d}-{2000 + i // 10_000}" for i in range(n)]
+    ev = _syn_dates(rng, n, "2005-01-01")
+    names = firm_names(n)
+    out["recall"] = pd.DataFrame({
+        "recall_number": rn,
+        "recall_class": _syn_pick(rng, ["I", "II", "III"], n, [0.1, 0.8, 0.1]),
+        "event_date": ev,
+        "termination_date": nullify(list(_syn_dates(rng, n, "2006-01-01")), 0.4),
+        "status": _syn_pick(rng, ["Ongoing", "Terminated", "Completed"], n, [0.3, 0.6, 0.1]),
+        "firm_name": names,
+        "manufacturer_name": names,
+        "product_description": _syn_texts(rng, n, 8, 40),
+        "product_code": _syn_pick(rng, codes, n),
+        "code_info": [f"Lots {a}A01-{a}A{b:02d}" for a, b in zip(rng.integers(10, 99, n).tolist(), rng.integers(2, 99, n).tolist())],
+        "reason_for_recall": _syn_texts(rng, n, 10, 60),
+        "distribution_pattern": _syn_pick(rng, ["US Nationwide", "Worldwide", "US Nationwide and Canada", "CA, NV, AZ"], n),
+        "quantity_in_commerce": [f"{v:,}" if v % 3 == 0 else v for v in rng.integers(1, 500_000, n).tolist()],
+        "country": _syn_pick(rng, ["US", "CA", "DE"], n, [0.9, 0.05, 0.05]),
+        "state": _syn_pick(rng, ["CA", "MN", "MA", "IL", "TX", None], n),
+    })
+
+    n = sizes.get("adr", 0)
+    udi_pool = out["gudid"]["primary_di"].tolist() or [None]
+    rec_pool = rn or [None]
+    udis = [udi_pool[i] for i in rng.integers(0, len(udi_pool), n).tolist()]
+    links = [rec_pool[i] for i in rng.integers(0, len(rec_pool), n).tolist()]
+    out["adr"] = pd.DataFrame({
+        "adverse_event_id": [f"MDR-{2000 + i % 26}-{i:07d}" for i in range(n)],
+        "report_date": _syn_dates(rng, n, "2008-01-01"),
+        "event_type": _syn_pick(rng, ["Malfunction", "Injury", "Death", "Other"], n, [0.6, 0.3, 0.03, 0.07]),
+        "patient_outcome": _syn_pick(rng, ["Serious Injury", "Hospitalization", "Required Intervention", "Other", None], n),
+        "device_problem": _syn_texts(rng, n, 2, 6, pool=500),
+        "manufacturer_name": firm_names(n),
+        "brand_name": _syn_pick(rng, out["gudid"]["brand_name"].tolist() or ["Generic"], n),
+        "product_code": _syn_pick(rng, codes, n),
+        "device_class": _syn_pick(rng, ["I", "II", "III"], n),
+        "udi_di": nullify(udis, 0.4),
+        "recall_number_link": nullify(links, 0.9),
+        "narrative": _syn_texts(rng, n, 40, 250),
+    })
+    return {ds: out[ds] for ds in ["510k", "recall", "adr", "gudid"] if ds in sizes}
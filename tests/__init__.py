@@ -0,0 +1 @@
+"""Tests for the fdacore data and search layers."""
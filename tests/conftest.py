@@ -0,0 +1,15 @@
+from typing import Dict
+
+import pandas as pd
+import pytest
+
+from fdacore.datasets import ColumnMappingCache, ManufacturerResolver, standardize_df
+from fdacore.synthetic import generate_synthetic_datasets
+
+
+@pytest.fixture(scope="session")
+def std_frames() -> Dict[str, pd.DataFrame]:
+    """Small standardized synthetic extracts of all four datasets (shared, treat as read-only)."""
+    resolver, mapping = ManufacturerResolver(None), ColumnMappingCache(None)
+    return {ds: standardize_df(ds, df, resolver, mapping_cache=mapping)[0]
+            for ds, df in generate_synthetic_datasets(400, seed=1).items()}
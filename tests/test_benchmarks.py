@@ -0,0 +1,10 @@
+from benchmarks.suite import compare_benchmark_runs, load_benchmark_runs, run_benchmark_suite, save_benchmark_run
+
+
+def test_suite_runs_headless(tmp_path):
+    run = run_benchmark_suite(300, repeats=1, queries=["pump"], trace_memory=False)
+    cases = {r["case"] for r in run["results"]}
+    assert {"search_index_build", "search[fuzzy] pump", "search[exact] pump", "coral_highlight"} <= cases
+    save_benchmark_run(run, str(tmp_path))
+    table = compare_benchmark_runs(load_benchmark_runs(str(tmp_path)))
+    assert len(table) == len(run["results"])
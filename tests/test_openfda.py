@@ -0,0 +1,53 @@
+import json
+import os
+import zipfile
+
+from fdacore.openfda import _openfda_batches, ingest_openfda_bulk, openfda_partitions, run_openfda_worker
+
+
+def write_partition(path, name, records):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(name, json.dumps({"meta": {"results": {"total": len(records)}}, "results": records}))
+
+
+def k_record(i):
+    return {"k_number": f"K{200000 + i}", "decision_date": "20210315", "device_name": f"Infusion pump model {i}",
+            "applicant": "ACME Medical Inc.", "openfda": {"device_class": "2"}}
+
+
+def test_worker_writes_arrow_batches(tmp_path):
+    part = tmp_path / "device-510k-0001-of-0001.json.zip"
+    write_partition(part, "device-510k-0001-of-0001.json", [k_record(i) for i in range(5)])
+    out = tmp_path / "part.arrow"
+    paths = {"k_number": ["k_number"], "device_class": ["openfda.device_class"]}
+    assert run_openfda_worker(str(part), ("device-510k-0001-of-0001.json",), paths, str(out)) == 5
+    frames = list(_openfda_batches(str(out)))
+    assert [list(f.columns) for f in frames] == [["k_number", "device_class"]]
+    assert frames[0]["k_number"].tolist() == [f"K{200000 + i}" for i in range(5)]
+
+
+def test_ingest_keeps_partition_order(tmp_path):
+    for p in range(3):
+        write_partition(tmp_path / f"device-510k-000{p + 1}-of-0003.json.zip", f"device-510k-000{p + 1}-of-0003.json",
+                        [k_record(p * 10 + i) for i in range(10)])
+    seen = []
+    out, report = ingest_openfda_bulk(str(tmp_path), max_workers=2, progress=lambda done, total, name: seen.append(done))
+    assert seen == [1, 2, 3]
+    assert out["510k"]["k_number"].astype(str).tolist() == [f"K{200000 + i}" for i in range(30)]
+    assert "| 510k | 3 | 30 | 30 |" in report
+
+
+def test_partitions_confined_to_root(tmp_path):
+    data, outside = tmp_path / "data", tmp_path / "outside"
+    (data / "src").mkdir(parents=True)
+    (data / "shared").mkdir()
+    outside.mkdir()
+    (data / "shared" / "a.json").write_text("[]")
+    (outside / "b.json").write_text("[]")
+    os.symlink("../shared/a.json", data / "src" / "a.json")
+    os.symlink(str(outside / "b.json"), data / "src" / "b.json")
+
+    confined = openfda_partitions(str(data / "src"), root=str(data))
+    assert [(os.path.realpath(c), name) for c, _, name in confined] == [(str((data / "shared" / "a.json").resolve()), "a.json")]
+    unconfined = openfda_partitions(str(data / "src"))
+    assert sorted(name for _, _, name in unconfined) == ["a.json", "b.json"]
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from fdacore.datasets import ManufacturerResolver, standardize_df
+from fdacore.search import RegulatorySearchEngine, parse_query
+
+MALFORMED = ["pump NOT", "pump AND NOT", "NOT", "NOT )", "NOT NOT", "( NOT", "()", ")(", "pump (", "a OR", "OR OR",
+             "NOT OR pump", "pump AND", "AND", "( ( pump", "product_code:", "NOT (a OR )"]
+
+
+def text_nodes(node):
+    if node is None:
+        return []
+    if node[0] == "text":
+        return [node]
+    if node[0] == "field":
+        return []
+    return [t for x in ([node[1]] if node[0] == "not" else node[1]) for t in text_nodes(x)]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    raw = pd.DataFrame([
+        {"recall_number": "Z-1", "product_code": "FRN", "firm_name": "Acme", "reason_for_recall": "battery overheating"},
+        {"recall_number": "Z-2", "product_code": "FRO", "firm_name": "Acme", "reason_for_recall": "occlusion alarm"},
+        {"recall_number": "Z-3", "product_code": "FR", "firm_name": "Nova", "reason_for_recall": "battery pump leak"},
+        {"recall_number": "Z-4", "product_code": "LZG", "firm_name": "Nova", "reason_for_recall": "infusion pump alarm"},
+        {"recall_number": "Z-5", "product_code": "LZG", "firm_name": "Zen", "reason_for_recall": "label misprint"},
+    ])
+    std = standardize_df("recall", raw, ManufacturerResolver(None))[0]
+    return RegulatorySearchEngine({"recall": std})
+
+
+def hits(engine, query, exact=True, fuzzy_level=100):
+    return sorted(r.record["recall_number"] for r in engine.search(query, {}, exact, fuzzy_level)["recall"])
+
+
+@pytest.mark.parametrize("query", MALFORMED)
+def test_malformed_queries_parse_and_search(engine, query):
+    parsed = parse_query(query)
+    assert all(isinstance(t[1], str) for t in text_nodes(parsed.expr))
+    engine.search(query, {}, False, 80)
+    engine.search(query, {}, True, 100)
+
+
+def test_dangling_not_is_dropped():
+    assert parse_query("pump NOT") == parse_query("pump")
+    assert parse_query("pump AND NOT") == parse_query("pump")
+
+
+def test_not_group_of_text(engine):
+    assert hits(engine, "NOT (battery pump)") == ["Z-1", "Z-2", "Z-4", "Z-5"]
+    assert hits(engine, "NOT (battery OR pump)") == ["Z-2", "Z-5"]
+
+
+def test_text_or_field(engine):
+    assert hits(engine, "battery OR product_code:LZG") == ["Z-1", "Z-3", "Z-4", "Z-5"]
+
+
+def test_or_group_and_text(engine):
+    assert parse_query("(battery OR alarm) pump").text == "pump"
+    assert hits(engine, "(battery OR alarm) pump") == ["Z-3", "Z-4"]
+
+
+def test_field_equality_is_exact(engine):
+    assert hits(engine, "product_code:FR") == ["Z-3"]
+    assert hits(engine, "product_code:fr battery") == ["Z-3"]
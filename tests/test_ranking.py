@@ -0,0 +1,65 @@
+import os
+import re
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from fdacore.search import (
+    LONG_TEXT_COLUMNS, SEARCH_SPECS, DatasetSearchIndex, RegulatorySearchEngine, SemanticIndex, prune_semantic_cache,
+)
+
+
+@pytest.fixture(scope="module")
+def engine(std_frames):
+    return RegulatorySearchEngine({"adr": std_frames["adr"]})
+
+
+def rows(engine, query, exact, fuzzy_level):
+    return {r.row: r.score for r in engine.cursor(query, "adr", exact, fuzzy_level, ranking="bm25").page(0, 10_000)}
+
+
+@pytest.mark.parametrize("fuzzy_level", [60, 100])
+def test_bm25_keeps_every_term_match(engine, std_frames, fuzzy_level):
+    texts = std_frames["adr"][LONG_TEXT_COLUMNS["adr"][0]].astype(str).str.lower()
+    expected = {i for i, v in enumerate(texts) if re.search(r"\bbattery\b", v)}
+    got = rows(engine, "battery", False, fuzzy_level)
+    assert expected and expected <= set(got)
+    assert all(0 < sc <= 100 for sc in got.values())
+
+
+def test_bm25_exact_requires_substring(engine, std_frames):
+    df = std_frames["adr"]
+    got = rows(engine, "battery pump", True, 100)
+    assert got
+    for r in got:
+        assert any("battery pump" in str(df[c].iloc[r]).lower() for c in SEARCH_SPECS["adr"])
+
+
+def test_semantic_vocabulary_matches_row_counts(std_frames):
+    df = std_frames["adr"]
+    idx = DatasetSearchIndex("adr", df)
+    df_count: Counter = Counter()
+    for i in range(len(df)):
+        row: Counter = Counter()
+        for cidx in idx.columns.values():
+            row.update(re.findall(r"[a-z0-9]+", cidx.values[cidx.codes[i]]))
+        df_count.update(row.keys())
+    expected = [tok for tok, d in df_count.most_common() if d >= 2]
+    vectors, terms, idf, _ = SemanticIndex._fit(idx.columns, len(df))
+    assert terms == expected
+    assert np.allclose(idf, np.log((1 + len(df)) / (1 + np.asarray([df_count[t] for t in terms]))) + 1)
+    assert vectors.shape[0] == len(df)
+    assert np.allclose(np.linalg.norm(vectors[np.linalg.norm(vectors, axis=1) > 0], axis=1), 1, atol=1e-5)
+
+
+def test_prune_semantic_cache_drops_least_recently_used(tmp_path):
+    for age, name in enumerate(["adr_new", "adr_mid", "adr_old"]):
+        for suffix in (".vectors.npy", ".model.npz"):
+            path = tmp_path / (name + suffix)
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1_000_000 - age * 10, 1_000_000 - age * 10))
+    (tmp_path / "adr_x.123.tmp.npy").write_bytes(b"x" * 1000)
+    assert prune_semantic_cache(keep="adr_old", max_bytes=400, cache_dir=str(tmp_path)) == ["adr_mid"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "adr_new.model.npz", "adr_new.vectors.npy", "adr_old.model.npz", "adr_old.vectors.npy", "adr_x.123.tmp.npy"]
@@ -0,0 +1,66 @@
+import gc
+
+import pandas as pd
+
+from fdacore.datasets import dataset_fingerprint
+from fdacore.registry import _FINGERPRINT_MEMO, SessionDatasets, SharedDatasetRegistry, cached_fingerprint
+
+
+def test_views_are_copy_on_write(std_frames):
+    base = std_frames["recall"].copy()
+    before = cached_fingerprint(base)
+    registry = SharedDatasetRegistry()
+    a = SessionDatasets(registry, {})
+    b = SessionDatasets(registry, {})
+    view_a = a.share("recall", base)
+    view_b = b.attach("recall", before)
+    assert view_b is not None and registry.entries()[0]["refs"] == 2
+
+    view_a.loc[view_a.index[0], "product_code"] = "XXX"
+    view_a["reason_for_recall"] = "overwritten"
+    assert base["product_code"].iloc[0] != "XXX"
+    assert (view_b["reason_for_recall"] != "overwritten").all()
+    assert cached_fingerprint(base.copy()) == before
+
+
+def test_last_handle_releases_frame():
+    registry = SharedDatasetRegistry()
+    a = SessionDatasets(registry, {})
+    b = SessionDatasets(registry, {})
+    df = pd.DataFrame({"k_number": ["K1", "K2"]})
+    a.share("510k", df)
+    b.share("510k", df.copy())
+    assert [e["refs"] for e in registry.entries()] == [2]
+    a.dfs["510k"] = pd.DataFrame({"k_number": ["K3"]})
+    a.sync()
+    gc.collect()
+    assert [e["refs"] for e in registry.entries()] == [1]
+    del b
+    gc.collect()
+    assert registry.entries() == []
+    assert registry.pop_released() == [("510k", cached_fingerprint(df))]
+    assert registry.pop_released() == []
+
+
+def test_registry_keeps_its_own_copy():
+    registry = SharedDatasetRegistry()
+    session = SessionDatasets(registry, {})
+    df = pd.DataFrame({"k_number": ["K1", "K2"]})
+    fp = cached_fingerprint(df)
+    session.share("510k", df)
+    df.loc[0, "k_number"] = "K9"
+    other = SessionDatasets(registry, {}).attach("510k", fp)
+    assert other["k_number"].tolist() == ["K1", "K2"]
+    assert cached_fingerprint(other) == dataset_fingerprint(other) == fp
+
+
+def test_fingerprint_memo_checks_columns_and_forgets_collected_frames():
+    df = pd.DataFrame({"k_number": ["K1", "K2"]})
+    first = cached_fingerprint(df)
+    df["decision"] = "SESE"
+    assert cached_fingerprint(df) == dataset_fingerprint(df) != first
+    key = id(df)
+    del df
+    gc.collect()
+    cached_fingerprint(pd.DataFrame({"k_number": ["K3"]}))
+    assert key not in _FINGERPRINT_MEMO or _FINGERPRINT_MEMO[key][0]() is not None
@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fdacore.search import SEARCH_LIMIT, SEARCH_SPECS, BoundedExecutor, RegulatorySearchEngine
+
+QUERIES = ["battery overheating", "infusion pump", "occlusion alarm", "latex", "acme medical", "sterile packaging"]
+
+
+@pytest.fixture(scope="module")
+def engine(std_frames):
+    return RegulatorySearchEngine(std_frames)
+
+
+def baseline(engine, ds, df, query, exact, fuzzy_level):
+    """Row -> score of the original row-by-row scan (`_score_row` over SEARCH_SPECS columns)."""
+    cols = SEARCH_SPECS[ds]
+    out = {}
+    for i, rec in enumerate(df.to_dict(orient="records")):
+        sc = engine._score_row(rec, cols, query, exact, fuzzy_level)
+        if sc:
+            out[i] = sc
+    return out
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("exact,fuzzy_level", [(False, 80), (False, 60), (True, 100)])
+def test_indexed_search_matches_row_scan(engine, std_frames, query, exact, fuzzy_level):
+    results = engine.search(query, {}, exact, fuzzy_level)
+    for ds, df in std_frames.items():
+        expected = baseline(engine, ds, df, query, exact, fuzzy_level)
+        got = results[ds]
+        assert len(got) == min(len(expected), SEARCH_LIMIT)
+        assert all(expected.get(r.row) == r.score for r in got)
+        assert [r.score for r in got] == sorted(expected.values(), reverse=True)[:len(got)]
+
+
+def test_bounded_executor_matches_sequential_search(engine):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for query in QUERIES[:3]:
+            par = engine.search_with_timings(query, {}, False, 80, executor=BoundedExecutor(pool, 2), memo=False)[0]
+            seq = engine.search_with_timings(query, {}, False, 80, memo=False)[0]
+            assert {ds: [(r.row, r.score) for r in hits] for ds, hits in par.items()} == \
+                {ds: [(r.row, r.score) for r in hits] for ds, hits in seq.items()}
+
+
+def test_bounded_executor_limits_concurrency():
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def task():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        bounded = BoundedExecutor(pool, 3)
+        for f in [bounded.submit(task) for _ in range(12)]:
+            f.result()
+        bounded.shutdown()
+        assert pool.submit(lambda: 1).result() == 1
+    assert peak[0] == 3
+
+
+@pytest.mark.parametrize("exact,fuzzy_level", [(False, 80), (True, 100)])
+def test_cursor_matches_search_for_k_number(engine, exact, fuzzy_level):
+    lineage = engine.indexes["510k"].lineage
+    k_number = next(k for k, parents in lineage.parents.items() if parents)
+    results = engine.search(k_number, {}, exact, fuzzy_level)["510k"]
+    assert any(r.score == 95 for r in results)
+    page = engine.cursor(k_number, "510k", exact, fuzzy_level).page(0, len(results))
+    assert [(r.row, r.score) for r in page] == [(r.row, r.score) for r in results]
@@ -0,0 +1,69 @@
+import itertools
+import string
+
+import pandas as pd
+
+import fdacore.datasets as datasets
+from fdacore.datasets import ColumnMappingCache, ManufacturerResolver, standardize_df
+
+RAW = pd.DataFrame({
+    "K Number": ["K100001", "K100002", "K100003"],
+    "Applicant": ["Acme Medical, Inc.", "ACME MEDICAL INC", "Nova Surgical LLC"],
+    "Device Name": ["Infusion pump", "Pump set", "Stapler"],
+})
+
+
+def test_resolver_writes_only_on_save(tmp_path):
+    path = tmp_path / "clusters.json"
+    resolver = ManufacturerResolver(str(path))
+    std, _ = standardize_df("510k", RAW, resolver)
+    assert not path.exists()
+    ids = std["manufacturer_id"].astype(str).tolist()
+    assert ids[0] == ids[1] != ids[2]
+
+    resolver.save()
+    assert path.exists()
+    reloaded = ManufacturerResolver(str(path))
+    assert standardize_df("510k", RAW, reloaded)[0]["manufacturer_id"].astype(str).tolist() == ids
+    assert not reloaded.dirty
+
+
+def test_default_resolver_is_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    standardize_df("510k", RAW)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_mapping_cache_writes_only_on_save(tmp_path):
+    path = tmp_path / "mapping.json"
+    cache = ColumnMappingCache(str(path))
+    std, _ = standardize_df("510k", RAW, mapping_cache=cache)
+    assert not path.exists() and cache.misses == 1
+    standardize_df("510k", RAW, mapping_cache=cache)
+    assert cache.hits == 1
+
+    cache.save()
+    reloaded = ColumnMappingCache(str(path))
+    again, _ = standardize_df("510k", RAW, mapping_cache=reloaded)
+    assert reloaded.hits == 1 and not reloaded.dirty
+    assert again["k_number"].tolist() == std["k_number"].tolist()
+
+
+def test_large_blocks_score_only_the_window(monkeypatch):
+    monkeypatch.setattr(datasets, "MANUFACTURER_FULL_BLOCK", 16)
+    monkeypatch.setattr(datasets, "MANUFACTURER_WINDOW", 4)
+    widths = []
+    cdist = datasets.process.cdist
+
+    def spy(queries, choices, **kw):
+        widths.append(len(choices))
+        return cdist(queries, choices, **kw)
+
+    monkeypatch.setattr(datasets.process, "cdist", spy)
+    words = ["".join(p) for p in itertools.product(string.ascii_lowercase[:8], repeat=3)]
+    resolver = ManufacturerResolver(None)
+    resolver.resolve([f"Acme {w}" for w in words[::2]])
+    widths.clear()
+    ids, _ = resolver.resolve([f"Acme {w}" for w in words[1::64]] + ["Acme Medical", "Acme Medicall"])
+    assert widths and max(widths) <= 3 * 4 + 1
+    assert ids[-1] == ids[-2]
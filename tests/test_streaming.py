@@ -0,0 +1,55 @@
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+from fdacore.datasets import _stream_format, iter_dataset_chunks, resolve_data_path
+
+RECORDS = [{"recall_number": f"Z-{i}", "product_code": "FRN", "reason_for_recall": f"reason {i}"} for i in range(7)]
+
+
+@pytest.mark.parametrize("head,filename,fmt", [
+    ('{"meta": {}, "results": [{"a": 1}]}', "x.json", "json"),
+    ('{"meta": {}, "results": [{"a": 1}]}', None, "json"),
+    ('{"a": 1}\n{"a": 2}\n', None, "ndjson"),
+    ('{"a": 1}\n{"a": 2}\n', "x.json", "json"),
+    ('{"a": 1}\n{"a": 2}\n', "x.jsonl.gz", "ndjson"),
+    ('{"a": 1}\n{"a": 2', None, "json"),
+    ('[{"a": 1}]', None, "json"),
+    ("a,b\n1,2\n", None, "csv"),
+    ("a,b\n1,2\n", "x.csv", "csv"),
+])
+def test_stream_format(head, filename, fmt):
+    assert _stream_format(head, filename) == fmt
+
+
+def payloads():
+    yield "x.json", json.dumps(RECORDS).encode()
+    yield "x.json", json.dumps({"meta": {"results": {"total": 7}}, "results": RECORDS}, separators=(",", ":")).encode()
+    yield "x.ndjson", "".join(json.dumps(r) + "\n" for r in RECORDS).encode()
+    yield "x.csv", ("recall_number,product_code,reason_for_recall\n"
+                    + "".join(f"{r['recall_number']},FRN,{r['reason_for_recall']}\n" for r in RECORDS)).encode()
+
+
+@pytest.mark.parametrize("name,data", list(payloads()))
+@pytest.mark.parametrize("gz", [False, True])
+def test_iter_dataset_chunks(name, data, gz):
+    if gz:
+        name, data = name + ".gz", gzip.compress(data)
+    chunks = list(iter_dataset_chunks(io.BytesIO(data), name, chunk_rows=3))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert [r for c in chunks for r in c["recall_number"].tolist()] == [r["recall_number"] for r in RECORDS]
+
+
+def test_resolve_data_path(tmp_path):
+    root = tmp_path / "data"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "a.csv").write_text("a\n1\n")
+    os.symlink("/etc", root / "escape")
+    assert resolve_data_path("sub/a.csv", str(root)) == str((root / "sub" / "a.csv").resolve())
+    assert resolve_data_path(str(root / "sub" / "a.csv"), str(root)) == str((root / "sub" / "a.csv").resolve())
+    for bad in ["/etc/passwd", "../data2/x", "sub/../../x", "escape/passwd"]:
+        with pytest.raises(ValueError):
+            resolve_data_path(bad, str(root))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fdacore.datasets import compact_df, upsert_dataset
+from fdacore.search import DatasetSearchIndex
+
+QUERIES = ["infusion pump", "battery overheating", "acme medical", "latex"]
+
+
+def make_delta(base: pd.DataFrame, n_upd: int = 5, n_ins: int = 5) -> pd.DataFrame:
+    """`n_upd` edited copies of base rows plus `n_ins` new rows under fresh keys, uncompacted (object)."""
+    upd = base.iloc[:n_upd].astype(object).copy()
+    upd["device_name"] = [f"Infusion pump revision {i}" for i in range(n_upd)]
+    ins = base.iloc[n_upd:n_upd + n_ins].astype(object).copy()
+    ins["k_number"] = [f"K9{i:05d}" for i in range(n_ins)]
+    ins["applicant"] = "Brand New Devices LLC"
+    return pd.concat([upd, ins], ignore_index=True)
+
+
+def test_upsert_keeps_base_dtypes(std_frames):
+    base = std_frames["510k"]
+    merged, stats = upsert_dataset("510k", base, make_delta(base))
+    assert (stats["inserted"], stats["updated"]) == (5, 5)
+    assert len(merged) == len(base) + 5
+    for c in base.columns:
+        if isinstance(base[c].dtype, pd.CategoricalDtype):
+            assert set(base[c].cat.categories) <= set(merged[c].cat.categories), c
+        else:
+            assert merged[c].dtype == base[c].dtype, c
+    assert merged["device_name"].iloc[:5].tolist() == [f"Infusion pump revision {i}" for i in range(5)]
+    assert merged["k_number"].iloc[-5:].tolist() == [f"K9{i:05d}" for i in range(5)]
+    assert "Brand New Devices LLC" in merged["applicant"].tolist()
+    assert stats["changed_rows"].tolist() == [*range(5), *range(len(base), len(base) + 5)]
+    untouched = slice(5, len(base))
+    pd.testing.assert_frame_equal(merged.iloc[untouched], base.iloc[untouched], check_categorical=False)
+
+
+def test_upsert_matches_full_recompaction(std_frames):
+    base = std_frames["510k"]
+    merged, _ = upsert_dataset("510k", base, make_delta(base))
+    expected = compact_df(merged.astype(object))[0]
+    for c in merged.columns:
+        assert merged[c].astype(object).where(merged[c].notna(), None).tolist() == \
+            expected[c].astype(object).where(expected[c].notna(), None).tolist(), c
+
+
+def test_upsert_falls_back_to_object_for_unparseable_dates(std_frames):
+    base = std_frames["510k"]
+    date_cols = [c for c in base.columns if pd.api.types.is_datetime64_any_dtype(base[c].dtype)]
+    if not date_cols:
+        pytest.skip("no compacted date column")
+    delta = make_delta(base, n_upd=1, n_ins=0)
+    delta[date_cols[0]] = "not a date"
+    merged, _ = upsert_dataset("510k", base, delta)
+    assert merged[date_cols[0]].iloc[0] == "not a date"
+    assert merged[date_cols[0]].dtype == object
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_patched_index_matches_fresh_index(std_frames, query):
+    base = std_frames["510k"]
+    merged, stats = upsert_dataset("510k", base, make_delta(base))
+    patched = DatasetSearchIndex("510k", base).with_rows(merged, stats["changed_rows"])
+    fresh = DatasetSearchIndex("510k", merged)
+    for exact, fuzzy_level in [(False, 80), (True, 100)]:
+        a = patched.top_rows(query, exact, fuzzy_level, len(merged))
+        b = fresh.top_rows(query, exact, fuzzy_level, len(merged))
+        assert dict(zip(np.asarray(a[0]).tolist(), np.asarray(a[1]).tolist())) == \
+            dict(zip(np.asarray(b[0]).tolist(), np.asarray(b[1]).tolist()))